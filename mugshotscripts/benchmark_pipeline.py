@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark
+
+Times each Python stage of the pipeline on a synthetic dataset (see
+synthetic_data.py) and records throughput, wall and CPU time and peak RSS, so
+optimizations can be compared against a saved baseline:
+
+    parse_sheriff               BeautifulSoup + scrape.extract_inmate_data per sheriff page
+    parse_fdc                   BeautifulSoup + scrape_fdc.extract_inmate_data per FDC page
+    flatten_charges             scrape.flatten_charges per sheriff record
+    prompt_assembly             consolidated_mugshot_processor.process_inmate_data, LLM stubbed
+    severity                    crime_severity_classifier.process_crime_severity, LLM stubbed, pacing sleeps skipped
+    extract_sentences           scripts/extract_sentences.process_csv_file on the FDC CSV, streamed to JSONL/CSV
+    extract_sentences_parallel  the same with one worker process per core
+
+Each stage runs in a fresh interpreter so its peak RSS is its own. Loading inputs
+happens before the clock starts; the stage's own logging goes to /dev/null. The
+stubbed client answers in-process with mock_openai_server.py's canned responses,
+so the API stages measure prompt assembly, dedup and bookkeeping, not the network
+(nor the rate-limit pacing sleeps, which are patched out). A stage that crashes,
+even hard (OOM kill, segfault), or runs past --stage-timeout is reported as failed.
+
+Usage:
+    python3 benchmark_pipeline.py --rows 100000 --save baseline_100k.json
+    python3 benchmark_pipeline.py --rows 100000 --compare baseline_100k.json
+"""
+
+import argparse
+import contextlib
+import csv
+import datetime
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import resource
+import sys
+import tempfile
+import time
+
+from synthetic_data import (DEFAULT_PAGES, DEFAULT_ROWS, DEFAULT_SEED, FDC_CSV_NAME, FDC_PAGES_DIR, SHERIFF_CSV_NAME,
+                            SHERIFF_PAGES_DIR, default_dataset_dir, generate_dataset, load_dataset_info)
+
+# --- Globals ---
+STAGES = ["parse_sheriff", "parse_fdc", "flatten_charges", "prompt_assembly", "severity", "extract_sentences",
+          "extract_sentences_parallel"]
+DEFAULT_TOLERANCE = 0.10 # Allowed relative throughput drop / peak RSS growth before --compare reports a regression
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+CHARGE_FIELDS = ["Statute", "Charge Comments", "Case Number", "Description", "Bond Amount", "Bond Type"]
+DEFAULT_STAGE_TIMEOUT = 3600 # Seconds before a stage process is killed and reported as failed
+RESULT_POLL_SECONDS = 1.0
+
+# --- Helper Functions ---
+def log_message(message):
+    """Logs a message with a timestamp."""
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
+    print(f"[{timestamp}] {message}")
+
+def read_pages(data_dir, pages_dir):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(data_dir, pages_dir, "*.html"))):
+        with open(path, encoding="utf-8") as file:
+            pages.append((os.path.splitext(os.path.basename(path))[0], file.read()))
+    return pages
+
+class StubChatCompletions:
+    """chat.completions stand-in answering with mock_openai_server's canned responses, no network."""
+
+    def create(self, **request):
+        from openai.types.chat import ChatCompletion
+        from mock_openai_server import chat_completion
+        return ChatCompletion.model_validate(chat_completion(request))
+
+class StubOpenAIClient:
+    def __init__(self):
+        self.chat = type("StubChat", (), {"completions": StubChatCompletions()})()
+
+class NoSleepTime:
+    """The time module with sleep() as a no-op: installed in place of a stage module's time
+    so rate-limit pacing meant for the real API does not dominate the measurement."""
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+    @staticmethod
+    def sleep(seconds):
+        pass
+
+# --- Stages ---
+# Each setup function loads its inputs and returns (run, item count); only run() is timed.
+def setup_parse_sheriff(data_dir, work_dir):
+    from bs4 import BeautifulSoup
+    import scrape
+    pages = read_pages(data_dir, SHERIFF_PAGES_DIR)
+
+    def run():
+        for inmate_id, html in pages:
+            soup = BeautifulSoup(html, "html.parser")
+            if scrape.is_valid_inmate_page(soup):
+                scrape.extract_inmate_data(soup, inmate_id)
+    return run, len(pages)
+
+def setup_parse_fdc(data_dir, work_dir):
+    from bs4 import BeautifulSoup
+    import scrape_fdc
+    pages = read_pages(data_dir, FDC_PAGES_DIR)
+
+    def run():
+        for dc_number, html in pages:
+            soup = BeautifulSoup(html, "html.parser")
+            if scrape_fdc.is_valid_inmate_page(soup):
+                scrape_fdc.extract_inmate_data(soup, dc_number)
+    return run, len(pages)
+
+def setup_flatten_charges(data_dir, work_dir):
+    import scrape
+    charge_lists = []
+    with open(os.path.join(data_dir, SHERIFF_CSV_NAME), newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            columns = [row[field].split(" | ") for field in CHARGE_FIELDS]
+            charge_lists.append([dict(zip(CHARGE_FIELDS, values)) for values in zip(*columns)])
+
+    def run():
+        for charges in charge_lists:
+            scrape.flatten_charges(charges)
+    return run, len(charge_lists)
+
+def setup_prompt_assembly(data_dir, work_dir):
+    import pandas as pd
+    import consolidated_mugshot_processor as processor
+    from retry_policy import CircuitBreaker
+    processor.client_global = StubOpenAIClient()
+    processor.api_breaker_global = CircuitBreaker()
+    df = processor.prepare_inmate_frame(pd.read_csv(os.path.join(data_dir, SHERIFF_CSV_NAME)))
+
+    def run():
+        processor.process_inmate_data(df)
+    return run, len(df)
+
+def setup_severity(data_dir, work_dir):
+    import pandas as pd
+    import crime_severity_classifier as classifier
+    from mock_openai_server import canned_crime
+    from retry_policy import CircuitBreaker
+    classifier.client_global = StubOpenAIClient()
+    classifier.api_breaker_global = CircuitBreaker()
+    classifier.time = NoSleepTime() # Skips the 0.1s pause after every distinct crime
+    # Input shaped like a consolidated processor output: one Best_Crime per row
+    df = pd.read_csv(os.path.join(data_dir, SHERIFF_CSV_NAME))
+    df['Best_Crime'] = df['Description'].str.split(" | ", regex=False).str[0].map(canned_crime)
+    input_path = os.path.join(work_dir, "severity_input.csv")
+    df.to_csv(input_path, index=False)
+
+    def run():
+        classifier.process_crime_severity(input_path, os.path.join(work_dir, "severity_output.csv"))
+    return run, len(df)
+
+def setup_extract_sentences(data_dir, work_dir, workers=1):
+    from pathlib import Path
+    sys.path.insert(0, SCRIPTS_DIR)
+    import extract_sentences
+    csv_path = Path(data_dir) / FDC_CSV_NAME
+    with open(csv_path, newline="", encoding="utf-8") as file:
+        rows = sum(1 for _ in csv.DictReader(file))
+
+    def run():
+        with extract_sentences.SentenceWriter(Path(work_dir) / "extracted_sentences") as writer:
+            extract_sentences.process_csv_file(csv_path, workers, emit=writer.write)
+    return run, rows
+
+def setup_extract_sentences_parallel(data_dir, work_dir):
+    return setup_extract_sentences(data_dir, work_dir, workers=os.cpu_count() or 1)
+
+STAGE_SETUPS = {
+    "parse_sheriff": setup_parse_sheriff,
+    "parse_fdc": setup_parse_fdc,
+    "flatten_charges": setup_flatten_charges,
+    "prompt_assembly": setup_prompt_assembly,
+    "severity": setup_severity,
+    "extract_sentences": setup_extract_sentences,
+    "extract_sentences_parallel": setup_extract_sentences_parallel,
+}
+
+# --- Measurement ---
+def _cpu_seconds():
+    """CPU time of this process and its finished children (worker pools)."""
+    return sum(usage.ru_utime + usage.ru_stime
+               for usage in (resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)))
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024 # bytes on macOS, KiB on Linux
+
+def _stage_worker(stage, data_dir, results):
+    """Runs one stage in this (fresh) process and puts its measurements on the results queue."""
+    try:
+        with tempfile.TemporaryDirectory() as work_dir, open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            run, items = STAGE_SETUPS[stage](data_dir, work_dir)
+            setup_rss_mb = _peak_rss_mb()
+            cpu_start, wall_start = _cpu_seconds(), time.perf_counter()
+            run()
+            wall = time.perf_counter() - wall_start
+            cpu = _cpu_seconds() - cpu_start
+        results.put({
+            "items": items,
+            "wall_seconds": round(wall, 4),
+            "cpu_seconds": round(cpu, 4),
+            "items_per_second": round(items / wall, 2) if wall > 0 else None,
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+            "setup_rss_mb": round(setup_rss_mb, 1),
+        })
+    except Exception as e:
+        results.put({"error": f"{type(e).__name__}: {e}"})
+
+def run_stage(stage, data_dir, timeout=DEFAULT_STAGE_TIMEOUT):
+    """
+    Measures one stage in a fresh interpreter. Returns its result dict ('error' set on
+    failure, including a process that dies without reporting or exceeds `timeout` seconds).
+    """
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_stage_worker, args=(stage, data_dir, results))
+    process.start()
+    deadline = time.monotonic() + timeout
+    result = None
+    while result is None:
+        try:
+            result = results.get(timeout=RESULT_POLL_SECONDS)
+        except queue.Empty:
+            if not process.is_alive():
+                # It may have put its result just before exiting
+                try:
+                    result = results.get(timeout=RESULT_POLL_SECONDS)
+                except queue.Empty:
+                    result = {"error": f"stage process exited with code {process.exitcode} without a result"}
+            elif time.monotonic() > deadline:
+                process.terminate()
+                result = {"error": f"timed out after {timeout}s"}
+    process.join()
+    return result
+
+def run_benchmarks(data_dir, stages, repeat=1, timeout=DEFAULT_STAGE_TIMEOUT):
+    """Runs each stage `repeat` times and keeps the fastest run. Returns {stage: result}."""
+    results = {}
+    for stage in stages:
+        runs = []
+        for attempt in range(repeat):
+            result = run_stage(stage, data_dir, timeout)
+            if "error" in result:
+                log_message(f"  {stage}: FAILED ({result['error']})")
+                break
+            runs.append(result)
+        if not runs:
+            results[stage] = result
+            continue
+        best = min(runs, key=lambda run: run["wall_seconds"])
+        best["peak_rss_mb"] = max(run["peak_rss_mb"] for run in runs)
+        results[stage] = best
+        log_message(f"  {stage}: {best['items']} item(s) in {best['wall_seconds']:.2f}s "
+                    f"({best['items_per_second']:.1f}/s), CPU {best['cpu_seconds']:.2f}s, peak RSS {best['peak_rss_mb']:.0f} MB")
+    return results
+
+# --- Baseline Comparison ---
+def compare_results(baseline, current, tolerance=DEFAULT_TOLERANCE):
+    """
+    Log lines comparing two result files stage by stage, and whether any stage regressed:
+    throughput down by more than `tolerance`, or peak RSS up by more than `tolerance`.
+    """
+    lines, regressed = [], False
+    if baseline.get("dataset", {}).get("rows") != current.get("dataset", {}).get("rows"):
+        lines.append(f"Warning: baseline was measured on {baseline.get('dataset', {}).get('rows')} rows, "
+                     f"this run on {current.get('dataset', {}).get('rows')}; throughput is still comparable, memory is not.")
+    for stage, result in current["stages"].items():
+        old = baseline.get("stages", {}).get(stage)
+        if "error" in result or not old or "error" in old:
+            lines.append(f"  {stage}: no comparison (missing or failed in one of the runs).")
+            continue
+        speedup = result["items_per_second"] / old["items_per_second"] if old["items_per_second"] else float("inf")
+        rss_ratio = result["peak_rss_mb"] / old["peak_rss_mb"] if old["peak_rss_mb"] else 1.0
+        flags = []
+        if speedup < 1 - tolerance:
+            flags.append("THROUGHPUT REGRESSION")
+        if rss_ratio > 1 + tolerance:
+            flags.append("MEMORY REGRESSION")
+        regressed = regressed or bool(flags)
+        lines.append(f"  {stage}: {old['items_per_second']:.1f} -> {result['items_per_second']:.1f} items/s ({speedup:.2f}x), "
+                     f"CPU {old['cpu_seconds']:.2f}s -> {result['cpu_seconds']:.2f}s, "
+                     f"peak RSS {old['peak_rss_mb']:.0f} -> {result['peak_rss_mb']:.0f} MB"
+                     + (f"  [{', '.join(flags)}]" if flags else ""))
+    return lines, regressed
+
+# --- Main Execution ---
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline stages on a synthetic dataset and compare against a baseline.')
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help=f'Dataset size (10000, 100000, 1000000, ...); generated on first use. Default: {DEFAULT_ROWS}')
+    parser.add_argument('--data-dir', type=str, help='Use (or generate) the dataset in this directory. Default: bench_data/rows_<rows> next to this script')
+    parser.add_argument('--pages', type=int, default=DEFAULT_PAGES, help=f'HTML pages per source when generating. Default: {DEFAULT_PAGES}')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help=f'Random seed when generating. Default: {DEFAULT_SEED}')
+    parser.add_argument('--stages', type=str, default=",".join(STAGES), help=f'Comma-separated stages to run. Default: all ({",".join(STAGES)})')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per stage; the fastest is kept. Default: 1')
+    parser.add_argument('--save', type=str, help='Write the results as a JSON baseline to this path.')
+    parser.add_argument('--compare', type=str, help='Compare against a JSON baseline written by --save; exits with status 1 on a regression.')
+    parser.add_argument('--stage-timeout', type=float, default=DEFAULT_STAGE_TIMEOUT, help=f'Seconds before a stage is killed and reported as failed. Default: {DEFAULT_STAGE_TIMEOUT}')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help=f'Relative slowdown / memory growth tolerated by --compare. Default: {DEFAULT_TOLERANCE}')
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGE_SETUPS]
+    if unknown:
+        log_message(f"ERROR: Unknown stage(s) {unknown}. Choose from {STAGES}.")
+        sys.exit(1)
+
+    data_dir = os.path.abspath(args.data_dir or default_dataset_dir(args.rows))
+    dataset = load_dataset_info(data_dir)
+    if dataset is None:
+        log_message(f"No dataset in {data_dir}; generating {args.rows} rows...")
+        dataset = generate_dataset(data_dir, args.rows, args.pages, args.seed)
+    log_message(f"Benchmarking {len(stages)} stage(s) on {dataset['rows']} rows / {dataset['pages']} pages from {data_dir}...")
+
+    current = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "dataset": dataset,
+        "stages": run_benchmarks(data_dir, stages, args.repeat, args.stage_timeout),
+    }
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(current, file, indent=2)
+        log_message(f"Results saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        lines, regressed = compare_results(baseline, current, args.tolerance)
+        log_message(f"Comparison with {args.compare} (tolerance {args.tolerance:.0%}):")
+        for line in lines:
+            log_message(line)
+        if regressed:
+            log_message("Regression detected.")
+            sys.exit(1)
+        log_message("No regressions.")
+
+if __name__ == "__main__":
+    main()
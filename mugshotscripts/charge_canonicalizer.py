@@ -0,0 +1,151 @@
+"""
+Charge Canonicalizer
+
+Maps raw sheriff charge strings onto a normalized form so that charge sets which
+only differ in abbreviations, punctuation, "(COC) TO" prefixes, case-number noise
+in the comments, or charge order produce the same key. The consolidated processor
+uses these keys to share one OpenAI result between equivalent inmates.
+"""
+
+import re
+
+# --- Normalization Tables ---
+# Whole-token abbreviations seen in the sheriff data, expanded to their long form.
+ABBREVIATIONS = {
+    "AGG": "AGGRAVATED",
+    "AGGR": "AGGRAVATED",
+    "AGGRAV": "AGGRAVATED",
+    "POSS": "POSSESSION",
+    "POSSESS": "POSSESSION",
+    "BATT": "BATTERY",
+    "BAT": "BATTERY",
+    "ATT": "ATTEMPTED",
+    "ATTEMPT": "ATTEMPTED",
+    "CONSP": "CONSPIRACY",
+    "BURG": "BURGLARY",
+    "DWELL": "DWELLING",
+    "RESID": "RESIDENCE",
+    "CONT": "CONTROLLED",
+    "CONTR": "CONTROLLED",
+    "SUB": "SUBSTANCE",
+    "SUBS": "SUBSTANCE",
+    "SUBST": "SUBSTANCE",
+    "CANN": "CANNABIS",
+    "MARIJ": "MARIJUANA",
+    "PARAPH": "PARAPHERNALIA",
+    "VIOL": "VIOLATION",
+    "VOP": "VIOLATION OF PROBATION",
+    "PROB": "PROBATION",
+    "LEO": "LAW ENFORCEMENT OFFICER",
+    "MISD": "MISDEMEANOR",
+    "FEL": "FELONY",
+    "VEH": "VEHICLE",
+    "MV": "MOTOR VEHICLE",
+    "OVR": "OVER",
+    "GRMS": "GRAMS",
+    "GRM": "GRAMS",
+    "GMS": "GRAMS",
+    "GR": "GRAND",
+    "SYNTH": "SYNTHETIC",
+    "DWLS": "DRIVING WHILE LICENSE SUSPENDED",
+    "FTA": "FAILURE TO APPEAR",
+    "VICT": "VICTIM",
+    "FAML": "FAMILIAL",
+    "CUST": "CUSTODIAL",
+    "INJ": "INJUNCTION",
+    "PREM": "PREMEDITATED",
+    "DEG": "DEGREE",
+}
+
+# Abbreviations that mean something else right after a number (e.g. "28 GR" is 28 grams,
+# while "GR THEFT" is grand theft).
+QUANTITY_ABBREVIATIONS = {
+    "GR": "GRAMS",
+}
+
+# Prefixes that record how a charge reached its current form without changing it.
+_COC_PREFIX_RE = re.compile(r"^\s*\(\s*COC\s*\)\s*(?:TO\s+)?")
+_WITHOUT_RE = re.compile(r"\bW\s*/\s*O\b")
+_WITH_RE = re.compile(r"\bW\s*/\s*(?=\w)")
+_THOUSANDS_RE = re.compile(r"(?<=\d),(?=\d{3}\b)")
+_NON_WORD_RE = re.compile(r"[^A-Z0-9$.]+")
+_STRAY_DOT_RE = re.compile(r"(?<![0-9])\.|\.(?![0-9])")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Case numbers, dates and similar identifiers that only appear in Charge Comments.
+_CASE_NOISE_RES = [
+    re.compile(r"\bCASE\s*(?:NO\.?|NUMBER|NUM|#)?\s*[:#]?\s*[A-Z0-9-]*\d[A-Z0-9-]*"),
+    re.compile(r"\b\d{2,4}-?[A-Z]{1,4}-?\d{3,}[A-Z0-9-]*\b"),
+    re.compile(r"\b\d{1,2}/\d{1,2}/\d{2,4}\b"),
+    re.compile(r"\b\d{5,}\b"),
+]
+
+# --- Canonicalization Functions ---
+def canonicalize_charge(text):
+    """
+    Normalizes a single raw charge description.
+    Uppercases, drops the "(COC) TO" prefix, expands W/O and known abbreviations,
+    and removes punctuation that does not carry meaning.
+    """
+    if text is None:
+        return ""
+    text = str(text).upper().strip()
+    if not text or text in ("NAN", "NONE"):
+        return ""
+
+    text = _COC_PREFIX_RE.sub("", text)
+    text = _WITHOUT_RE.sub(" WITHOUT ", text)
+    text = _WITH_RE.sub("WITH ", text)
+    text = _THOUSANDS_RE.sub("", text)
+    text = _NON_WORD_RE.sub(" ", text)
+    text = _STRAY_DOT_RE.sub(" ", text)
+
+    tokens = []
+    previous = ""
+    for token in text.split():
+        if previous.replace(".", "", 1).isdigit() and token in QUANTITY_ABBREVIATIONS:
+            tokens.append(QUANTITY_ABBREVIATIONS[token])
+        else:
+            tokens.append(ABBREVIATIONS.get(token, token))
+        previous = token
+    return " ".join(tokens)
+
+def canonicalize_statute(text):
+    """Normalizes a statute reference (e.g. '893.13 (6)(a)' -> '893.13(6)(A)')."""
+    if text is None:
+        return ""
+    text = _WHITESPACE_RE.sub("", str(text).upper())
+    if text in ("", "NAN", "NONE"):
+        return ""
+    return text
+
+def canonicalize_comment(text):
+    """Normalizes a Charge Comments entry, removing case numbers and dates first."""
+    if text is None:
+        return ""
+    text = str(text).upper()
+    for noise_re in _CASE_NOISE_RES:
+        text = noise_re.sub(" ", text)
+    return canonicalize_charge(text)
+
+def canonical_charge_entry(description, statute, comment):
+    """Canonical form of one (description, statute, comment) charge; "" if the description is empty."""
+    canonical_description = canonicalize_charge(description)
+    if not canonical_description:
+        return ""
+    return "~".join([
+        canonical_description,
+        canonicalize_statute(statute),
+        canonicalize_comment(comment),
+    ])
+
+def canonical_charge_key(charges):
+    """
+    Builds an order-independent key for an inmate's charge set.
+    `charges` is an iterable of (description, statute, comment) tuples; statute and
+    comment may be empty. Repeated charges collapse into one entry, since extra
+    counts of the same offense do not change the plain English summary.
+    """
+    canonical_entries = {canonical_charge_entry(*charge) for charge in charges}
+    canonical_entries.discard("")
+    return " || ".join(sorted(canonical_entries))
@@ -0,0 +1,126 @@
+"""
+Checkpoint Journal
+
+Append-only record of per-row results for the consolidated processors. Each batch
+is appended as JSON lines and fsynced, so a crash loses at most the batch in
+flight; with --resume the journaled rows are skipped and the final compaction
+merges every journaled result back into the output CSV in one write. Only the row
+keys and their byte offsets are kept in memory; values are read back from the
+file for the rows being written, so resuming a large run stays bounded per chunk.
+"""
+
+import json
+import os
+
+import pandas as pd
+
+def journal_path_for(output_csv_path):
+    """Journal file that belongs to an output CSV."""
+    return f"{output_csv_path}.journal.jsonl"
+
+def make_row_keys(ids, seen_counts=None):
+    """
+    Builds a stable key per row from its ID column: "<id>:<occurrence>", so repeated
+    IDs (several booking rows for one inmate) still get distinct keys. Relies on the
+    processors' stable sort keeping repeated IDs in input order.
+    When keying a file chunk by chunk, pass the same seen_counts dict (id -> rows seen
+    so far) for every chunk; it is updated in place.
+    """
+    id_strings = ids.astype(str)
+    occurrence = id_strings.groupby(id_strings, sort=False).cumcount()
+    if seen_counts is not None:
+        occurrence = occurrence + id_strings.map(seen_counts).fillna(0).astype(int)
+        for id_string, count in id_strings.value_counts().items():
+            seen_counts[id_string] = seen_counts.get(id_string, 0) + count
+    return id_strings + ":" + occurrence.astype(str)
+
+class ResultJournal:
+    """
+    Append-only JSON lines file of {"key": row key, "values": {column: value}} entries,
+    indexed in memory by row key -> byte offset of the entry's line.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offsets = {}
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def keys(self):
+        """Row keys with a journaled result."""
+        return self.offsets.keys()
+
+    def load_index(self):
+        """
+        Indexes every complete entry of an existing journal and returns how many there
+        are. A torn last line (crash mid-write) is cut off, so that row is simply
+        processed again and later appends start on a fresh line.
+        """
+        self.offsets = {}
+        if not self.exists():
+            return 0
+        complete_size = 0
+        with open(self.path, "rb") as journal_file:
+            for line in journal_file:
+                offset = complete_size
+                complete_size += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    complete_size = offset
+                    break
+                if isinstance(entry, dict) and "key" in entry:
+                    self.offsets[entry["key"]] = offset
+        if complete_size < os.path.getsize(self.path):
+            os.truncate(self.path, complete_size)
+        return len(self.offsets)
+
+    def read(self, keys):
+        """Returns a dict row key -> values for those of `keys` that are journaled, reading in file order."""
+        wanted = sorted({self.offsets[key]: key for key in keys if key in self.offsets}.items())
+        results = {}
+        if not wanted:
+            return results
+        with open(self.path, "rb") as journal_file:
+            for offset, key in wanted:
+                journal_file.seek(offset)
+                results[key] = json.loads(journal_file.readline()).get("values", {})
+        return results
+
+    def append(self, entries):
+        """Appends (row key, values) pairs and forces them to disk before returning."""
+        lines = [(key, (json.dumps({"key": key, "values": values}, ensure_ascii=False) + "\n").encode("utf-8"))
+                 for key, values in entries]
+        with open(self.path, "ab") as journal_file:
+            offset = journal_file.tell()
+            for key, line in lines:
+                journal_file.write(line)
+                self.offsets[key] = offset
+                offset += len(line)
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+
+    def remove(self):
+        self.offsets = {}
+        if self.exists():
+            os.remove(self.path)
+
+def journal_entries(df, row_keys, columns):
+    """(row key, {column: value}) pairs for the given rows of a processed DataFrame, NaN as None."""
+    values = df[columns].astype(object).where(df[columns].notna(), None)
+    return list(zip(row_keys, values.to_dict("records")))
+
+def apply_journal(df, row_keys, journal, columns):
+    """Fills `columns` of df from the journaled results of its rows, in one assignment per column."""
+    results = journal.read(row_keys)
+    journaled = pd.DataFrame.from_dict(results, orient="index") if results else pd.DataFrame()
+    for column in columns:
+        if column in journaled.columns:
+            df[column] = row_keys.map(journaled[column]).to_numpy()
+        else:
+            df[column] = None
+    return df
@@ -0,0 +1,79 @@
+"""
+Chunked Input
+
+Streams a large input CSV in stable ID order with bounded memory, for the
+consolidated processors' --stream mode. A first pass reads only the ID column to
+build an index of numeric IDs. If that index is already non-decreasing (the usual
+case for append-mode scrapes) the file is streamed as-is; otherwise every chunk is
+sorted into runs on disk by external_sort.py and merged back into ID order.
+Rows whose ID is not numeric are dropped, as the in-memory sort does.
+"""
+
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+
+from external_sort import DEFAULT_CHUNK_SIZE, iter_sorted_rows
+
+def read_header(input_path, delimiter):
+    """Returns the column names of a CSV without reading its rows."""
+    return list(pd.read_csv(input_path, delimiter=delimiter, nrows=0).columns)
+
+def build_id_index(input_path, id_column, delimiter, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Reads only the ID column, chunk by chunk, and returns its numeric values as a
+    float array (NaN where the ID is missing or not numeric).
+    """
+    parts = []
+    for chunk in pd.read_csv(input_path, delimiter=delimiter, usecols=[id_column], dtype=str,
+                             chunksize=chunk_size, on_bad_lines='warn'):
+        parts.append(pd.to_numeric(chunk[id_column], errors='coerce').to_numpy(dtype=float))
+    return np.concatenate(parts) if parts else np.array([], dtype=float)
+
+def is_presorted(id_index):
+    """True if the numeric IDs (ignoring non-numeric ones) never decrease."""
+    valid = id_index[~np.isnan(id_index)]
+    return bool(np.all(valid[1:] >= valid[:-1]))
+
+def _rows_to_frame(columns, rows, start=0):
+    """
+    Turns raw CSV rows back into a DataFrame with pandas' usual type inference, indexed
+    from `start` so that indices keep increasing across chunks (as with read_csv chunksize).
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    writer.writerows(rows)
+    buffer.seek(0)
+    frame = pd.read_csv(buffer)
+    frame.index = pd.RangeIndex(start, start + len(frame))
+    return frame
+
+def iter_sorted_chunks(input_path, id_column, delimiter, chunk_size=DEFAULT_CHUNK_SIZE, id_index=None):
+    """
+    Yields DataFrame chunks of at most chunk_size rows, in stable order of the numeric
+    ID column. Pass the result of build_id_index to avoid reading the IDs twice.
+    """
+    if id_index is None:
+        id_index = build_id_index(input_path, id_column, delimiter, chunk_size)
+
+    if is_presorted(id_index):
+        for chunk in pd.read_csv(input_path, delimiter=delimiter, chunksize=chunk_size, on_bad_lines='warn'):
+            yield chunk[pd.to_numeric(chunk[id_column], errors='coerce').notna()]
+        return
+
+    # Out-of-order input goes through the external merge sort (run files on disk)
+    rows = iter_sorted_rows(input_path, id_column, delimiter, chunk_size)
+    columns = next(rows)
+    batch = []
+    start = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) == chunk_size:
+            yield _rows_to_frame(columns, batch, start)
+            start += len(batch)
+            batch = []
+    if batch:
+        yield _rows_to_frame(columns, batch, start)
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from openai import OpenAI
 import os
@@ -8,11 +9,38 @@ import datetime
 import argparse
 import sys
 import pkg_resources
+from collections import OrderedDict
+
+from charge_canonicalizer import canonical_charge_entry
+from checkpoint_journal import ResultJournal, apply_journal, journal_entries, journal_path_for, make_row_keys
+from chunked_input import DEFAULT_CHUNK_SIZE, build_id_index, is_presorted, iter_sorted_chunks, read_header
+from external_sort import sort_frame_by_key
+from model_router import DEFAULT_EASY_MODEL, DEFAULT_ROUTE_THRESHOLD, DEFAULT_SPOT_CHECK_RATE, ModelRouter, group_by_route
+from packed_prompts import (PACKED_INSTRUCTIONS, build_packed_user_prompt, packed_response_format, parse_packed_response,
+                            single_response_format, parse_single_response, unique_item_ids)
+from request_hedging import DEFAULT_HEDGE_MAX_FRACTION, RequestHedger
+from retry_policy import DEFAULT_MAX_ATTEMPTS, CircuitBreaker, call_with_retries, is_retryable
+from row_status import (DEFAULT_REPAIR_WORKERS, STATUS_ERROR, STATUS_FALLBACK, STATUS_OK,
+                        infer_best_crime_status, rows_needing_repair, run_in_parallel)
+from run_stats import STAGE_ABANDONED_HEDGE, STAGE_BEST_CRIME, STAGE_BEST_CRIME_SEVERITY, STAGE_FALLBACK, RunStats
+from severity_rules import SEVERITY_GUIDELINES, SEVERITY_LEVELS
+from statute_index import DEGREE_RANK, StatuteEntry, lookup_statute, seriousness_rank
 
 # --- Globals ---
 DEFAULT_MODEL = "gpt-4.1-mini" # Using gpt-4.1-mini as it's a good balance
 current_model_global = DEFAULT_MODEL
 client_global = None
+api_breaker_global = None # Shared circuit breaker, created with the client
+request_hedger_global = RequestHedger() # Records latency; hedges slow requests with --hedge
+hedge_model_global = None # Model for hedged duplicates (default: the request's own model)
+fallback_models_global = [] # Models tried in order when the main model keeps failing
+model_router_global = None # ModelRouter with --router: easy prompts go to a cheaper model
+DEFAULT_CACHE_SIZE = 100000 # Distinct charge sets remembered across batches
+best_crime_cache_global = OrderedDict() # Canonical charge key -> result fields ({"best_crime", ["severity"]}), least recently used first
+best_crime_cache_size_global = DEFAULT_CACHE_SIZE
+ROW_KEY_PREFIX = "row:" # Charge key of a row whose charges canonicalize to nothing; never cached
+cache_stats_global = {"hits": 0, "misses": 0}
+run_stats_global = RunStats() # Tokens, latency, retries and cost per model and stage
 
 # --- Helper Functions ---
 def log_message(message):
@@ -20,6 +48,22 @@ def log_message(message):
     timestamp = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
     print(f"[{timestamp}] {message}")
 
+def cached_best_crime(charge_key):
+    """Result fields cached for a canonical charge key (marked as recently used), or None."""
+    values = best_crime_cache_global.get(charge_key)
+    if values is not None:
+        best_crime_cache_global.move_to_end(charge_key)
+    return values
+
+def cache_best_crime(charge_key, values):
+    """Caches result fields for a charge key, evicting the least recently used beyond best_crime_cache_size_global."""
+    if best_crime_cache_size_global <= 0:
+        return
+    best_crime_cache_global[charge_key] = values
+    best_crime_cache_global.move_to_end(charge_key)
+    while len(best_crime_cache_global) > best_crime_cache_size_global:
+        best_crime_cache_global.popitem(last=False)
+
 def check_required_packages():
     """Checks if required Python packages are installed."""
     required = {
@@ -39,9 +83,13 @@ def check_required_packages():
         log_message("Please install missing packages (e.g., pip install -r requirements.txt if available, or pip install <package_name>).")
         sys.exit(1)
 
-def initialize_openai_client():
-    """Initializes and returns the OpenAI client."""
-    global client_global
+def initialize_openai_client(base_url=None, skip_model_check=False):
+    """
+    Initializes and returns the OpenAI client. base_url points it at another
+    OpenAI-compatible server (e.g. mock_openai_server.py), which needs no real key;
+    skip_model_check skips the startup model lookup.
+    """
+    global client_global, api_breaker_global
     env_path = os.path.join(os.path.dirname(__file__), '.env')
     if os.path.exists(env_path):
         load_dotenv(env_path)
@@ -51,13 +99,22 @@ def initialize_openai_client():
         load_dotenv()
 
     api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key and base_url:
+        api_key = "not-needed" # Local stand-in servers ignore the key
     if not api_key:
         log_message("ERROR: OPENAI_API_KEY not found in .env file or environment variables.")
         log_message("Please ensure an API key is available.")
         sys.exit(1)
     
-    client_global = OpenAI(api_key=api_key)
-    log_message("OpenAI client initialized successfully.")
+    # Retries are handled by retry_policy.py, so the SDK's own retries are turned off
+    client_global = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+    api_breaker_global = CircuitBreaker(log=log_message)
+    if base_url:
+        log_message(f"OpenAI client initialized successfully (base URL: {base_url}).")
+    else:
+        log_message("OpenAI client initialized successfully.")
+    if skip_model_check:
+        return
     # Verify model access
     try:
         log_message(f"Verifying access to OpenAI model '{current_model_global}'...")
@@ -69,51 +126,115 @@ def initialize_openai_client():
         sys.exit(1)
 
 # --- OpenAI API Call Function ---
-def call_openai_api(messages, max_tokens=150, temperature=0.3, timeout=45):
+def record_abandoned_request(primary_model, hedge_model):
+    """on_abandoned callback for request_hedger_global.call: the losing request of a hedged pair was still paid for."""
+    def record(is_hedge, response, latency):
+        usage = getattr(response, "usage", None)
+        run_stats_global.record_call(getattr(response, "model", None) or (hedge_model if is_hedge else primary_model),
+                                     STAGE_ABANDONED_HEDGE, latency, usage.prompt_tokens if usage else 0,
+                                     usage.completion_tokens if usage else 0, ok=response is not None)
+    return record
+
+def call_openai_api(messages, max_tokens=150, temperature=0.3, timeout=45, response_format=None, model=None, stage=STAGE_BEST_CRIME):
     """
     Helper function to call OpenAI Chat Completions API with error handling and retries.
-    Uses global client_global and current_model_global.
+    Uses global client_global, current_model_global and api_breaker_global. Transient
+    errors are retried as described in retry_policy.py; slow requests are hedged by
+    request_hedger_global when --hedge is set. If the model still fails, each of
+    fallback_models_global is tried in turn.
+    Pass response_format to request structured (JSON schema) output, and model to use
+    another model than current_model_global (--router). Every call is recorded in
+    run_stats_global under `stage`.
     """
-    retries = 3
-    for attempt in range(retries):
+    request_args = {}
+    if response_format is not None:
+        request_args["response_format"] = response_format
+
+    def send_request(model):
+        log_message(f"Calling OpenAI API (model: {model}, timeout: {timeout}s)...")
+        return client_global.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=timeout,
+            **request_args
+        )
+
+    start_time = time.time()
+    primary_model = model or current_model_global
+    model_chain = [primary_model] + [fallback for fallback in fallback_models_global if fallback != primary_model]
+    for position, chain_model in enumerate(model_chain):
+        hedge_model = hedge_model_global or chain_model
+        attempt_start = time.time()
+        retries = []
         try:
-            log_message(f"Calling OpenAI API (model: {current_model_global}, attempt {attempt + 1}/{retries}, timeout: {timeout}s)...")
-            start_time = time.time()
-            response = client_global.chat.completions.create(
-                model=current_model_global,
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                timeout=timeout
-            )
-            elapsed = time.time() - start_time
-            log_message(f"API call successful in {elapsed:.2f} seconds.")
-            return response.choices[0].message.content.strip()
+            response = call_with_retries(lambda: request_hedger_global.call(lambda: send_request(chain_model), lambda: send_request(hedge_model),
+                                                                            record_abandoned_request(chain_model, hedge_model)),
+                                         api_breaker_global, log=log_message, on_retry=retries.append)
+            break
         except Exception as e:
-            log_message(f"OpenAI API error (attempt {attempt + 1}/{retries}): {str(e)}")
-            if "RateLimitError" in str(e) or "APIConnectionError" in str(e) or "Timeout" in str(e) or "APIError" in str(e) or "InternalServerError" in str(e): # Specific errors for retry
-                if attempt < retries - 1:
-                    sleep_time = (2 ** attempt) + (0.5 * attempt) # Exponential backoff with jitter
-                    log_message(f"Retrying in {sleep_time:.2f} seconds...")
-                    time.sleep(sleep_time)
-                else:
-                    log_message("Max retries reached for API call. Returning error.")
-                    return f"Error: API call failed after {retries} attempts due to: {type(e).__name__}."
-            else: # Non-retryable error
-                log_message(f"Non-retryable API error: {type(e).__name__}. Returning error.")
-                return f"Error: API call failed due to: {type(e).__name__}."
-    return f"Error: API call failed after {retries} attempts." # Should be caught by else above
+            run_stats_global.record_call(chain_model, stage, time.time() - attempt_start, retries=len(retries), ok=False)
+            log_message(f"OpenAI API error ({chain_model}): {type(e).__name__}: {str(e)}")
+            if position < len(model_chain) - 1:
+                log_message(f"Falling back to model '{model_chain[position + 1]}'...")
+                continue
+            if is_retryable(e):
+                return f"Error: API call failed after {DEFAULT_MAX_ATTEMPTS} attempts due to: {type(e).__name__}."
+            return f"Error: API call failed due to: {type(e).__name__}."
+    elapsed = time.time() - start_time
+    log_message(f"API call successful in {elapsed:.2f} seconds.")
+    usage = response.usage
+    run_stats_global.record_call(getattr(response, "model", None) or chain_model, stage, time.time() - attempt_start,
+                                 usage.prompt_tokens if usage else 0, usage.completion_tokens if usage else 0, retries=len(retries))
+    return (response.choices[0].message.content or "").strip()
 
 # --- AI Processing Functions ---
-def get_consolidated_plain_english_best_crime(raw_charge_list, inmate_name=None):
+BEST_CRIME_SYSTEM_PROMPT = (
+    "You are an expert legal analyst and a creative writer for a crime-themed game. "
+    "Your task is to summarize complex criminal charges into clear, concise, and impactful plain English that would be engaging for players. "
+    "You will be given one or more raw charge descriptions for a single individual.\n\n"
+    "Your primary goal is to select *up to two* of the most 'exciting', 'unusual', or 'story-worthy' charges for a game context. "
+    "Prioritize charges that describe specific actions, especially those involving harm, significant illicit goods, or dramatic events, over procedural violations or less descriptive offenses.\n\n"
+    "Follow these steps:\n"
+    "1. Review all provided charge(s) for the individual.\n"
+    "2. Identify one or, if applicable and distinct enough, two charges that best fit the 'exciting/unusual/story-worthy' criteria. Do not select more than two. For example:\n"
+    "   - Prefer charges like 'Battery', 'Robbery', 'Grand Theft', 'Drug Trafficking/Possession with large quantities' over 'Probation Violation', 'Failure to Appear', or generic 'Disorderly Conduct' unless the latter are directly linked to a more severe unlisted crime.\n"
+    "   - If multiple action-based charges exist, pick the one or two that sound most distinct or severe.\n"
+    "3. Rewrite *each selected charge* into a brief, plain English phrase (ideally under 10-15 words per charge, max 20). Make them sound impactful for a game. "
+    "   **If the raw charge includes specific quantities (like drug amounts, monetary values, or age ranges) that are key to its severity or nature, try to incorporate a summarized version of that quantity into your plain English phrase if it enhances the impact (e.g., 'Possession of 20+ Grams of Cannabis', 'Theft Over $1000').** However, do not force numbers if they make the description clunky or are not central to its game-worthy appeal.\n"
+    "4. If you selected two charges, join the two rephrased descriptions with a ' | ' delimiter. If you selected only one, return just that single rephrased description.\n"
+    "5. Return *only* the resulting plain English phrase(s). Do not include explanations, disclaimers, numbering, or any other text.\n\n"
+    "Examples of desired output format (raw input list -> your chosen and rephrased output):\n"
+    "- ['AGG STALKING AFTER INJUCTION'] -> Repeated Aggressive Stalking\n"
+    "- ['(COC) TO ATTEMPTED MURDER LEO/FIREARM'] -> Shot at Law Enforcement\n"
+    "- ['SEX BATT FAML/CUST VICT12-17', 'KIDNAPPING OF MINOR'] -> Sexual Battery on a Minor | Kidnapping a Minor\n"
+    "- ['POSS OF CONTROLLED SUBSTANCE W/O PRESCRIPTION', 'RESIST OFFICER W/O VIOLENCE'] -> Illegal Drug Possession\n"
+    "- ['BATTERY-CAUSE BODILY HARM- DATING VIOLENCE', 'POSSESS CANNABIS OVR 20 GRMS/SYNTH CANN OVR 3 GRMS', 'PROBATION VIOLATION OR COMMUNITY CONTROL/FELONY'] -> Dating Violence Battery | Cannabis Over 20g\n"
+    "- ['MONEY LAUNDERING OVER $100,000'] -> Money Laundering Over $100K\n"
+    "- ['POSS OF MARIJUANA UNDER 20 GRAMS'] -> Marijuana Possession (Under 20g)\n"
+    "- ['FAILURE TO APPEAR - MISDEMEANOR', 'GRAND THEFT - MOTOR VEHICLE', 'BURGLARY OF CONVEYANCE'] -> Grand Theft Auto | Vehicle Burglary"
+)
+
+# Fused mode: the same call also returns the game severity of the selected crime(s)
+FUSED_SEVERITY_INSTRUCTIONS = (
+    "\n\nAlongside the phrase(s) from step 5, also rate the severity of the crime(s) you selected "
+    "as High, Medium or Low using these guidelines:\n\n" + SEVERITY_GUIDELINES + "\n\n"
+    "Return a JSON object with 'best_crime' set to the phrase(s) from step 5 and 'severity' set to the level."
+)
+BEST_CRIME_FIELDS = {"best_crime": {"type": "string"}}
+FUSED_FIELDS = {"best_crime": {"type": "string"}, "severity": {"type": "string", "enum": SEVERITY_LEVELS}}
+
+def get_consolidated_plain_english_best_crime(raw_charge_list, inmate_name=None, model=None):
     """
     Analyzes a list of raw charges, selects the most significant one, 
     and rewords it into a concise, plain English summary.
     Input inmate_name is optional and currently not used in the prompt but available for future enhancements.
+    Returns (best_crime, status), status being one of the row_status values.
     """
     if not raw_charge_list:
         log_message("  No raw charges provided to get_consolidated_plain_english_best_crime.")
-        return "No charges to analyze"
+        return "No charges to analyze", STATUS_ERROR
 
     # Prepare the charge list for the prompt
     if len(raw_charge_list) == 1:
@@ -124,31 +245,7 @@ def get_consolidated_plain_english_best_crime(raw_charge_list, inmate_name=None)
         charge_list_str_for_prompt = "\n".join([f"{i + 1}. {charge}" for i, charge in enumerate(raw_charge_list)])
         instruction_intro = "Here is a list of raw charge descriptions for an individual:"
 
-    system_prompt = (
-        "You are an expert legal analyst and a creative writer for a crime-themed game. "
-        "Your task is to summarize complex criminal charges into clear, concise, and impactful plain English that would be engaging for players. "
-        "You will be given one or more raw charge descriptions for a single individual.\n\n"
-        "Your primary goal is to select *up to two* of the most 'exciting', 'unusual', or 'story-worthy' charges for a game context. "
-        "Prioritize charges that describe specific actions, especially those involving harm, significant illicit goods, or dramatic events, over procedural violations or less descriptive offenses.\n\n"
-        "Follow these steps:\n"
-        "1. Review all provided charge(s) for the individual.\n"
-        "2. Identify one or, if applicable and distinct enough, two charges that best fit the 'exciting/unusual/story-worthy' criteria. Do not select more than two. For example:\n"
-        "   - Prefer charges like 'Battery', 'Robbery', 'Grand Theft', 'Drug Trafficking/Possession with large quantities' over 'Probation Violation', 'Failure to Appear', or generic 'Disorderly Conduct' unless the latter are directly linked to a more severe unlisted crime.\n"
-        "   - If multiple action-based charges exist, pick the one or two that sound most distinct or severe.\n"
-        "3. Rewrite *each selected charge* into a brief, plain English phrase (ideally under 10-15 words per charge, max 20). Make them sound impactful for a game. "
-        "   **If the raw charge includes specific quantities (like drug amounts, monetary values, or age ranges) that are key to its severity or nature, try to incorporate a summarized version of that quantity into your plain English phrase if it enhances the impact (e.g., 'Possession of 20+ Grams of Cannabis', 'Theft Over $1000').** However, do not force numbers if they make the description clunky or are not central to its game-worthy appeal.\n"
-        "4. If you selected two charges, join the two rephrased descriptions with a ' | ' delimiter. If you selected only one, return just that single rephrased description.\n"
-        "5. Return *only* the resulting plain English phrase(s). Do not include explanations, disclaimers, numbering, or any other text.\n\n"
-        "Examples of desired output format (raw input list -> your chosen and rephrased output):\n"
-        "- ['AGG STALKING AFTER INJUCTION'] -> Repeated Aggressive Stalking\n"
-        "- ['(COC) TO ATTEMPTED MURDER LEO/FIREARM'] -> Shot at Law Enforcement\n"
-        "- ['SEX BATT FAML/CUST VICT12-17', 'KIDNAPPING OF MINOR'] -> Sexual Battery on a Minor | Kidnapping a Minor\n"
-        "- ['POSS OF CONTROLLED SUBSTANCE W/O PRESCRIPTION', 'RESIST OFFICER W/O VIOLENCE'] -> Illegal Drug Possession\n"
-        "- ['BATTERY-CAUSE BODILY HARM- DATING VIOLENCE', 'POSSESS CANNABIS OVR 20 GRMS/SYNTH CANN OVR 3 GRMS', 'PROBATION VIOLATION OR COMMUNITY CONTROL/FELONY'] -> Dating Violence Battery | Cannabis Over 20g\n"
-        "- ['MONEY LAUNDERING OVER $100,000'] -> Money Laundering Over $100K\n"
-        "- ['POSS OF MARIJUANA UNDER 20 GRAMS'] -> Marijuana Possession (Under 20g)\n"
-        "- ['FAILURE TO APPEAR - MISDEMEANOR', 'GRAND THEFT - MOTOR VEHICLE', 'BURGLARY OF CONVEYANCE'] -> Grand Theft Auto | Vehicle Burglary"
-    )
+    system_prompt = BEST_CRIME_SYSTEM_PROMPT
 
     user_prompt = f"{instruction_intro}\n{charge_list_str_for_prompt}\n\nPlease provide the rephrased plain English summary for up to two of the most significant charges, delimited by ' | ' if two are selected."
 
@@ -157,96 +254,450 @@ def get_consolidated_plain_english_best_crime(raw_charge_list, inmate_name=None)
         {"role": "user", "content": user_prompt}
     ]
     
-    selected_and_rephrased_charge = call_openai_api(messages, max_tokens=120, temperature=0.25)
+    selected_and_rephrased_charge = call_openai_api(messages, max_tokens=120, temperature=0.25, model=model)
 
     if selected_and_rephrased_charge.startswith("Error:"):
         log_message(f"  API call failed for consolidating best crime. Fallback needed.")
         # Basic fallback: reword the first charge if possible, or return a generic error.
-        if raw_charge_list:
+        if raw_charge_list and api_breaker_global is not None and api_breaker_global.is_open:
+            log_message("  Circuit breaker is open. Skipping the fallback reword; --repair can retry this row later.")
+        elif raw_charge_list:
             first_charge_reword_attempt = call_openai_api([
                 {"role": "system", "content": "Rewrite the following charge into simple plain English (max 15 words). Example: AGG BATTERY -> Aggravated Battery."},
                 {"role": "user", "content": raw_charge_list[0]}
-            ], max_tokens=30, temperature=0.1)
+            ], max_tokens=30, temperature=0.1, model=model, stage=STAGE_FALLBACK)
             if not first_charge_reword_attempt.startswith("Error:"):
-                return first_charge_reword_attempt
-        return "Could not determine best crime"
+                return first_charge_reword_attempt, STATUS_FALLBACK
+        return "Could not determine best crime", STATUS_ERROR
     
     # It's hard to validate if the AI *correctly* picked the "best" charge and rephrased *only* that one.
     # The prompt strongly guides it, so we trust the output unless it's an API error.
-    return selected_and_rephrased_charge
+    return selected_and_rephrased_charge, STATUS_OK
+
+def get_best_crime_with_severity(raw_charge_list, model=None):
+    """
+    Fused variant of get_consolidated_plain_english_best_crime that also classifies the
+    selected crime(s) as High/Medium/Low in the same structured response.
+    Returns (best_crime, severity, status). If the structured answer fails, falls back to
+    the plain Best_Crime call, reports the severity as "Error" and the status as fallback
+    (or error if the plain call failed too).
+    """
+    if not raw_charge_list:
+        log_message("  No raw charges provided to get_best_crime_with_severity.")
+        return "No charges to analyze", "Unknown", STATUS_ERROR
+
+    if len(raw_charge_list) == 1:
+        user_prompt = f"Here is the raw charge description for an individual:\n{raw_charge_list[0]}"
+    else:
+        charge_lines = "\n".join([f"{i + 1}. {charge}" for i, charge in enumerate(raw_charge_list)])
+        user_prompt = f"Here is a list of raw charge descriptions for an individual:\n{charge_lines}"
+
+    messages = [
+        {"role": "system", "content": BEST_CRIME_SYSTEM_PROMPT + FUSED_SEVERITY_INSTRUCTIONS},
+        {"role": "user", "content": user_prompt}
+    ]
+    response_text = call_openai_api(messages, max_tokens=140, temperature=0.25,
+                                    response_format=single_response_format("best_crime_with_severity", FUSED_FIELDS), model=model,
+                                    stage=STAGE_BEST_CRIME_SEVERITY)
+
+    if response_text.startswith("Error:") and api_breaker_global is not None and api_breaker_global.is_open:
+        log_message("  Circuit breaker is open. Skipping the Best_Crime-only fallback; --repair can retry this row later.")
+        return "Could not determine best crime", "Error", STATUS_ERROR
+    values = None if response_text.startswith("Error:") else parse_single_response(response_text, FUSED_FIELDS)
+    if values is None:
+        log_message("  Fused Best_Crime + severity call failed or was malformed. Falling back to Best_Crime only.")
+        best_crime, status = get_consolidated_plain_english_best_crime(raw_charge_list, model=model)
+        return best_crime, "Error", STATUS_FALLBACK if status != STATUS_ERROR else STATUS_ERROR
+    return values["best_crime"], values["severity"], STATUS_OK
+
+def get_best_crime_values(raw_charge_list, with_severity=False, model=None):
+    """
+    Resolves one charge list to {"best_crime": ..., "status": ...}, plus "severity" when with_severity is set.
+    model overrides current_model_global (set per route by --router).
+    """
+    if with_severity:
+        best_crime, severity, status = get_best_crime_with_severity(raw_charge_list, model=model)
+        return {"best_crime": best_crime, "severity": severity, "status": status}
+    best_crime, status = get_consolidated_plain_english_best_crime(raw_charge_list, model=model)
+    return {"best_crime": best_crime, "status": status}
+
+def get_packed_plain_english_best_crimes(items, with_severity=False, model=None):
+    """
+    Packed variant of get_consolidated_plain_english_best_crime.
+    `items` is a list of (item_id, raw_charge_list) pairs sent together in one request with a
+    JSON-schema constrained answer. Items whose result is missing or malformed are retried
+    once as a smaller pack and then individually. Returns a dict item_id -> {"best_crime": ..., "status": ...},
+    with a "severity" entry as well when with_severity is set.
+    """
+    item_ids = [item_id for item_id, _ in items]
+    system_prompt = BEST_CRIME_SYSTEM_PROMPT + (FUSED_SEVERITY_INSTRUCTIONS if with_severity else "") + PACKED_INSTRUCTIONS
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": build_packed_user_prompt(items, "Here are the raw charge descriptions for several individuals:")}
+    ]
+    fields = FUSED_FIELDS if with_severity else BEST_CRIME_FIELDS
+    response_format = packed_response_format("packed_best_crimes", fields)
+    response_text = call_openai_api(messages, max_tokens=(70 if with_severity else 60) * len(items) + 100, temperature=0.25,
+                                    response_format=response_format, model=model,
+                                    stage=STAGE_BEST_CRIME_SEVERITY if with_severity else STAGE_BEST_CRIME)
+
+    results, missing_ids = ({}, item_ids) if response_text.startswith("Error:") else \
+        parse_packed_response(response_text, item_ids, fields)
+    for values in results.values():
+        values["status"] = STATUS_OK
+
+    if missing_ids:
+        log_message(f"  Packed response missing or malformed for {len(missing_ids)} of {len(items)} item(s). Retrying those only.")
+        items_by_id = dict(items)
+        retry_items = [(item_id, items_by_id[item_id]) for item_id in missing_ids]
+        if len(retry_items) > 1 and len(retry_items) < len(items):
+            results.update(get_packed_plain_english_best_crimes(retry_items, with_severity, model))
+        else:
+            for item_id, raw_charge_list in retry_items:
+                results[item_id] = get_best_crime_values(raw_charge_list, with_severity, model)
+    return results
+
+# --- Charge Detail Assembly ---
+def split_charge_field(df, column):
+    """
+    Splits a '|'-separated charge column into one row per non-empty part.
+    Returns a DataFrame with 'row' (position of the inmate in df), 'pos' (position among
+    that inmate's non-empty parts) and 'value'. A missing column yields no parts.
+    """
+    values = df[column].map(str) if column in df.columns else pd.Series("", index=df.index)
+    parts = values.reset_index(drop=True).str.split('|').explode().str.strip()
+    parts = parts[parts != ""]
+    return pd.DataFrame({
+        "row": parts.index.to_numpy(),
+        "pos": parts.groupby(level=0).cumcount().to_numpy(),
+        "value": parts.to_numpy(dtype=object),
+    })
+
+def build_charge_details(df):
+    """
+    Builds every inmate's prompt charge list in one columnar pass.
+    Each description is paired with the statute and comment at the same position, which are
+    kept only when they add information (not empty, not a bare number, not already contained
+    in the description). Charges are ordered most serious first by statute degree (stable).
+    Returns a DataFrame indexed like df, holding only inmates with at least one description:
+    'details' (list of combined charge strings), 'charge_key' (canonical key, '' if none),
+    'statute_degree' and 'statute_severity' (from the most serious known statute, or None).
+    """
+    descriptions = split_charge_field(df, 'Description').rename(columns={"value": "desc"})
+    if descriptions.empty:
+        return pd.DataFrame(columns=["details", "charge_key", "statute_degree", "statute_severity"], index=df.index[:0])
+    statutes = split_charge_field(df, 'Statute')
+    comments = split_charge_field(df, 'Charge Comments')
+
+    charges = descriptions.merge(statutes.rename(columns={"value": "statute"}), on=["row", "pos"], how="left") \
+        .merge(comments.rename(columns={"value": "comment"}), on=["row", "pos"], how="left")
+    charges[["statute", "comment"]] = charges[["statute", "comment"]].fillna("")
+
+    desc_upper = charges["desc"].str.upper()
+    desc_values, statute_values, comment_values = (charges[column].to_numpy(dtype=object) for column in ("desc", "statute", "comment"))
+    statute_in_desc = [statute in desc for statute, desc in zip(statute_values, desc_values)]
+    comment_in_desc = [comment in desc for comment, desc in zip(comment_values, desc_values)]
+    use_statute = (charges["statute"] != "") & (charges["statute"].str.upper() != desc_upper) \
+        & ~charges["statute"].str.isdigit() & ~pd.Series(statute_in_desc, index=charges.index, dtype=bool)
+    use_comment = (charges["comment"] != "") & (charges["comment"].str.upper() != desc_upper) \
+        & ~pd.Series(comment_in_desc, index=charges.index, dtype=bool)
+    charges["used_statute"] = charges["statute"].where(use_statute, "")
+    charges["used_comment"] = charges["comment"].where(use_comment, "")
+    charges["detail"] = ("Charge: " + charges["desc"]
+                         + (", Statute Ref: " + charges["statute"]).where(use_statute, "")
+                         + (", Details/Comments: " + charges["comment"]).where(use_comment, ""))
+
+    # Each distinct statute and charge is looked up once, however many inmates share it
+    unique_statutes = statutes["value"].unique()
+    entry_by_statute = {statute: lookup_statute(statute) for statute in unique_statutes}
+    rank_by_statute = {statute: DEGREE_RANK.get(entry.degree, 0) if entry else 0 for statute, entry in entry_by_statute.items()}
+    charges["rank"] = charges["statute"].map(rank_by_statute).fillna(0)
+    charges = charges.sort_values(["row", "rank", "pos"], ascending=[True, False, True], kind="mergesort")
+
+    triples = list(zip(*(charges[column].to_numpy(dtype=object) for column in ("desc", "used_statute", "used_comment"))))
+    entry_by_triple = {triple: canonical_charge_entry(*triple) for triple in set(triples)}
+    charges["entry"] = [entry_by_triple[triple] for triple in triples]
+
+    # Charges are sorted by row, so each inmate's charges are one contiguous slice
+    charge_rows = charges["row"].to_numpy()
+    boundaries = np.flatnonzero(charge_rows[1:] != charge_rows[:-1]) + 1
+    details = pd.DataFrame({
+        "details": [list(group) for group in np.split(charges["detail"].to_numpy(dtype=object), boundaries)],
+        "charge_key": [" || ".join(sorted(set(group) - {""}))
+                       for group in np.split(charges["entry"].to_numpy(dtype=object), boundaries)],
+    }, index=np.unique(charge_rows))
+
+    # Most serious statute over all of the inmate's statutes (first one wins ties)
+    code_by_statute = {}
+    for statute, entry in entry_by_statute.items():
+        rank = seriousness_rank(entry)
+        if rank is not None:
+            code_by_statute[statute] = rank[0] * 100 + rank[1]
+    ranked = statutes.assign(code=statutes["value"].map(code_by_statute)).dropna(subset=["code"])
+    top_statutes = ranked.loc[ranked.groupby("row")["code"].idxmax()].set_index("row")["value"]
+    top_entries = top_statutes.map(entry_by_statute).reindex(details.index)
+    details["statute_degree"] = [entry.degree if isinstance(entry, StatuteEntry) else None for entry in top_entries]
+    details["statute_severity"] = [entry.severity if isinstance(entry, StatuteEntry) else None for entry in top_entries]
+
+    details.index = df.index[details.index]
+    return details
+
+def spot_check_route(route, charge_lists, results, with_severity=False):
+    """Asks the other route's model about a sample of routed items and records whether the answers agree (see ModelRouter.record_spot_check)."""
+    for charge_list, values in zip(charge_lists, results):
+        if values is None or values.get("status") != STATUS_OK or not model_router_global.should_spot_check():
+            continue
+        reference = get_best_crime_values(charge_list, with_severity, model=model_router_global.other_model(route))
+        if reference["status"] == STATUS_OK:
+            model_router_global.record_spot_check(route, values["best_crime"], reference["best_crime"],
+                                                  values.get("severity"), reference.get("severity"))
 
 # --- Main Processing Function ---
-def process_inmate_data(df, output_column_name="Best_Crime"):
+def process_inmate_data(df, output_column_name="Best_Crime", pack_size=1, with_severity=False):
     """
     Processes the DataFrame to add the 'Best_Crime' column using the consolidated AI call.
     Assumes 'Description' column exists for raw charges.
+    Charges are ordered most serious first using the local Florida statute index, which
+    also pre-fills the 'Statute_Degree' and 'Statute_Severity' columns without an API call.
+    With pack_size > 1, distinct charge sets are sent to OpenAI pack_size at a time.
+    With with_severity, the same calls also fill the 'Crime_Severity' column (High/Medium/Low).
     """
     log_message(f"Initializing '{output_column_name}' column...")
     df[output_column_name] = None 
+    df['Statute_Degree'] = None
+    df['Statute_Severity'] = None
+    df[f"{output_column_name}_Status"] = None
+    column_by_field = {"best_crime": output_column_name, "status": f"{output_column_name}_Status"}
+    if with_severity:
+        df['Crime_Severity'] = None
+        column_by_field["severity"] = 'Crime_Severity'
 
     total_rows = len(df)
     log_message(f"Starting processing of {total_rows} inmates for '{output_column_name}'...")
 
-    for index, row in df.iterrows():
-        log_message(f"Processing inmate {index + 1}/{total_rows}, ID: {row.get('InmateID', 'N/A')}, Name: {row.get('Name', 'N/A')}")
-        
-        # --- Enhanced Charge Detail Extraction ---
-        raw_descriptions_str = str(row.get('Description', ''))
-        raw_statutes_str = str(row.get('Statute', ''))
-        raw_comments_str = str(row.get('Charge Comments', ''))
-
-        descriptions = [d.strip() for d in raw_descriptions_str.split('|') if d.strip()]
-        # If descriptions is empty, there's nothing to process for this row regarding charges
-        if not descriptions:
-            log_message("  No charge descriptions found for this inmate. Skipping AI processing.")
-            df.loc[index, output_column_name] = "No charge descriptions listed"
-            continue
-            
-        statutes = [s.strip() for s in raw_statutes_str.split('|') if s.strip()]
-        comments = [c.strip() for c in raw_comments_str.split('|') if c.strip()]
-        
-        num_charge_components = len(descriptions) # Base number of charges on descriptions
-        
-        combined_charge_details_list = []
-        for i in range(num_charge_components):
-            charge_parts = []
-            current_desc = descriptions[i]
-            charge_parts.append(f"Charge: {current_desc}") # Start with the main description
-
-            # Add statute if available and non-trivial
-            if i < len(statutes) and statutes[i] and statutes[i].upper() != current_desc.upper() and not statutes[i].isdigit() and statutes[i] not in current_desc:
-                charge_parts.append(f"Statute Ref: {statutes[i]}")
-            
-            # Add comments if available and non-trivial
-            if i < len(comments) and comments[i] and comments[i].upper() != current_desc.upper() and comments[i] not in current_desc:
-                charge_parts.append(f"Details/Comments: {comments[i]}")
-            
-            combined_charge_details_list.append(", ".join(charge_parts))
-        
-        best_crime_for_row = "No charges to process" # Default if list ends up empty
-
-        if not combined_charge_details_list:
-            log_message("  No processable combined charge details constructed. Skipping AI processing.")
-            best_crime_for_row = "No valid charge details found"
+    # --- Charge detail assembly (columnar, no per-row work) ---
+    charge_details = build_charge_details(df)
+    no_charges = ~df.index.isin(charge_details.index)
+    if no_charges.any():
+        log_message(f"  {no_charges.sum()} inmate(s) have no charge descriptions. Skipping AI processing for them.")
+        df.loc[no_charges, output_column_name] = "No charge descriptions listed"
+        df.loc[no_charges, f"{output_column_name}_Status"] = STATUS_OK
+        if with_severity:
+            df.loc[no_charges, 'Crime_Severity'] = "Unknown"
+    # Pre-fill severity from the most serious statute we can resolve locally
+    df.loc[charge_details.index, 'Statute_Degree'] = charge_details['statute_degree'].to_numpy()
+    df.loc[charge_details.index, 'Statute_Severity'] = charge_details['statute_severity'].to_numpy()
+
+    inmate_ids = df.loc[charge_details.index, 'InmateID'].astype(str) if 'InmateID' in df.columns \
+        else pd.Series(charge_details.index.astype(str), index=charge_details.index)
+    row_charge_keys = {} # index -> charge key for rows that need a Best_Crime
+    cached_results = {} # charge key -> cached result fields, kept here so later evictions cannot drop them
+    pending_charge_sets = {} # charge key -> (inmate id, combined charge details) not yet in the cache
+    pending_routes = {} # charge key -> (route, model) with --router
+    for index, charge_key, combined_charge_details_list, inmate_id, statute_severity in zip(
+            charge_details.index, charge_details['charge_key'], charge_details['details'], inmate_ids,
+            charge_details['statute_severity']):
+        # Equivalent charge sets (same charges modulo abbreviations, order, case numbers) share one result.
+        # Charges that canonicalize to nothing get a key of their own, valid in this call only
+        cacheable = bool(charge_key)
+        charge_key = charge_key or f"{ROW_KEY_PREFIX}{index}"
+        row_charge_keys[index] = charge_key
+        if cacheable and charge_key not in cached_results and charge_key not in pending_charge_sets:
+            values = cached_best_crime(charge_key)
+            if values is not None:
+                cached_results[charge_key] = values
+        if charge_key in cached_results or charge_key in pending_charge_sets:
+            cache_stats_global["hits"] += 1
         else:
-            log_message(f'  Processing {len(combined_charge_details_list)} combined charge detail(s) for this inmate: "{str(combined_charge_details_list)[:250]}..."')
-            # Call the AI function with the new list of combined details
-            best_crime_for_row = get_consolidated_plain_english_best_crime(combined_charge_details_list, row.get('Name', 'N/A'))
-            log_message(f'  Consolidated Best Crime: "{best_crime_for_row}"')
-        
-        df.loc[index, output_column_name] = best_crime_for_row
-        
-        # Optional: A small delay can be good for very long processing jobs with many API calls,
-        # but call_openai_api already has some delay for retries.
-        # Consider if overall processing time vs API call frequency warrants an additional fixed delay here.
-        # time.sleep(0.1) # Example: Short delay if needed
+            cache_stats_global["misses"] += 1
+            pending_charge_sets[charge_key] = (inmate_id, combined_charge_details_list)
+            if model_router_global is not None:
+                pending_routes[charge_key] = model_router_global.route(
+                    len(combined_charge_details_list), "\n".join(combined_charge_details_list), pd.notna(statute_severity))
+    log_message(f"Built charge details for {len(charge_details)} inmate(s): {len(pending_charge_sets)} new distinct charge set(s).")
+
+    # --- Resolve each distinct charge set once ---
+    pending_keys = list(pending_charge_sets)
+    log_message(f"Sending {len(pending_keys)} distinct charge set(s) to OpenAI (pack size {pack_size})...")
+    new_results = {}
+    for route, model, route_keys in group_by_route(pending_keys, pending_routes):
+        route_start = time.time()
+        if pack_size > 1:
+            for start in range(0, len(route_keys), pack_size):
+                pack_keys = route_keys[start:start + pack_size]
+                # Key each pack entry by InmateID, suffixed if the same ID shows up twice in a pack (see unique_item_ids)
+                pack_items, key_by_item_id = [], {}
+                pack_ids = unique_item_ids(pending_charge_sets[charge_key][0] for charge_key in pack_keys)
+                for item_id, charge_key in zip(pack_ids, pack_keys):
+                    combined_charge_details_list = pending_charge_sets[charge_key][1]
+                    key_by_item_id[item_id] = charge_key
+                    pack_items.append((item_id, combined_charge_details_list))
+                log_message(f"  Pack {start // pack_size + 1}: {len(pack_items)} inmate(s), IDs {list(key_by_item_id)}" + (f" ({route} route, {model})" if route else ""))
+                pack_results = get_packed_plain_english_best_crimes(pack_items, with_severity, model)
+                for item_id, values in pack_results.items():
+                    new_results[key_by_item_id[item_id]] = values
+        else:
+            for charge_key in route_keys:
+                inmate_id, combined_charge_details_list = pending_charge_sets[charge_key]
+                log_message(f'  Processing {len(combined_charge_details_list)} combined charge detail(s) for inmate {inmate_id}: "{str(combined_charge_details_list)[:250]}..."')
+                # Call the AI function with the new list of combined details
+                new_results[charge_key] = get_best_crime_values(combined_charge_details_list, with_severity, model)
+                log_message(f'  Consolidated Best Crime: "{new_results[charge_key]["best_crime"]}"'
+                            + (f', severity: {new_results[charge_key]["severity"]}' if with_severity else ""))
+
+        if route is not None:
+            model_router_global.record(route, len(route_keys), time.time() - route_start)
+            spot_check_route(route, [pending_charge_sets[charge_key][1] for charge_key in route_keys],
+                             [new_results.get(charge_key) for charge_key in route_keys], with_severity)
+
+    for charge_key, values in new_results.items():
+        if values["status"] == STATUS_OK and not charge_key.startswith(ROW_KEY_PREFIX):
+            cache_best_crime(charge_key, values)
+
+    # Bulk assignment: one write per output column
+    row_values = [cached_results.get(charge_key) or new_results.get(charge_key, {}) for charge_key in row_charge_keys.values()]
+    for field, column in column_by_field.items():
+        df.loc[list(row_charge_keys), column] = [values.get(field) for values in row_values]
 
     log_message(f"Finished processing {total_rows} inmates for '{output_column_name}'.")
+    log_message(f"Equivalent charge sets so far: {cache_stats_global['hits']} reused, {cache_stats_global['misses']} sent to OpenAI.")
     return df
 
+# --- Input Preparation and Journaled Processing ---
+def check_input_columns(columns):
+    """Exits if a required column is missing; warns about missing optional ones."""
+    if 'InmateID' not in columns:
+        log_message("ERROR: 'InmateID' column not found in input CSV. This column is required for sorting.")
+        sys.exit(1)
+    if 'Description' not in columns:
+        log_message("ERROR: 'Description' column not found in input CSV. This column is required for AI crime analysis.")
+        sys.exit(1)
+    # Add checks for Statute and Charge Comments, but make them non-fatal, just log a warning if missing.
+    if 'Statute' not in columns:
+        log_message("Warning: 'Statute' column not found in input CSV. AI analysis will proceed without statute information.")
+    if 'Charge Comments' not in columns:
+        log_message("Warning: 'Charge Comments' column not found in input CSV. AI analysis will proceed without charge comments.")
+
+def prepare_inmate_frame(df):
+    """Normalizes column types and drops rows without a numeric InmateID (does not sort)."""
+    if 'Charge Comments' in df.columns: # Ensure Description is string
+        df['Description'] = df['Description'].astype(str)
+        # Also ensure Statute and Charge Comments are strings if they exist
+        if 'Statute' in df.columns:
+            df['Statute'] = df['Statute'].astype(str)
+        df['Charge Comments'] = df['Charge Comments'].astype(str)
+
+    df['InmateID'] = pd.to_numeric(df['InmateID'], errors='coerce')
+    df = df.dropna(subset=['InmateID'])
+    df['InmateID'] = df['InmateID'].astype(int)
+    return df
+
+def process_with_journal(df, row_keys, journal, result_columns, args):
+    """
+    Runs process_inmate_data on the rows of df that are not journaled yet, save_interval
+    rows at a time, appending each batch's results to the journal.
+    Returns the number of rows processed.
+    """
+    remaining_df = df[~row_keys.isin(journal.keys()).to_numpy()]
+    batch_size = args.save_interval if args.save_interval > 0 else max(len(remaining_df), 1)
+    num_batches = (len(remaining_df) - 1) // batch_size + 1 if len(remaining_df) else 0
+    for i in range(num_batches):
+        batch_df = remaining_df.iloc[i * batch_size:(i + 1) * batch_size]
+        log_message(f"Processing batch {i+1}/{num_batches} ({len(batch_df)} rows, {len(journal)} already done)...")
+        processed_batch_df = process_inmate_data(batch_df.copy(), pack_size=args.pack_size, with_severity=args.with_severity) # Process a copy
+        # Only this batch is written; everything before it is already on disk
+        entries = journal_entries(processed_batch_df, row_keys.loc[batch_df.index], result_columns)
+        journal.append(entries)
+        log_message(f"Journaled batch {i+1} to {journal.path}")
+    return len(remaining_df)
+
+def process_inmate_stream(input_csv_path, delimiter, output_csv_path, journal, result_columns, args):
+    """
+    Streaming variant of the in-memory path for inputs too large to load at once.
+    One pre-pass indexes the InmateID column; the input is then read chunk_size rows at a
+    time in InmateID order (see chunked_input.py), and each processed chunk is appended
+    to the output, so memory stays bounded by the chunk size.
+    Returns (rows processed, rows written).
+    """
+    log_message(f"Indexing 'InmateID' column of {input_csv_path}...")
+    id_index = build_id_index(input_csv_path, 'InmateID', delimiter, args.chunk_size)
+    if is_presorted(id_index):
+        log_message(f"Indexed {len(id_index)} rows; input is already sorted by InmateID. Streaming it directly.")
+    else:
+        log_message(f"Indexed {len(id_index)} rows; input is not sorted. Sorting in runs of {args.chunk_size} rows on disk.")
+
+    temp_output_path = f"{output_csv_path}.tmp"
+    seen_counts = {}
+    processed_rows = written_rows = 0
+    for chunk_number, chunk in enumerate(iter_sorted_chunks(input_csv_path, 'InmateID', delimiter, args.chunk_size, id_index), 1):
+        chunk = prepare_inmate_frame(chunk)
+        if args.max_rows:
+            chunk = chunk.head(max(args.max_rows - written_rows, 0))
+            if chunk.empty:
+                break
+        log_message(f"Streaming chunk {chunk_number} ({len(chunk)} rows, {written_rows} written so far)...")
+        row_keys = make_row_keys(chunk['InmateID'], seen_counts)
+        processed_rows += process_with_journal(chunk, row_keys, journal, result_columns, args)
+        output_chunk = apply_journal(chunk, row_keys, journal, result_columns)
+        output_chunk.to_csv(temp_output_path, mode='w' if written_rows == 0 else 'a', header=written_rows == 0,
+                            index=False, quoting=csv.QUOTE_ALL)
+        written_rows += len(output_chunk)
+
+    if written_rows == 0:
+        pd.DataFrame(columns=read_header(input_csv_path, delimiter) + result_columns).to_csv(
+            temp_output_path, index=False, quoting=csv.QUOTE_ALL)
+    os.replace(temp_output_path, output_csv_path)
+    return processed_rows, written_rows
+
+# --- Selective Repair ---
+def repair_inmate_output(output_csv_path, args):
+    """
+    --repair: re-runs only the rows of an existing output whose Best_Crime_Status is not ok
+    (older outputs without the column get a status inferred from Best_Crime), sending each
+    distinct charge set once on args.workers threads, and rewrites the output in place.
+    Returns (rows resubmitted, rows still not ok).
+    """
+    df = pd.read_csv(output_csv_path, low_memory=False)
+    needs_repair = rows_needing_repair(df, "Best_Crime_Status", "Best_Crime", infer_best_crime_status)
+    with_severity = args.with_severity or 'Crime_Severity' in df.columns
+    if "Best_Crime_Status" not in df.columns:
+        df["Best_Crime_Status"] = df["Best_Crime"].map(infer_best_crime_status)
+    if with_severity and 'Crime_Severity' not in df.columns:
+        df['Crime_Severity'] = None
+    log_message(f"{needs_repair.sum()} of {len(df)} row(s) in {output_csv_path} need repair.")
+    if not needs_repair.any():
+        return 0, 0
+
+    repair_df = df[needs_repair]
+    charge_details = build_charge_details(repair_df)
+    no_charges = repair_df.index[~repair_df.index.isin(charge_details.index)]
+    df.loc[no_charges, "Best_Crime"] = "No charge descriptions listed"
+    df.loc[no_charges, "Best_Crime_Status"] = STATUS_OK
+
+    # Equivalent charge sets are resubmitted once, like in process_inmate_data
+    row_charge_keys = [charge_key or f"{ROW_KEY_PREFIX}{index}" for index, charge_key in zip(charge_details.index, charge_details['charge_key'])]
+    pending_charge_sets = dict(zip(row_charge_keys, charge_details['details']))
+    log_message(f"Resubmitting {len(pending_charge_sets)} distinct charge set(s) on {args.workers} worker(s)...")
+    results = run_in_parallel(lambda charge_list: get_best_crime_values(charge_list, with_severity),
+                              list(pending_charge_sets.values()), args.workers)
+    values_by_key = dict(zip(pending_charge_sets, results))
+
+    row_values = [values_by_key[charge_key] for charge_key in row_charge_keys]
+    column_by_field = {"best_crime": "Best_Crime", "status": "Best_Crime_Status"}
+    if with_severity:
+        column_by_field["severity"] = 'Crime_Severity'
+    for field, column in column_by_field.items():
+        df.loc[charge_details.index, column] = [values.get(field) for values in row_values]
+
+    df.to_csv(f"{output_csv_path}.tmp", index=False, quoting=csv.QUOTE_ALL)
+    os.replace(f"{output_csv_path}.tmp", output_csv_path)
+    still_failing = int((df.loc[needs_repair, "Best_Crime_Status"] != STATUS_OK).sum())
+    return int(needs_repair.sum()), still_failing
+
 # --- Main Execution ---
 def main():
-    global current_model_global
+    global current_model_global, run_stats_global, request_hedger_global, hedge_model_global, fallback_models_global, model_router_global
+    global best_crime_cache_size_global
 
     check_required_packages()
     
@@ -255,12 +706,38 @@ def main():
     parser.add_argument('--output', type=str, default='master_mugshot_analysis.csv', help='Output CSV file path for the consolidated analysis. Default: master_mugshot_analysis.csv')
     parser.add_argument('--max-rows', type=int, help='Maximum number of rows to process (for testing purposes).')
     parser.add_argument('--model', type=str, default=DEFAULT_MODEL, help=f'OpenAI model to use for analysis. Default: {DEFAULT_MODEL}')
-    parser.add_argument('--save-interval', type=int, default=20, help='Save intermediate progress every N rows. Default: 20. Set to 0 to disable.')
+    parser.add_argument('--save-interval', type=int, default=20, help='Journal progress to disk every N rows (append-only, fsynced per batch). Default: 20. Set to 0 to journal once at the end.')
+    parser.add_argument('--resume', action='store_true', help='Resume an interrupted run: skip rows already recorded in the output\'s .journal.jsonl file.')
+    parser.add_argument('--stream', action='store_true', help='Process the input in chunks with bounded memory instead of loading it whole (for very large CSVs).')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help=f'Rows per chunk in --stream mode. Default: {DEFAULT_CHUNK_SIZE}')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE, help=f'Distinct charge sets whose results are reused across batches (least recently used are evicted). 0 disables the cache. Default: {DEFAULT_CACHE_SIZE}')
+    parser.add_argument('--pack-size', type=int, default=1, help='Number of inmates to send per OpenAI request with structured JSON output. Default: 1 (one inmate per request).')
+    parser.add_argument('--hedge', action='store_true', help='Send a duplicate of any request still running past the observed p95 latency and keep whichever answers first.')
+    parser.add_argument('--hedge-model', type=str, help='Model for hedged duplicates (e.g. a faster one). Default: the same model.')
+    parser.add_argument('--hedge-max-fraction', type=float, default=DEFAULT_HEDGE_MAX_FRACTION, help=f'Cap on duplicate requests as a fraction of all requests. Default: {DEFAULT_HEDGE_MAX_FRACTION}')
+    parser.add_argument('--fallback-models', type=str, default='', help='Comma-separated models to try in order when the main model fails after retries (e.g. gpt-4o-mini,gpt-4.1-nano).')
+    parser.add_argument('--router', action='store_true', help='Route each prompt by complexity (charge count, length, known statute): easy ones to --easy-model, hard ones to --hard-model.')
+    parser.add_argument('--easy-model', type=str, default=DEFAULT_EASY_MODEL, help=f'Model for easy prompts with --router. Default: {DEFAULT_EASY_MODEL}')
+    parser.add_argument('--hard-model', type=str, help='Model for hard prompts with --router. Default: --model')
+    parser.add_argument('--route-threshold', type=float, default=DEFAULT_ROUTE_THRESHOLD, help=f'Complexity score at or below which a prompt is easy. Default: {DEFAULT_ROUTE_THRESHOLD}')
+    parser.add_argument('--spot-check-rate', type=float, default=DEFAULT_SPOT_CHECK_RATE, help=f'Share of routed prompts also sent to the other route\'s model to measure agreement. Default: {DEFAULT_SPOT_CHECK_RATE}')
+    parser.add_argument('--repair', action='store_true', help='Re-run only the rows of an existing --output whose Best_Crime_Status is not ok (failed or fallback answers), in place. The input file is not read.')
+    parser.add_argument('--workers', type=int, default=DEFAULT_REPAIR_WORKERS, help=f'Parallel OpenAI requests in --repair mode. Default: {DEFAULT_REPAIR_WORKERS}')
+    parser.add_argument('--base-url', type=str, help='OpenAI-compatible API base URL, e.g. http://127.0.0.1:8089/v1 for mock_openai_server.py. Default: the OpenAI API')
+    parser.add_argument('--skip-model-check', action='store_true', help='Do not look up the model at startup.')
+    parser.add_argument('--with-severity', action='store_true', help='Also classify each Best_Crime as High/Medium/Low (Crime_Severity column) in the same OpenAI call, instead of a separate crime_severity_classifier.py pass.')
     
     args = parser.parse_args()
     current_model_global = args.model
+    run_stats_global = RunStats()
+    request_hedger_global = RequestHedger(enabled=args.hedge, max_extra_fraction=args.hedge_max_fraction)
+    hedge_model_global = args.hedge_model
+    best_crime_cache_size_global = args.cache_size
+    fallback_models_global = [model.strip() for model in args.fallback_models.split(',') if model.strip()]
+    if args.router:
+        model_router_global = ModelRouter(args.easy_model, args.hard_model or args.model, args.route_threshold, args.spot_check_rate)
 
-    initialize_openai_client() # Initialize after parsing args to get model
+    initialize_openai_client(base_url=args.base_url, skip_model_check=args.skip_model_check) # Initialize after parsing args to get model
 
     script_dir = os.path.dirname(__file__)
     input_csv_path = args.input if os.path.isabs(args.input) else os.path.join(script_dir, args.input)
@@ -273,8 +750,32 @@ def main():
     if args.max_rows:
         log_message(f"Processing a maximum of {args.max_rows} rows.")
     if args.save_interval > 0:
-        log_message(f"Saving intermediate progress every {args.save_interval} rows.")
-
+        log_message(f"Journaling progress every {args.save_interval} rows.")
+    if args.stream:
+        log_message(f"Streaming the input in chunks of {args.chunk_size} rows.")
+    if args.pack_size > 1:
+        log_message(f"Packing {args.pack_size} inmates per OpenAI request.")
+    if args.with_severity:
+        log_message("Classifying Crime_Severity in the same OpenAI call as Best_Crime.")
+    if args.hedge:
+        log_message(f"Hedging requests slower than p95 (model: {hedge_model_global or current_model_global}, at most {args.hedge_max_fraction:.0%} extra requests).")
+    if fallback_models_global:
+        log_message(f"Fallback models: {', '.join(fallback_models_global)}")
+    if model_router_global is not None:
+        log_message(f"Routing by complexity: score <= {args.route_threshold} -> {model_router_global.models['easy']}, "
+                    f"otherwise {model_router_global.models['hard']} (spot-checking {args.spot_check_rate:.0%}).")
+
+    if args.repair:
+        if not os.path.exists(output_csv_path):
+            log_message(f"ERROR: Output file '{output_csv_path}' does not exist! --repair needs a previous run's output.")
+            sys.exit(1)
+        repaired_rows, still_failing = repair_inmate_output(output_csv_path, args)
+        for line in run_stats_global.report_lines(repaired_rows):
+            log_message(line)
+        log_message(request_hedger_global.summary())
+        log_message(f"Repair complete: {repaired_rows} row(s) resubmitted, {still_failing} still not ok. Saved to {output_csv_path}")
+        log_message("--- Script finished ---")
+        return
 
     if not os.path.exists(input_csv_path):
         log_message(f"ERROR: Input file '{input_csv_path}' does not exist!")
@@ -302,94 +803,63 @@ def main():
             log_message(f"Could not automatically detect delimiter: {e_sniff}. Defaulting to ','.")
             delimiter = ','
         
-        df = pd.read_csv(input_csv_path, delimiter=delimiter, on_bad_lines='warn', low_memory=False)
-        log_message(f"Successfully read {len(df)} rows from {input_csv_path}.")
-
-        # --- Ensure 'InmateID' and 'Description' columns exist ---
-        if 'InmateID' not in df.columns:
-            log_message("ERROR: 'InmateID' column not found in input CSV. This column is required for sorting.")
-            sys.exit(1)
-        if 'Description' not in df.columns:
-            log_message("ERROR: 'Description' column not found in input CSV. This column is required for AI crime analysis.")
-            sys.exit(1)
-        # Add checks for Statute and Charge Comments, but make them non-fatal, just log a warning if missing.
-        if 'Statute' not in df.columns:
-            log_message("Warning: 'Statute' column not found in input CSV. AI analysis will proceed without statute information.")
-        if 'Charge Comments' not in df.columns:
-            log_message("Warning: 'Charge Comments' column not found in input CSV. AI analysis will proceed without charge comments.")
-
-        else: # Ensure Description is string
-             df['Description'] = df['Description'].astype(str)
-             # Also ensure Statute and Charge Comments are strings if they exist
-             if 'Statute' in df.columns:
-                 df['Statute'] = df['Statute'].astype(str)
-             if 'Charge Comments' in df.columns:
-                 df['Charge Comments'] = df['Charge Comments'].astype(str)
-
-
-        log_message("Sorting data by 'InmateID'...")
-        df['InmateID'] = pd.to_numeric(df['InmateID'], errors='coerce')
-        df.dropna(subset=['InmateID'], inplace=True) 
-        df['InmateID'] = df['InmateID'].astype(int)
-        df.sort_values(by='InmateID', inplace=True, kind='mergesort') # Stable sort
-        log_message("Data sorted successfully by InmateID.")
-
-        # --- Limit rows if --max-rows is set ---
-        if args.max_rows and args.max_rows < len(df):
-            log_message(f"Limiting DataFrame to the first {args.max_rows} rows for processing.")
-            df_to_process = df.head(args.max_rows).copy() # Use .copy() to avoid SettingWithCopyWarning
+        # --- Append-only checkpoint journal, shared by the in-memory and streaming paths ---
+        result_columns = ["Best_Crime", "Best_Crime_Status", "Statute_Degree", "Statute_Severity"] + (["Crime_Severity"] if args.with_severity else [])
+        journal = ResultJournal(journal_path_for(output_csv_path))
+        if args.resume:
+            log_message(f"Resuming: {journal.load_index()} row(s) already journaled in {journal.path}.")
         else:
-            df_to_process = df.copy()
-        
-        # --- AI Processing with intermediate saving ---
-        if args.save_interval > 0 and len(df_to_process) > args.save_interval:
-            num_batches = (len(df_to_process) - 1) // args.save_interval + 1
-            processed_dfs = []
-            for i in range(num_batches):
-                start_idx = i * args.save_interval
-                end_idx = min((i + 1) * args.save_interval, len(df_to_process))
-                batch_df = df_to_process.iloc[start_idx:end_idx]
-                
-                log_message(f"Processing batch {i+1}/{num_batches} (rows {start_idx+1}-{end_idx})...")
-                processed_batch_df = process_inmate_data(batch_df.copy()) # Process a copy
-                processed_dfs.append(processed_batch_df)
-                
-                # Combine all processed batches so far and save
-                current_full_processed_df = pd.concat(processed_dfs, ignore_index=True)
-                
-                # Update the original df_to_process with the new 'Best_Crime' column values from this batch
-                # This ensures that if we re-save the full df, it has all processed data up to this point.
-                for original_idx, processed_row in processed_batch_df.iterrows():
-                    # Find the corresponding row in df_to_process using InmateID (assuming it's unique after sorting and dropping NAs)
-                    # This is a bit complex; simpler to rebuild df_to_process if intermediate saving is critical
-                    # For now, we will just save the current_full_processed_df
-                    pass
-
-
-                temp_output_path = f"{output_csv_path}.batch_{i+1}_of_{num_batches}.tmp"
-                current_full_processed_df.to_csv(temp_output_path, index=False, quoting=csv.QUOTE_ALL)
-                log_message(f"Intermediate progress for batch {i+1} saved to {temp_output_path}")
-            
-            final_df = pd.concat(processed_dfs, ignore_index=True)
-        else: # Process all at once
-            final_df = process_inmate_data(df_to_process)
-
+            if journal.exists():
+                log_message(f"Discarding previous journal {journal.path} (use --resume to continue it).")
+                journal.remove()
+
+        if args.stream:
+            check_input_columns(read_header(input_csv_path, delimiter))
+            processed_rows, written_rows = process_inmate_stream(input_csv_path, delimiter, output_csv_path, journal,
+                                                                 result_columns, args)
+        else:
+            df = pd.read_csv(input_csv_path, delimiter=delimiter, on_bad_lines='warn', low_memory=False)
+            log_message(f"Successfully read {len(df)} rows from {input_csv_path}.")
+
+            # --- Ensure 'InmateID' and 'Description' columns exist ---
+            check_input_columns(df.columns)
+            df = prepare_inmate_frame(df)
+
+            log_message("Sorting data by 'InmateID'...")
+            # Stable sort; skipped when the input is already in order (append-mode scrapes usually are)
+            df, needed_sort = sort_frame_by_key(df, df['InmateID'])
+            log_message("Data sorted successfully by InmateID." if needed_sort else "Input already sorted by InmateID. Skipped the sort.")
+
+            # --- Limit rows if --max-rows is set ---
+            if args.max_rows and args.max_rows < len(df):
+                log_message(f"Limiting DataFrame to the first {args.max_rows} rows for processing.")
+                df_to_process = df.head(args.max_rows).copy() # Use .copy() to avoid SettingWithCopyWarning
+            else:
+                df_to_process = df.copy()
+
+            row_keys = make_row_keys(df_to_process['InmateID'])
+            processed_rows = process_with_journal(df_to_process, row_keys, journal, result_columns, args)
+
+            # Compaction: merge every journaled result into the output in a single write
+            final_df = apply_journal(df_to_process, row_keys, journal, result_columns)
+            # Write next to the output and rename, so a crash here leaves the journal intact
+            final_df.to_csv(f"{output_csv_path}.tmp", index=False, quoting=csv.QUOTE_ALL)
+            os.replace(f"{output_csv_path}.tmp", output_csv_path)
+            written_rows = len(final_df)
 
         log_message("Consolidated processing complete.")
-        final_df.to_csv(output_csv_path, index=False, quoting=csv.QUOTE_ALL)
-        log_message(f"Results saved to {output_csv_path}")
+        total_keyed = cache_stats_global["hits"] + cache_stats_global["misses"]
+        # Cache hits here are rows whose charge set was equivalent to one already resolved
+        for line in run_stats_global.report_lines(processed_rows, cache_stats_global["hits"], total_keyed):
+            log_message(line)
+        log_message(request_hedger_global.summary())
+        if model_router_global is not None:
+            for line in model_router_global.summary_lines():
+                log_message(line)
+        log_message(f"{written_rows} rows saved to {output_csv_path}")
         
-        # Clean up temporary batch files if they exist
-        if args.save_interval > 0 and len(df_to_process) > args.save_interval:
-            for i in range(num_batches):
-                 temp_output_path = f"{output_csv_path}.batch_{i+1}_of_{num_batches}.tmp"
-                 if os.path.exists(temp_output_path):
-                     try:
-                         os.remove(temp_output_path)
-                         log_message(f"Removed temporary file: {temp_output_path}")
-                     except OSError as e_rem:
-                         log_message(f"Warning: Could not remove temporary file {temp_output_path}: {e_rem.strerror}")
-
+        journal.remove()
+        log_message(f"Removed checkpoint journal {journal.path}")
 
     except FileNotFoundError:
         log_message(f"ERROR: Input file not found during main execution. Path: {input_csv_path}")
@@ -17,10 +17,22 @@ import argparse
 import sys
 import pkg_resources
 
+from retry_policy import DEFAULT_MAX_ATTEMPTS, CircuitBreaker, call_with_retries, is_retryable
+from row_status import (DEFAULT_REPAIR_WORKERS, STATUS_DEFAULTED, STATUS_ERROR, STATUS_OK,
+                        infer_severity_status, rows_needing_repair, run_in_parallel)
+from run_stats import STAGE_SEVERITY, RunStats
+from severity_model import SeverityModel
+from severity_rules import SEVERITY_GUIDELINES, classify_severity_locally
+from statute_index import severity_for_statute_field
+
 # --- Globals ---
 DEFAULT_MODEL = "gpt-4o-mini"  # Using gpt-4o-mini as it's cost-effective for classification
+DEFAULT_RULE_CONFIDENCE = 0.8  # Minimum local-rule confidence to skip the API call
+DEFAULT_MODEL_CONFIDENCE = 0.7  # Minimum local-model confidence to skip the API call
 current_model_global = DEFAULT_MODEL
 client_global = None
+run_stats_global = RunStats() # Tokens, latency, retries and cost per model and stage
+api_breaker_global = None # Shared circuit breaker, created with the client
 
 # --- Helper Functions ---
 def log_message(message):
@@ -47,9 +59,13 @@ def check_required_packages():
         log_message("Please install missing packages (e.g., pip install -r requirements.txt if available, or pip install <package_name>).")
         sys.exit(1)
 
-def initialize_openai_client():
-    """Initializes and returns the OpenAI client."""
-    global client_global
+def initialize_openai_client(base_url=None, skip_model_check=False):
+    """
+    Initializes and returns the OpenAI client. base_url points it at another
+    OpenAI-compatible server (e.g. mock_openai_server.py), which needs no real key;
+    skip_model_check skips the startup model lookup.
+    """
+    global client_global, api_breaker_global
     env_path = os.path.join(os.path.dirname(__file__), '..', '.env')
     if os.path.exists(env_path):
         load_dotenv(env_path)
@@ -59,13 +75,22 @@ def initialize_openai_client():
         load_dotenv()
 
     api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key and base_url:
+        api_key = "not-needed" # Local stand-in servers ignore the key
     if not api_key:
         log_message("ERROR: OPENAI_API_KEY not found in .env file or environment variables.")
         log_message("Please ensure an API key is available.")
         sys.exit(1)
     
-    client_global = OpenAI(api_key=api_key)
-    log_message("OpenAI client initialized successfully.")
+    # Retries are handled by retry_policy.py, so the SDK's own retries are turned off
+    client_global = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+    api_breaker_global = CircuitBreaker(log=log_message)
+    if base_url:
+        log_message(f"OpenAI client initialized successfully (base URL: {base_url}).")
+    else:
+        log_message("OpenAI client initialized successfully.")
+    if skip_model_check:
+        return
     # Verify model access
     try:
         log_message(f"Verifying access to OpenAI model '{current_model_global}'...")
@@ -77,61 +102,54 @@ def initialize_openai_client():
         sys.exit(1)
 
 # --- OpenAI API Call Function ---
-def call_openai_api(messages, max_tokens=10, temperature=0.1, timeout=30):
+def call_openai_api(messages, max_tokens=10, temperature=0.1, timeout=30, stage=STAGE_SEVERITY):
     """
     Helper function to call OpenAI Chat Completions API with error handling and retries.
-    Uses global client_global and current_model_global.
+    Uses global client_global, current_model_global and api_breaker_global. Transient
+    errors are retried as described in retry_policy.py. Every call is recorded in
+    run_stats_global under `stage`.
     """
-    retries = 3
-    for attempt in range(retries):
-        try:
-            log_message(f"Calling OpenAI API (model: {current_model_global}, attempt {attempt + 1}/{retries}, timeout: {timeout}s)...")
-            start_time = time.time()
-            response = client_global.chat.completions.create(
-                model=current_model_global,
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                timeout=timeout
-            )
-            elapsed = time.time() - start_time
-            log_message(f"API call successful in {elapsed:.2f} seconds.")
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            log_message(f"OpenAI API error (attempt {attempt + 1}/{retries}): {str(e)}")
-            if "RateLimitError" in str(e) or "APIConnectionError" in str(e) or "Timeout" in str(e) or "APIError" in str(e) or "InternalServerError" in str(e):
-                if attempt < retries - 1:
-                    sleep_time = (2 ** attempt) + (0.5 * attempt)  # Exponential backoff with jitter
-                    log_message(f"Retrying in {sleep_time:.2f} seconds...")
-                    time.sleep(sleep_time)
-                else:
-                    log_message("Max retries reached for API call. Returning error.")
-                    return f"Error: API call failed after {retries} attempts due to: {type(e).__name__}."
-            else:  # Non-retryable error
-                log_message(f"Non-retryable API error: {type(e).__name__}. Returning error.")
-                return f"Error: API call failed due to: {type(e).__name__}."
-    return f"Error: API call failed after {retries} attempts."
+    def send_request():
+        log_message(f"Calling OpenAI API (model: {current_model_global}, timeout: {timeout}s)...")
+        return client_global.chat.completions.create(
+            model=current_model_global,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=timeout
+        )
+
+    start_time = time.time()
+    retries = []
+    try:
+        response = call_with_retries(send_request, api_breaker_global, log=log_message, on_retry=retries.append)
+    except Exception as e:
+        run_stats_global.record_call(current_model_global, stage, time.time() - start_time, retries=len(retries), ok=False)
+        log_message(f"OpenAI API error: {type(e).__name__}: {str(e)}")
+        if is_retryable(e):
+            return f"Error: API call failed after {DEFAULT_MAX_ATTEMPTS} attempts due to: {type(e).__name__}."
+        return f"Error: API call failed due to: {type(e).__name__}."
+    elapsed = time.time() - start_time
+    log_message(f"API call successful in {elapsed:.2f} seconds.")
+    usage = response.usage
+    run_stats_global.record_call(getattr(response, "model", None) or current_model_global, stage, elapsed,
+                                 usage.prompt_tokens if usage else 0, usage.completion_tokens if usage else 0, retries=len(retries))
+    return response.choices[0].message.content.strip()
 
 # --- Crime Severity Classification Function ---
 def classify_crime_severity(best_crime):
     """
     Classifies the severity of a crime description as High, Medium, or Low.
+    Returns (severity, status), status being one of the row_status values.
     """
     if not best_crime or pd.isna(best_crime) or str(best_crime).strip() == "":
         log_message("  No crime description provided.")
-        return "Unknown"
+        return "Unknown", STATUS_OK
 
     system_prompt = (
         "You are a criminal justice expert tasked with classifying crime severity. "
         "You will be given a crime description and must classify it as exactly one of these three levels:\n\n"
-        "HIGH: Violent crimes, serious felonies, crimes involving weapons, sexual offenses, major drug trafficking, "
-        "armed robbery, murder, kidnapping, aggravated assault, domestic violence with weapons, major fraud (>$50k), "
-        "crimes against children, human trafficking, arson with injury risk.\n\n"
-        "MEDIUM: Property crimes, drug possession (significant amounts), burglary, theft, fraud (<$50k), "
-        "non-violent felonies, DUI, stalking, simple assault, probation violations for serious crimes, "
-        "identity theft, cybercrime.\n\n"
-        "LOW: Minor offenses, misdemeanors, traffic violations, small drug possession, disorderly conduct, "
-        "trespassing, minor theft, failure to appear, probation violations for minor crimes, public intoxication.\n\n"
+        + SEVERITY_GUIDELINES + "\n\n"
         "Respond with ONLY one word: High, Medium, or Low. Do not include any explanation or additional text."
     )
 
@@ -146,20 +164,33 @@ def classify_crime_severity(best_crime):
 
     if classification.startswith("Error:"):
         log_message(f"  API call failed for crime severity classification.")
-        return "Error"
+        return "Error", STATUS_ERROR
     
     # Clean up the response and validate
     classification = classification.strip().title()
     if classification in ["High", "Medium", "Low"]:
-        return classification
+        return classification, STATUS_OK
     else:
         log_message(f"  Unexpected classification response: {classification}. Defaulting to Medium.")
-        return "Medium"
+        return "Medium", STATUS_DEFAULTED
 
 # --- Main Processing Function ---
-def process_crime_severity(input_file, output_file, start_row=None, end_row=None):
+def process_crime_severity(input_file, output_file, start_row=None, end_row=None,
+                           use_local_rules=False, rule_confidence=DEFAULT_RULE_CONFIDENCE,
+                           use_statute_index=False, local_model_path=None,
+                           model_confidence=DEFAULT_MODEL_CONFIDENCE, repair=False,
+                           workers=DEFAULT_REPAIR_WORKERS):
     """
     Processes the CSV file to add crime severity classifications.
+    With use_statute_index, rows whose statutes resolve in the local Florida statute
+    index are pre-filled from it. With use_local_rules, distinct crimes that the local
+    keyword rules classify with at least rule_confidence are labeled offline. With
+    local_model_path, the trained local model labels the remaining distinct crimes in
+    one vectorized batch and keeps those with at least model_confidence. Only the
+    remainder go to the API.
+    With repair, only rows whose Crime_Severity_Status is not ok are reclassified (the
+    row range is ignored), with workers API calls in flight at once, and the file is
+    rewritten in place.
     """
     log_message(f"Reading CSV file: {input_file}")
     
@@ -180,6 +211,9 @@ def process_crime_severity(input_file, output_file, start_row=None, end_row=None
     if 'Crime_Severity' not in df.columns:
         df['Crime_Severity'] = None
         log_message("Added 'Crime_Severity' column to DataFrame.")
+    if 'Crime_Severity_Status' not in df.columns:
+        # Files written before status tracking get a status inferred from their values
+        df['Crime_Severity_Status'] = df['Crime_Severity'].map(infer_severity_status).where(df['Crime_Severity'].notna(), None)
 
     # Determine processing range
     if start_row is not None:
@@ -192,33 +226,98 @@ def process_crime_severity(input_file, output_file, start_row=None, end_row=None
     else:
         end_idx = len(df)
 
-    total_to_process = end_idx - start_idx
-    log_message(f"Processing rows {start_idx + 1} to {end_idx} ({total_to_process} total rows)...")
-
-    # Process each row
-    for index in range(start_idx, end_idx):
-        row = df.iloc[index]
-        log_message(f"Processing row {index + 1}/{len(df)}, InmateID: {row.get('InmateID', 'N/A')}")
-        
-        best_crime = row.get('Best_Crime', '')
-        
-        if pd.isna(best_crime) or str(best_crime).strip() == "":
-            log_message(f"  No Best_Crime data for row {index + 1}. Skipping.")
-            df.at[index, 'Crime_Severity'] = "Unknown"
-            continue
-
-        log_message(f"  Crime: {best_crime}")
-        severity = classify_crime_severity(best_crime)
-        df.at[index, 'Crime_Severity'] = severity
-        log_message(f"  Classified as: {severity}")
-
-        # Add a small delay to avoid rate limiting
-        time.sleep(0.1)
+    if repair:
+        row_range = df.index[rows_needing_repair(df, 'Crime_Severity_Status', 'Crime_Severity', infer_severity_status).to_numpy()]
+        log_message(f"Repairing {len(row_range)} row(s) whose Crime_Severity_Status is not ok...")
+    else:
+        total_to_process = end_idx - start_idx
+        log_message(f"Processing rows {start_idx + 1} to {end_idx} ({total_to_process} total rows)...")
+        row_range = df.index[start_idx:end_idx]
+
+    # Classify each distinct Best_Crime once; repeats are filled in by a single vectorized map
+    raw_crimes = df.loc[row_range, 'Best_Crime']
+    crimes = raw_crimes.where(raw_crimes.notna(), "").astype(str).str.strip()
+    has_crime = crimes != ""
+    df.loc[row_range[~has_crime.to_numpy()], 'Crime_Severity'] = "Unknown"
+    df.loc[row_range, 'Crime_Severity_Status'] = STATUS_OK
+    log_message(f"  {int((~has_crime).sum())} rows have no Best_Crime data and were marked Unknown.")
+
+    if use_statute_index:
+        if 'Statute_Severity' in df.columns:
+            statute_severity = df.loc[row_range, 'Statute_Severity']
+        elif 'Statute' in df.columns:
+            statute_severity = df.loc[row_range, 'Statute'].map(severity_for_statute_field)
+        else:
+            log_message("Warning: Neither 'Statute_Severity' nor 'Statute' column found. Skipping statute pre-fill.")
+            statute_severity = pd.Series(None, index=row_range, dtype=object)
+        prefilled = has_crime & statute_severity.isin(["High", "Medium", "Low"])
+        df.loc[row_range[prefilled.to_numpy()], 'Crime_Severity'] = statute_severity[prefilled].to_numpy()
+        has_crime = has_crime & ~prefilled
+        log_message(f"  {int(prefilled.sum())} rows were pre-filled from the statute index without an API call.")
+
+    unique_crimes = crimes[has_crime].unique()
+    log_message(f"Found {len(unique_crimes)} distinct crimes across {int(has_crime.sum())} rows.")
+
+    severity_by_crime = {}
+    if use_local_rules:
+        rule_start = time.time()
+        for best_crime in unique_crimes:
+            severity, confidence = classify_severity_locally(best_crime)
+            if severity is not None and confidence >= rule_confidence:
+                severity_by_crime[best_crime] = severity
+        rule_elapsed = time.time() - rule_start
+        log_message(f"Local rules classified {len(severity_by_crime)} of {len(unique_crimes)} distinct crimes "
+                    f"(confidence >= {rule_confidence}) in {rule_elapsed:.2f} seconds.")
+
+    if local_model_path:
+        pending = [best_crime for best_crime in unique_crimes if best_crime not in severity_by_crime]
+        model_start = time.time()
+        severity_model = SeverityModel.load(local_model_path)
+        predicted, confidences = severity_model.predict(pending)
+        confident = confidences >= model_confidence
+        for best_crime, severity in zip(pd.Series(pending)[confident], predicted[confident]):
+            severity_by_crime[best_crime] = severity
+        model_elapsed = time.time() - model_start
+        log_message(f"Local model classified {int(confident.sum())} of {len(pending)} remaining distinct crimes "
+                    f"(confidence >= {model_confidence}) in {model_elapsed:.2f} seconds.")
+
+    crimes_for_api = [best_crime for best_crime in unique_crimes if best_crime not in severity_by_crime]
+    status_by_crime = {}
+    if repair:
+        log_message(f"Reclassifying {len(crimes_for_api)} distinct crimes on {workers} worker(s)...")
+        for best_crime, (severity, status) in zip(crimes_for_api, run_in_parallel(classify_crime_severity, crimes_for_api, workers)):
+            severity_by_crime[best_crime] = severity
+            status_by_crime[best_crime] = status
+    else:
+        for position, best_crime in enumerate(crimes_for_api, 1):
+            log_message(f"Classifying distinct crime {position}/{len(crimes_for_api)}: {best_crime}")
+            severity, status = classify_crime_severity(best_crime)
+            severity_by_crime[best_crime] = severity
+            status_by_crime[best_crime] = status
+            log_message(f"  Classified as: {severity}")
+
+            # Add a small delay to avoid rate limiting
+            time.sleep(0.1)
+
+    df.loc[row_range[has_crime.to_numpy()], 'Crime_Severity'] = crimes[has_crime].map(severity_by_crime).to_numpy()
+    if status_by_crime:
+        # Crimes labeled locally keep the ok status set above
+        df.loc[row_range[has_crime.to_numpy()], 'Crime_Severity_Status'] = crimes[has_crime].map(status_by_crime).fillna(STATUS_OK).to_numpy()
+    saved_calls = int(has_crime.sum()) - len(unique_crimes)
+    log_message(f"Deduplication saved {saved_calls} API calls ({len(unique_crimes)} distinct crimes for {int(has_crime.sum())} rows).")
+    log_message(f"Made {len(crimes_for_api)} API calls in total.")
+    for line in run_stats_global.report_lines(len(row_range), saved_calls, int(has_crime.sum())):
+        log_message(line)
+    not_ok = int((df['Crime_Severity_Status'] != STATUS_OK).sum())
+    if not_ok:
+        log_message(f"{not_ok} row(s) have a Crime_Severity_Status other than ok; rerun with --repair to retry only those.")
 
     # Save the updated DataFrame
     log_message(f"Saving results to: {output_file}")
     try:
-        df.to_csv(output_file, index=False)
+        # Written next to the output and renamed, since --repair rewrites its input in place
+        df.to_csv(f"{output_file}.tmp", index=False)
+        os.replace(f"{output_file}.tmp", output_file)
         log_message(f"Successfully saved {len(df)} rows to {output_file}")
     except Exception as e:
         log_message(f"ERROR: Could not save CSV file: {e}")
@@ -247,18 +346,37 @@ def main():
                        help='Start processing from this row number (1-based)')
     parser.add_argument('--end-row', type=int, 
                        help='End processing at this row number (1-based, inclusive)')
+    parser.add_argument('--statute-index', action='store_true',
+                       help='Pre-fill severity from the local Florida statute index (Statute_Severity or Statute column) before any API call')
+    parser.add_argument('--local-rules', action='store_true',
+                       help='Classify clear-cut crimes with local keyword rules and only send ambiguous ones to OpenAI')
+    parser.add_argument('--rule-confidence', type=float, default=DEFAULT_RULE_CONFIDENCE,
+                       help=f'Minimum local-rule confidence (0-1) to accept a label without an API call. Default: {DEFAULT_RULE_CONFIDENCE}')
+    parser.add_argument('--local-model', type=str,
+                       help='Path to a model trained with severity_model.py; confident predictions skip the API call')
+    parser.add_argument('--model-confidence', type=float, default=DEFAULT_MODEL_CONFIDENCE,
+                       help=f'Minimum local-model confidence (0-1) to accept a label without an API call. Default: {DEFAULT_MODEL_CONFIDENCE}')
+    parser.add_argument('--repair', action='store_true',
+                       help='Reclassify only the rows of the existing --output whose Crime_Severity_Status is not ok (API errors, defaulted answers), in place')
+    parser.add_argument('--workers', type=int, default=DEFAULT_REPAIR_WORKERS,
+                       help=f'Parallel OpenAI requests in --repair mode. Default: {DEFAULT_REPAIR_WORKERS}')
+    parser.add_argument('--base-url', type=str,
+                       help='OpenAI-compatible API base URL, e.g. http://127.0.0.1:8089/v1 for mock_openai_server.py. Default: the OpenAI API')
+    parser.add_argument('--skip-model-check', action='store_true',
+                       help='Do not look up the model at startup')
 
     args = parser.parse_args()
 
     # Set global model
-    global current_model_global
+    global current_model_global, run_stats_global
     current_model_global = args.model
+    run_stats_global = RunStats()
 
     # Check required packages
     check_required_packages()
     
     # Initialize OpenAI client
-    initialize_openai_client()
+    initialize_openai_client(base_url=args.base_url, skip_model_check=args.skip_model_check)
 
     log_message("=== Crime Severity Classification Script ===")
     log_message(f"Input file: {args.input}")
@@ -269,9 +387,20 @@ def main():
         log_message(f"Start row: {args.start_row}")
     if args.end_row:
         log_message(f"End row: {args.end_row}")
+    if args.statute_index:
+        log_message("Statute index pre-fill enabled.")
+    if args.local_rules:
+        log_message(f"Local rule fast path enabled (confidence >= {args.rule_confidence}).")
+    if args.local_model:
+        log_message(f"Local model: {args.local_model} (confidence >= {args.model_confidence})")
+    if args.repair:
+        log_message(f"Repair mode: rewriting {args.output} in place with {args.workers} worker(s).")
 
-    # Process the file
-    process_crime_severity(args.input, args.output, args.start_row, args.end_row)
+    # Process the file (--repair reads the previous output instead of the input)
+    process_crime_severity(args.output if args.repair else args.input, args.output, args.start_row, args.end_row,
+                           use_local_rules=args.local_rules, rule_confidence=args.rule_confidence,
+                           use_statute_index=args.statute_index, local_model_path=args.local_model,
+                           model_confidence=args.model_confidence, repair=args.repair, workers=args.workers)
     
     log_message("=== Script completed successfully ===")
 
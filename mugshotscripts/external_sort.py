@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+External Sort
+
+Stable sort of an inmate CSV by a numeric ID column (InmateID or DCNumber) for
+inputs larger than RAM. The input is read in chunks; chunks that are already in
+order are appended to the current run as-is (append-mode scrapes are mostly
+presorted), out-of-order chunks are sorted and start a new run, and the run files
+are then k-way merged. Rows with equal IDs keep their input order, matching the
+processors' in-memory sort_values(kind='mergesort'). Rows without a numeric ID are
+dropped, as the processors do.
+
+Usage:
+    python3 external_sort.py --input mugshots_data.csv --output mugshots_sorted.csv --id-column InmateID
+"""
+
+import argparse
+import csv
+import datetime
+import heapq
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# --- Globals ---
+DEFAULT_CHUNK_SIZE = 50000
+
+# --- Helper Functions ---
+def log_message(message):
+    """Logs a message with a timestamp."""
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
+    print(f"[{timestamp}] {message}")
+
+def sort_frame_by_key(df, keys):
+    """
+    Stable-sorts an in-memory DataFrame by `keys` (a numeric Series aligned with df).
+    Returns (sorted df, whether a sort was needed). Already ordered input is returned
+    untouched; otherwise numpy's stable sort is run-adaptive, so mostly sorted input
+    costs little more than the check.
+    """
+    if keys.is_monotonic_increasing:
+        return df, False
+    return df.iloc[np.argsort(keys.to_numpy(), kind='stable')], True
+
+# --- Run Generation ---
+def write_sorted_runs(input_path, id_column, delimiter, chunk_size, run_dir):
+    """
+    Splits the input into sorted run files, extending the current run while chunks
+    stay in order. Returns (run file paths, number of rows kept).
+    """
+    run_paths = []
+    run_last_key = None
+    kept_rows = 0
+    for chunk in pd.read_csv(input_path, delimiter=delimiter, dtype=str, keep_default_na=False,
+                             chunksize=chunk_size, on_bad_lines='warn'):
+        keys = pd.to_numeric(chunk[id_column], errors='coerce').dropna()
+        if keys.empty:
+            continue
+        if keys.is_monotonic_increasing:
+            ordered = chunk.loc[keys.index]
+            extends_run = run_last_key is not None and keys.iloc[0] >= run_last_key
+        else:
+            ordered = chunk.loc[keys.sort_values(kind='mergesort').index]
+            extends_run = False
+
+        if extends_run:
+            ordered.to_csv(run_paths[-1], mode='a', header=False, index=False)
+        else:
+            run_paths.append(os.path.join(run_dir, f"run_{len(run_paths):05d}.csv"))
+            ordered.to_csv(run_paths[-1], index=False)
+        run_last_key = pd.to_numeric(ordered[id_column]).iloc[-1]
+        kept_rows += len(ordered)
+    return run_paths, kept_rows
+
+# --- K-way Merge ---
+def _iter_run_rows(run_path, id_position):
+    """Yields (numeric id, row) for every row of a run file."""
+    with open(run_path, "r", encoding="utf-8", newline="") as run_file:
+        reader = csv.reader(run_file)
+        next(reader, None)
+        for row in reader:
+            yield float(row[id_position]), row
+
+def merge_runs(run_paths, id_position):
+    """
+    Yields the rows of all runs in ID order. heapq.merge takes equal IDs from the
+    earlier run first, and runs are numbered in input order, so the merge is stable.
+    """
+    if len(run_paths) == 1:
+        return (row for _, row in _iter_run_rows(run_paths[0], id_position))
+    merged = heapq.merge(*[_iter_run_rows(path, id_position) for path in run_paths], key=lambda item: item[0])
+    return (row for _, row in merged)
+
+def iter_sorted_rows(input_path, id_column, delimiter, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yields the header and then every row (as a list of strings) in stable ID order,
+    holding at most one chunk in memory while building the runs. Run files live in a
+    temporary directory next to the input and are removed when the generator ends.
+    """
+    columns = list(pd.read_csv(input_path, delimiter=delimiter, nrows=0).columns)
+    run_dir = tempfile.mkdtemp(prefix="sort_runs_", dir=os.path.dirname(os.path.abspath(input_path)))
+    try:
+        run_paths, _ = write_sorted_runs(input_path, id_column, delimiter, chunk_size, run_dir)
+        yield columns
+        yield from merge_runs(run_paths, columns.index(id_column))
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+def external_sort_csv(input_path, output_path, id_column, delimiter=",", chunk_size=DEFAULT_CHUNK_SIZE):
+    """Writes a copy of the input sorted by id_column. Returns the number of rows written."""
+    rows = iter_sorted_rows(input_path, id_column, delimiter, chunk_size)
+    written_rows = 0
+    with open(output_path, "w", encoding="utf-8", newline="") as output_file:
+        writer = csv.writer(output_file, quoting=csv.QUOTE_ALL)
+        writer.writerow(next(rows))
+        for row in rows:
+            writer.writerow(row)
+            written_rows += 1
+    return written_rows
+
+# --- Main Execution ---
+def main():
+    parser = argparse.ArgumentParser(description='Stable external merge sort of an inmate CSV by a numeric ID column.')
+    parser.add_argument('--input', type=str, required=True, help='Input CSV file path.')
+    parser.add_argument('--output', type=str, required=True, help='Sorted output CSV file path.')
+    parser.add_argument('--id-column', type=str, default='InmateID', help='Numeric ID column to sort by (InmateID or DCNumber). Default: InmateID')
+    parser.add_argument('--delimiter', type=str, default=',', help="Input delimiter. Default: ','")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help=f'Rows held in memory per run. Default: {DEFAULT_CHUNK_SIZE}')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        log_message(f"ERROR: Input file '{args.input}' does not exist!")
+        sys.exit(1)
+
+    log_message(f"Sorting {args.input} by '{args.id_column}' in runs of {args.chunk_size} rows...")
+    written_rows = external_sort_csv(args.input, args.output, args.id_column, args.delimiter, args.chunk_size)
+    log_message(f"Wrote {written_rows} sorted rows to {args.output}")
+
+if __name__ == "__main__":
+    main()
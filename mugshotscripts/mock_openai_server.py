@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Mock OpenAI Server
+
+Local OpenAI-compatible stand-in for load-testing the processing scripts without an
+API key or spend. Serves the endpoints the scripts and the openai SDK use:
+
+    GET  /v1/models/<model>          model lookup (the scripts' startup check)
+    POST /v1/chat/completions        deterministic canned answers
+    POST /v1/files                   JSONL upload for the batch API
+    GET  /v1/files/<id>/content      batch output (and error file) download
+    POST /v1/batches                 runs the uploaded requests immediately
+    GET  /v1/batches/<id>            batch status
+
+Answers depend only on the request content, so runs are reproducible: plain
+Best_Crime prompts get the first charge rewritten in title case, one-word severity
+prompts get a level from the local severity rules, and json_schema requests get an
+answer built from the schema (with the 'ID: <id>' entries of packed prompts).
+Latency, 429/5xx injection and a requests-per-minute limit with rate-limit headers
+are configurable, and a random seed makes the injected behavior repeatable.
+
+Usage:
+    python3 mock_openai_server.py --port 8089 --latency lognormal --latency-ms 400 --error-rate-429 0.02
+    python3 consolidated_mugshot_processor.py --base-url http://127.0.0.1:8089/v1 --max-rows 500
+"""
+
+import argparse
+import datetime
+import email.parser
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from severity_rules import SEVERITY_LEVELS, classify_severity_locally
+from token_estimate import estimate_tokens
+
+# --- Globals ---
+DEFAULT_PORT = 8089
+LATENCY_DISTRIBUTIONS = ["none", "fixed", "uniform", "lognormal"]
+
+_ID_LINE_RE = re.compile(r"^ID: (.+)$", re.MULTILINE)
+_NUMBERED_LINE_RE = re.compile(r"^\s*\d+\.\s*(.+)$", re.MULTILINE)
+_DETAIL_LABEL_RE = re.compile(r"^(?:Charge|Current Sentence|Detainers|Incarceration History|Prior Prison History):\s*", re.IGNORECASE)
+
+# --- Helper Functions ---
+def log_message(message):
+    """Logs a message with a timestamp."""
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
+    print(f"[{timestamp}] {message}")
+
+def _stable_hash(text):
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:12], 16)
+
+# --- Canned Answers ---
+def canned_crime(charge_text):
+    """A plain-English-looking Best_Crime for a raw charge line: its first few words in title case."""
+    text = _DETAIL_LABEL_RE.sub("", charge_text.strip())
+    text = text.split(",")[0].split("|")[0]
+    words = re.sub(r"[^A-Za-z0-9$ ]+", " ", text).split()[:8]
+    return " ".join(words).title() or "Unspecified Offense"
+
+def canned_severity(text):
+    """A severity level: the local rules' answer, else a deterministic pick."""
+    severity, _ = classify_severity_locally(text)
+    return severity or SEVERITY_LEVELS[_stable_hash(text) % len(SEVERITY_LEVELS)]
+
+def _charge_lines(text):
+    lines = _NUMBERED_LINE_RE.findall(text)
+    if lines:
+        return lines
+    return [line for line in text.splitlines()[1:] if line.strip()] or [text]
+
+def _value_for_field(field, field_schema, charge_text):
+    if "enum" in field_schema:
+        if set(field_schema["enum"]) <= set(SEVERITY_LEVELS):
+            return canned_severity(charge_text)
+        return field_schema["enum"][_stable_hash(charge_text) % len(field_schema["enum"])]
+    return canned_crime(charge_text)
+
+def structured_answer(schema, user_text):
+    """Builds a JSON answer matching a strict json_schema from the processors' packed or single formats."""
+    properties = schema.get("properties", {})
+    if "results" in properties:
+        item_properties = properties["results"]["items"]["properties"]
+        # Split the packed prompt into per-ID sections
+        sections = re.split(r"^ID: ", user_text, flags=re.MULTILINE)[1:]
+        results = []
+        for section in sections:
+            item_id, _, charges = section.partition("\n")
+            charge_text = _charge_lines(charges)[0]
+            entry = {"id": item_id.strip()}
+            entry.update({field: _value_for_field(field, field_schema, charge_text)
+                          for field, field_schema in item_properties.items() if field != "id"})
+            results.append(entry)
+        return json.dumps({"results": results})
+    charge_text = _charge_lines(user_text)[0]
+    return json.dumps({field: _value_for_field(field, field_schema, charge_text) for field, field_schema in properties.items()})
+
+def canned_answer(request_body):
+    """Deterministic answer text for a chat-completions request body."""
+    messages = request_body.get("messages", [])
+    system_text = " ".join(str(message.get("content", "")) for message in messages if message.get("role") == "system")
+    user_text = str(messages[-1].get("content", "")) if messages else ""
+    response_format = request_body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        return structured_answer(response_format["json_schema"]["schema"], user_text)
+    if "ONLY one word" in system_text:
+        return canned_severity(user_text.split(":", 1)[-1])
+    return canned_crime(_charge_lines(user_text)[0])
+
+def chat_completion(request_body):
+    """A chat.completion object for a request body."""
+    content = canned_answer(request_body)
+    prompt_tokens = sum(estimate_tokens(str(message.get("content", ""))) for message in request_body.get("messages", []))
+    completion_tokens = estimate_tokens(content)
+    return {
+        "id": f"chatcmpl-mock-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request_body.get("model", "mock-model"),
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content, "refusal": None}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+# --- Fault and Latency Injection ---
+class MockBehavior:
+    """Latency, error injection and rate limiting shared by all request threads."""
+
+    def __init__(self, args):
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.window_start = time.time()
+        self.window_requests = 0
+        self.counts = {"requests": 0, "429": 0, "5xx": 0}
+
+    def latency_seconds(self):
+        median = self.args.latency_ms / 1000.0
+        with self.lock:
+            if self.args.latency == "fixed":
+                return median
+            if self.args.latency == "uniform":
+                return self.random.uniform(0, 2 * median)
+            if self.args.latency == "lognormal":
+                return self.random.lognormvariate(0, self.args.latency_sigma) * median
+        return 0.0
+
+    def rate_limit_headers(self):
+        """(over the limit, headers) for the current requests-per-minute window."""
+        with self.lock:
+            now = time.time()
+            if now - self.window_start >= 60:
+                self.window_start, self.window_requests = now, 0
+            self.window_requests += 1
+            self.counts["requests"] += 1
+            limit = self.args.rate_limit_rpm
+            if not limit:
+                return False, {}
+            reset_seconds = max(60 - (now - self.window_start), 0.0)
+            headers = {
+                "x-ratelimit-limit-requests": str(limit),
+                "x-ratelimit-remaining-requests": str(max(limit - self.window_requests, 0)),
+                "x-ratelimit-reset-requests": f"{reset_seconds:.3f}s",
+            }
+            return self.window_requests > limit, headers
+
+    def injected_error(self):
+        """An injected status code (429 or 5xx) for this request, or None."""
+        with self.lock:
+            roll = self.random.random()
+            if roll < self.args.error_rate_429:
+                self.counts["429"] += 1
+                return 429
+            if roll < self.args.error_rate_429 + self.args.error_rate_5xx:
+                self.counts["5xx"] += 1
+                return self.random.choice([500, 502, 503])
+        return None
+
+# --- HTTP Handler ---
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockOpenAI/1.0"
+
+    def log_message(self, format, *args): # Quiet; the server logs its own summary lines
+        if self.server.verbose:
+            log_message(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message, error_type, headers=None):
+        self._send_json(status, {"error": {"message": message, "type": error_type, "param": None, "code": None}}, headers)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_GET(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if path.startswith("/v1/models/"):
+            model = path[len("/v1/models/"):]
+            self._send_json(200, {"id": model, "object": "model", "created": 0, "owned_by": "mock"})
+        elif path.startswith("/v1/batches/"):
+            batch = self.server.batches.get(path[len("/v1/batches/"):])
+            self._send_json(200, batch) if batch else self._send_error(404, "No such batch.", "invalid_request_error")
+        elif path.startswith("/v1/files/") and path.endswith("/content"):
+            content = self.server.files.get(path[len("/v1/files/"):-len("/content")])
+            if content is None:
+                self._send_error(404, "No such file.", "invalid_request_error")
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        else:
+            self._send_error(404, f"Unknown endpoint {path}.", "invalid_request_error")
+
+    def do_POST(self):
+        path = self.path.split("?")[0].rstrip("/")
+        body = self._read_body()
+        if path == "/v1/chat/completions":
+            self._chat_completions(body)
+        elif path == "/v1/files":
+            self._upload_file(body)
+        elif path == "/v1/batches":
+            self._create_batch(body)
+        else:
+            self._send_error(404, f"Unknown endpoint {path}.", "invalid_request_error")
+
+    def _chat_completions(self, body):
+        behavior = self.server.behavior
+        over_limit, headers = behavior.rate_limit_headers()
+        time.sleep(behavior.latency_seconds())
+        status = 429 if over_limit else behavior.injected_error()
+        if status == 429:
+            if over_limit:
+                with behavior.lock:
+                    behavior.counts["429"] += 1
+            headers = dict(headers, **{"retry-after-ms": str(int(behavior.args.retry_after * 1000)),
+                                       "retry-after": str(max(int(round(behavior.args.retry_after)), 1))})
+            self._send_error(429, "Rate limit reached (mock).", "requests", headers)
+            return
+        if status is not None:
+            self._send_error(status, "The server had an error while processing your request (mock).", "server_error", headers)
+            return
+        try:
+            request_body = json.loads(body or b"{}")
+        except ValueError:
+            self._send_error(400, "Request body is not valid JSON.", "invalid_request_error")
+            return
+        self._send_json(200, chat_completion(request_body), headers)
+
+    def _upload_file(self, body):
+        # multipart/form-data with a 'file' part (the SDK's files.create)
+        message = email.parser.BytesParser().parsebytes(
+            b"Content-Type: " + self.headers.get("Content-Type", "").encode("latin-1") + b"\r\n\r\n" + body)
+        content, filename = b"", "upload.jsonl"
+        for part in message.walk():
+            if part.get_param("name", header="content-disposition") == "file":
+                content = part.get_payload(decode=True) or b""
+                filename = part.get_filename() or filename
+        file_id = f"file-mock-{uuid.uuid4().hex[:12]}"
+        self.server.files[file_id] = content
+        self._send_json(200, {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                              "filename": filename, "purpose": "batch", "status": "processed"})
+
+    def _store_file(self, lines):
+        """Stores JSONL lines as a downloadable file and returns its id, or None if there are no lines."""
+        if not lines:
+            return None
+        file_id = f"file-mock-{uuid.uuid4().hex[:12]}"
+        self.server.files[file_id] = ("\n".join(lines) + "\n").encode("utf-8")
+        return file_id
+
+    def _create_batch(self, body):
+        request_body = json.loads(body or b"{}")
+        input_content = self.server.files.get(request_body.get("input_file_id"), b"")
+        output_lines, error_lines = [], []
+        for line_number, line in enumerate(input_content.decode("utf-8", errors="replace").splitlines(), 1):
+            if not line.strip():
+                continue
+            # A malformed line fails only its own request, reported in the error file like the real Batch API
+            try:
+                entry = json.loads(line)
+                if not isinstance(entry, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError as e:
+                error_lines.append(json.dumps({"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": None, "response": None,
+                                               "error": {"code": "invalid_json_line",
+                                                         "message": f"Line {line_number} is not a valid request: {e}"}}))
+                continue
+            output_lines.append(json.dumps({"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": entry.get("custom_id"),
+                                            "response": {"status_code": 200, "body": chat_completion(entry.get("body", {}))},
+                                            "error": None}))
+        output_file_id = self._store_file(output_lines)
+        error_file_id = self._store_file(error_lines)
+        now = int(time.time())
+        batch = {"id": f"batch_mock_{uuid.uuid4().hex[:12]}", "object": "batch", "endpoint": request_body.get("endpoint"),
+                 "input_file_id": request_body.get("input_file_id"), "completion_window": request_body.get("completion_window", "24h"),
+                 "status": "completed", "output_file_id": output_file_id, "error_file_id": error_file_id, "created_at": now,
+                 "completed_at": now, "request_counts": {"total": len(output_lines) + len(error_lines),
+                                                         "completed": len(output_lines), "failed": len(error_lines)}}
+        self.server.batches[batch["id"]] = batch
+        self._send_json(200, batch)
+
+def make_server(args):
+    """Creates (but does not start) a mock server configured from parsed arguments."""
+    server = ThreadingHTTPServer((args.host, args.port), MockOpenAIHandler)
+    server.daemon_threads = True
+    server.behavior = MockBehavior(args)
+    server.verbose = args.verbose
+    server.files = {}
+    server.batches = {}
+    return server
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Local OpenAI-compatible stand-in server with deterministic answers, for load tests.')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Interface to listen on. Default: 127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port to listen on (0 picks a free one). Default: {DEFAULT_PORT}')
+    parser.add_argument('--latency', choices=LATENCY_DISTRIBUTIONS, default='none', help='Latency distribution per chat request. Default: none')
+    parser.add_argument('--latency-ms', type=float, default=300.0, help='Median (fixed/lognormal) or mean (uniform) latency in ms. Default: 300')
+    parser.add_argument('--latency-sigma', type=float, default=0.6, help='Sigma of the lognormal distribution (larger = heavier tail). Default: 0.6')
+    parser.add_argument('--error-rate-429', type=float, default=0.0, help='Share of chat requests answered with 429. Default: 0')
+    parser.add_argument('--error-rate-5xx', type=float, default=0.0, help='Share of chat requests answered with 500/502/503. Default: 0')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Seconds advertised in Retry-After / retry-after-ms on 429s. Default: 1')
+    parser.add_argument('--rate-limit-rpm', type=int, default=0, help='Requests per minute before 429s (with x-ratelimit-* headers). Default: 0 (unlimited)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for latency and error injection. Default: 0')
+    parser.add_argument('--verbose', action='store_true', help='Log every request.')
+    return parser
+
+# --- Main Execution ---
+def main():
+    args = build_parser().parse_args()
+    server = make_server(args)
+    host, port = server.server_address[:2]
+    log_message(f"Mock OpenAI server listening on http://{host}:{port}/v1 "
+                f"(latency: {args.latency} {args.latency_ms:.0f}ms, 429 rate {args.error_rate_429}, 5xx rate {args.error_rate_5xx}, "
+                f"rpm limit {args.rate_limit_rpm or 'none'}).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        counts = server.behavior.counts
+        log_message(f"Served {counts['requests']} chat request(s): {counts['429']} answered 429, {counts['5xx']} answered 5xx.")
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
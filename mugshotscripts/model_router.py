@@ -0,0 +1,133 @@
+"""
+Model Router
+
+Sends easy prompts to a cheap, fast model and hard ones to the stronger model.
+A prompt's complexity score adds up its number of charges (or crime information
+fields), its estimated token length, and a penalty when the local statute index
+does not recognize the charge. Scores at or below the threshold are "easy".
+
+A small share of routed items is also answered by the other route's model, and
+the agreement rate per route is reported next to per-route throughput, so a
+threshold that sends too much to the cheap model shows up in the logs. Two free-text
+rewordings rarely match word for word, so agreement means the same severity label
+(from the fused call, or the local rules); the same canonical charge and the exact
+wording are reported as secondary rates.
+"""
+
+import re
+import threading
+
+from charge_canonicalizer import canonical_charge_key
+from severity_rules import classify_severity_locally
+from token_estimate import estimate_tokens
+
+ROUTE_EASY = "easy"
+ROUTE_HARD = "hard"
+
+DEFAULT_EASY_MODEL = "gpt-4.1-nano"
+DEFAULT_ROUTE_THRESHOLD = 2.5
+DEFAULT_SPOT_CHECK_RATE = 0.02
+TOKENS_PER_POINT = 100 # Estimated prompt tokens worth one point of complexity
+UNKNOWN_CHARGE_PENALTY = 1.0
+
+def complexity_score(charge_count, prompt_text, known_charge):
+    """Higher is harder: one point per charge, one per TOKENS_PER_POINT tokens, plus a penalty for unrecognized charges."""
+    score = charge_count + estimate_tokens(prompt_text) / TOKENS_PER_POINT
+    if not known_charge:
+        score += UNKNOWN_CHARGE_PENALTY
+    return score
+
+def _normalize_answer(text):
+    return re.sub(r"[^a-z0-9]+", " ", str(text).lower()).strip()
+
+def _answer_charge_key(text):
+    """Order-independent canonical key of a Best_Crime answer ('A | B')."""
+    return canonical_charge_key((part, "", "") for part in str(text).split("|"))
+
+class ModelRouter:
+    """Picks a model per prompt and keeps per-route throughput and spot-check stats. Thread-safe."""
+
+    def __init__(self, easy_model, hard_model, threshold=DEFAULT_ROUTE_THRESHOLD, spot_check_rate=DEFAULT_SPOT_CHECK_RATE):
+        self.models = {ROUTE_EASY: easy_model, ROUTE_HARD: hard_model}
+        self.threshold = threshold
+        self.spot_check_rate = spot_check_rate
+        self._stats = {route: {"items": 0, "seconds": 0.0, "checks": 0, "severity_checks": 0, "agreements": 0,
+                               "charge_agreements": 0, "text_agreements": 0} for route in self.models}
+        self._routed = 0
+        self._lock = threading.Lock()
+
+    def route(self, charge_count, prompt_text, known_charge):
+        """Returns (route, model) for one prompt."""
+        route = ROUTE_EASY if complexity_score(charge_count, prompt_text, known_charge) <= self.threshold else ROUTE_HARD
+        return route, self.models[route]
+
+    def other_model(self, route):
+        return self.models[ROUTE_HARD if route == ROUTE_EASY else ROUTE_EASY]
+
+    def should_spot_check(self):
+        """True for about spot_check_rate of all calls, spread evenly."""
+        if self.spot_check_rate <= 0:
+            return False
+        with self._lock:
+            self._routed += 1
+            return int(self._routed * self.spot_check_rate) != int((self._routed - 1) * self.spot_check_rate)
+
+    def record(self, route, items, seconds):
+        """Records that `items` prompts on `route` took `seconds` of wall time."""
+        with self._lock:
+            self._stats[route]["items"] += items
+            self._stats[route]["seconds"] += seconds
+
+    def record_spot_check(self, route, answer, reference_answer, severity=None, reference_severity=None):
+        """
+        Compares a routed answer with the other model's answer for the same prompt. The
+        severities are the labels the models gave (fused calls); when missing, the local
+        rules label the answer, and pairs the rules cannot label have no severity verdict.
+        """
+        if severity is None:
+            severity = classify_severity_locally(answer)[0]
+        if reference_severity is None:
+            reference_severity = classify_severity_locally(reference_answer)[0]
+        same_charge = _answer_charge_key(answer) == _answer_charge_key(reference_answer)
+        same_text = _normalize_answer(answer) == _normalize_answer(reference_answer)
+        with self._lock:
+            stats = self._stats[route]
+            stats["checks"] += 1
+            if severity is not None and reference_severity is not None:
+                stats["severity_checks"] += 1
+                stats["agreements"] += severity == reference_severity
+            stats["charge_agreements"] += same_charge
+            stats["text_agreements"] += same_text
+
+    def summary_lines(self):
+        """One log line per route: model, items, throughput and spot-check agreement."""
+        lines = []
+        with self._lock:
+            for route, stats in self._stats.items():
+                line = f"Route '{route}' ({self.models[route]}): {stats['items']} item(s)"
+                if stats["seconds"] > 0:
+                    line += f", {stats['items'] / stats['seconds']:.2f} items/s"
+                if stats["checks"]:
+                    line += f", {stats['checks']} spot check(s) against {self.other_model(route)}: "
+                    if stats["severity_checks"]:
+                        line += (f"severity agrees {stats['agreements']}/{stats['severity_checks']} "
+                                 f"({stats['agreements'] / stats['severity_checks'] * 100:.0f}%)")
+                    else:
+                        line += "no severity labels to compare"
+                    line += (f"; same canonical charge {stats['charge_agreements']}/{stats['checks']}, "
+                             f"same wording {stats['text_agreements']}/{stats['checks']}")
+                lines.append(line + ".")
+        return lines
+
+def group_by_route(keys, route_by_key):
+    """
+    Splits keys into (route, model, keys) groups, easy first, keeping their order.
+    Without routes (router off) yields a single (None, None, keys) group.
+    """
+    if not route_by_key:
+        yield None, None, list(keys)
+        return
+    for route in (ROUTE_EASY, ROUTE_HARD):
+        route_keys = [key for key in keys if route_by_key[key][0] == route]
+        if route_keys:
+            yield route, route_by_key[route_keys[0]][1], route_keys
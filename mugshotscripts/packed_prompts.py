@@ -0,0 +1,155 @@
+"""
+Packed Prompt Helpers
+
+Builds one chat request for several inmates at once and splits the structured JSON
+answer back into per-inmate results. The consolidated processors use this to send
+their long system prompt once per K inmates instead of once per inmate. The single
+response helpers at the end cover one structured answer per request (fused mode).
+"""
+
+import json
+
+PACKED_INSTRUCTIONS = (
+    "\n\nYou will receive several individuals in one message. Each one starts with a line 'ID: <id>' "
+    "followed by that individual's numbered charge list. Apply the steps above to every individual "
+    "independently. Instead of returning plain text, return a JSON object with a 'results' array that "
+    "contains exactly one entry per ID, using the ID exactly as given."
+)
+# Joins a repeated ID to its occurrence number; the processors only pack numeric DCNumbers and InmateIDs
+DUPLICATE_ID_SEPARATOR = "#"
+
+def unique_item_ids(ids):
+    """
+    Pack IDs for `ids`, one per entry in order: the first occurrence of an ID is kept as
+    is and later ones become '<id>#2', '<id>#3', ..., skipping any that would collide with
+    another ID in the pack.
+    """
+    ids = [str(item_id) for item_id in ids]
+    taken = set(ids)
+    unique_ids = []
+    used = set()
+    for item_id in ids:
+        candidate, occurrence = item_id, 1
+        while candidate in used or (candidate != item_id and candidate in taken):
+            occurrence += 1
+            candidate = f"{item_id}{DUPLICATE_ID_SEPARATOR}{occurrence}"
+        used.add(candidate)
+        unique_ids.append(candidate)
+    return unique_ids
+
+def build_packed_user_prompt(items, intro):
+    """
+    Builds the user message for a pack.
+    `items` is a list of (item_id, raw_charge_list) pairs.
+    """
+    sections = [intro]
+    for item_id, raw_charge_list in items:
+        charge_lines = "\n".join(f"{i + 1}. {charge}" for i, charge in enumerate(raw_charge_list))
+        sections.append(f"ID: {item_id}\n{charge_lines}")
+    return "\n\n".join(sections)
+
+def packed_response_format(schema_name, fields):
+    """
+    Returns a strict json_schema response_format for a pack.
+    `fields` maps each result field name to its JSON schema, e.g. {"best_crime": {"type": "string"}}.
+    """
+    item_properties = {"id": {"type": "string"}}
+    item_properties.update(fields)
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": schema_name,
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "results": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": item_properties,
+                            "required": list(item_properties),
+                            "additionalProperties": False,
+                        },
+                    },
+                },
+                "required": ["results"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+def _is_valid_value(value, field_schema):
+    """Checks one result value against its (string) field schema."""
+    if not isinstance(value, str) or not value.strip():
+        return False
+    return "enum" not in field_schema or value.strip() in field_schema["enum"]
+
+def parse_packed_response(response_text, expected_ids, fields):
+    """
+    Validates a packed JSON answer and splits it per item.
+    `fields` is the same field -> JSON schema mapping passed to packed_response_format;
+    values must be non-empty strings and, where the schema has an enum, one of its values.
+    Returns (results, missing_ids): results maps item id -> {field: value} for every
+    well-formed entry; missing_ids lists the expected ids that were absent, repeated,
+    empty or otherwise malformed, in their original order. An id answered more than
+    once counts as missing even if one of its entries is valid, since there is no
+    telling which answer belongs to it.
+    """
+    results = {}
+    repeated_ids = set()
+    try:
+        payload = json.loads(response_text)
+        entries = payload.get("results", []) if isinstance(payload, dict) else []
+    except (TypeError, ValueError):
+        entries = []
+
+    expected = set(expected_ids)
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        item_id = str(entry.get("id", "")).strip()
+        if item_id not in expected or item_id in repeated_ids:
+            continue
+        if item_id in results:
+            repeated_ids.add(item_id)
+            continue
+        values = {field: entry.get(field) for field in fields}
+        # Malformed entries still claim their id, so a later repeat cannot slip in
+        results[item_id] = {field: value.strip() for field, value in values.items()} \
+            if all(_is_valid_value(value, fields[field]) for field, value in values.items()) else None
+
+    results = {item_id: values for item_id, values in results.items()
+               if values is not None and item_id not in repeated_ids}
+
+    missing_ids = [item_id for item_id in expected_ids if item_id not in results]
+    return results, missing_ids
+
+def single_response_format(schema_name, fields):
+    """Returns a strict json_schema response_format for one object with the given fields."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": schema_name,
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": dict(fields),
+                "required": list(fields),
+                "additionalProperties": False,
+            },
+        },
+    }
+
+def parse_single_response(response_text, fields):
+    """Returns {field: value} from a single structured answer, or None if it is malformed."""
+    try:
+        payload = json.loads(response_text)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(payload, dict):
+        return None
+    values = {field: payload.get(field) for field in fields}
+    if not all(_is_valid_value(value, fields[field]) for field, value in values.items()):
+        return None
+    return {field: value.strip() for field, value in values.items()}
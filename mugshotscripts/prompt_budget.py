@@ -0,0 +1,96 @@
+"""
+Prompt Budget
+
+Keeps FDC prompts within a token budget. Career offenders can have dozens of
+sentence-history rows across CurrentPrisonSentenceHistory, Detainers,
+IncarcerationHistory and PriorPrisonHistory; sending all of them makes prompts
+slow, expensive and prone to timeouts. When an inmate's combined crime
+information is over budget, its rows (the ' | '-separated entries scrape_fdc.py
+writes) are ranked by severity signals (offense keywords via the local severity
+rules, then sentence length) and the most relevant ones are kept, in their
+original order, with each distinct offense represented before any repeats.
+What was dropped is reported per field so it can be recorded next to the output.
+"""
+
+import re
+
+from severity_rules import SEVERITY_RANK, classify_severity_locally
+from token_estimate import estimate_tokens
+
+DEFAULT_MAX_PROMPT_TOKENS = 0    # Off: prompts carry all crime information unless a budget is asked for
+SUGGESTED_MAX_PROMPT_TOKENS = 800 # A budget that keeps long FDC histories fast without losing the serious rows
+
+ROW_SEPARATOR = " | "
+_SENTENCE_LENGTH_RE = re.compile(r"(\d+)\s*Y\w*\s*(\d+)\s*M\w*\s*(\d+)\s*D", re.IGNORECASE)
+_LIFE_RE = re.compile(r"\bLIFE\b", re.IGNORECASE)
+_DEATH_RE = re.compile(r"\bDEATH\b", re.IGNORECASE)
+_OFFENSE_RE = re.compile(r"Offense:\s*([^,]+)", re.IGNORECASE)
+
+def sentence_years(row_text):
+    """Longest sentence mentioned in a history row, in years (life and death rank above any term)."""
+    if _DEATH_RE.search(row_text):
+        return 1000.0
+    if _LIFE_RE.search(row_text):
+        return 999.0
+    terms = [int(years) + int(months) / 12 + int(days) / 365 for years, months, days in _SENTENCE_LENGTH_RE.findall(row_text)]
+    return max(terms) if terms else 0.0
+
+def offense_key(row_text):
+    """The row's offense name, normalized, used to tell repeated offenses apart from distinct ones."""
+    match = _OFFENSE_RE.search(row_text)
+    return (match.group(1) if match else row_text).strip().upper()
+
+def row_relevance(row_text):
+    """Sort key for a history row, most relevant highest: (offense severity rank, sentence years)."""
+    severity, _ = classify_severity_locally(row_text)
+    return SEVERITY_RANK.get(severity, 0), sentence_years(row_text)
+
+def fit_crime_info(crime_info, max_tokens):
+    """
+    Trims one inmate's "<Label>: <rows>" crime information list to about max_tokens.
+    Returns (kept list, dropped summary): the summary reads like
+    "Prior Prison History: 7 row(s)" per trimmed field, "" when nothing was dropped.
+    The single most relevant row is always kept, even if it alone is over budget.
+    """
+    if max_tokens <= 0 or sum(estimate_tokens(part) for part in crime_info) <= max_tokens:
+        return crime_info, ""
+
+    fields = [] # (label, rows) in prompt order
+    for part in crime_info:
+        label, _, value = part.partition(": ")
+        fields.append((label, value.split(ROW_SEPARATOR)))
+
+    candidates = [(field_position, row_position, row) for field_position, (_, rows) in enumerate(fields)
+                  for row_position, row in enumerate(rows)]
+    # Most relevant first; ties keep prompt order (current sentence before prior history)
+    candidates.sort(key=lambda candidate: (tuple(-value for value in row_relevance(candidate[2])), candidate[0], candidate[1]))
+    # One row per distinct offense before any repeats, so ten counts of one charge can't crowd out another
+    seen_offenses = set()
+    first_rows, repeat_rows = [], []
+    for candidate in candidates:
+        key = offense_key(candidate[2])
+        (repeat_rows if key in seen_offenses else first_rows).append(candidate)
+        seen_offenses.add(key)
+    candidates = first_rows + repeat_rows
+
+    used_tokens = 0
+    kept = set()
+    labelled_fields = set()
+    for field_position, row_position, row in candidates:
+        row_tokens = estimate_tokens(ROW_SEPARATOR + row)
+        if field_position not in labelled_fields:
+            row_tokens += estimate_tokens(fields[field_position][0] + ": ")
+        if kept and used_tokens + row_tokens > max_tokens:
+            continue
+        kept.add((field_position, row_position))
+        labelled_fields.add(field_position)
+        used_tokens += row_tokens
+
+    kept_info, dropped = [], []
+    for field_position, (label, rows) in enumerate(fields):
+        kept_rows = [row for row_position, row in enumerate(rows) if (field_position, row_position) in kept]
+        if kept_rows:
+            kept_info.append(f"{label}: " + ROW_SEPARATOR.join(kept_rows))
+        if len(kept_rows) < len(rows):
+            dropped.append(f"{label}: {len(rows) - len(kept_rows)} row(s)")
+    return kept_info, "; ".join(dropped)
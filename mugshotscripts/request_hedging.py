@@ -0,0 +1,139 @@
+"""
+Request Hedging
+
+Tail-latency control for the OpenAI calls in the consolidated processors. Every
+primary request's latency goes into a rolling window; with hedging enabled, a request
+that is still running once it passes the window's p95 gets a duplicate (optionally
+sent to a faster model) and whichever answers first wins. Duplicates are capped at a
+fraction of all requests so a slow API cannot double the bill. The slower request is
+left to finish in the background; its answer is discarded but handed to the caller's
+on_abandoned callback so its tokens and latency are still accounted for.
+"""
+
+import collections
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+
+DEFAULT_HEDGE_PERCENTILE = 95
+DEFAULT_HEDGE_MAX_FRACTION = 0.1 # At most one duplicate per 10 requests
+DEFAULT_MIN_SAMPLES = 20         # Latencies needed before the percentile is trusted
+DEFAULT_WINDOW = 500             # Recent latencies the percentile is computed over
+
+class RequestHedger:
+    """
+    Runs requests, records their latency, and (when enabled) hedges slow ones.
+    Thread-safe; one instance is shared by every worker of a run.
+    """
+
+    def __init__(self, enabled=False, hedge_percentile=DEFAULT_HEDGE_PERCENTILE,
+                 max_extra_fraction=DEFAULT_HEDGE_MAX_FRACTION, min_samples=DEFAULT_MIN_SAMPLES,
+                 window=DEFAULT_WINDOW, max_workers=16):
+        self.enabled = enabled
+        self.hedge_percentile = hedge_percentile
+        self.max_extra_fraction = max_extra_fraction
+        self.min_samples = min_samples
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._recent = collections.deque(maxlen=window)
+        self._all_latencies = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers) if enabled else None
+
+    def _record(self, latency, primary=True):
+        """Records the latency a call was answered in; primary latencies also feed the hedge window."""
+        with self._lock:
+            if primary:
+                self._recent.append(latency)
+            self._all_latencies.append(latency)
+
+    def _record_primary(self, latency):
+        with self._lock:
+            self._recent.append(latency)
+
+    def _hedge_delay(self):
+        """Seconds to wait before hedging this request, or None if it should not be hedged."""
+        with self._lock:
+            self.requests += 1
+            if len(self._recent) < self.min_samples or self.hedges >= self.max_extra_fraction * self.requests:
+                return None
+            return float(np.percentile(self._recent, self.hedge_percentile))
+
+    def _claim_hedge(self):
+        """Reserves one duplicate within the spend cap. False if the cap is reached."""
+        with self._lock:
+            if self.hedges >= self.max_extra_fraction * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def call(self, send_primary, send_hedge=None, on_abandoned=None):
+        """
+        Returns send_primary()'s result, or send_hedge()'s (default: send_primary again) if
+        the duplicate answers first. Raises the primary's error only if every request failed.
+        When a hedge was sent, the request that did not win is reported once it finishes as
+        on_abandoned(is_hedge, result, latency), with result None if it failed.
+        The hedge window only ever sees primary latencies, so hedge wins cannot pull the
+        threshold down.
+        """
+        start_time = time.time()
+        delay = self._hedge_delay() if self.enabled else None
+        if delay is None:
+            result = send_primary()
+            self._record(time.time() - start_time)
+            return result
+
+        primary = self._executor.submit(send_primary)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._claim_hedge():
+            result = primary.result()
+            self._record(time.time() - start_time)
+            return result
+
+        hedge_start = time.time()
+        hedge = self._executor.submit(send_hedge or send_primary)
+
+        def record_primary(future):
+            # The primary's own latency goes into the window whichever request wins
+            if future.exception() is None:
+                self._record_primary(time.time() - start_time)
+        primary.add_done_callback(record_primary)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self._record(time.time() - start_time, primary=False)
+                    if future is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    if on_abandoned is not None:
+                        loser, loser_start = (primary, start_time) if future is hedge else (hedge, hedge_start)
+                        loser.add_done_callback(lambda loser_future: on_abandoned(
+                            loser_future is hedge,
+                            loser_future.result() if loser_future.exception() is None else None,
+                            time.time() - loser_start))
+                    return future.result()
+        return primary.result() # Both failed: raise the primary's error
+
+    def latency_percentiles(self, percentiles=(50, 99)):
+        """Latency percentiles in seconds over every request of the run, or None if there were none."""
+        with self._lock:
+            if not self._all_latencies:
+                return None
+            return [float(value) for value in np.percentile(self._all_latencies, percentiles)]
+
+    def summary(self):
+        """One log line with p50/p99 latency and, when enabled, hedging counts."""
+        percentiles = self.latency_percentiles()
+        if percentiles is None:
+            return "API latency: no requests made."
+        line = (f"API latency: p50 {percentiles[0]:.2f}s, p99 {percentiles[1]:.2f}s over {len(self._all_latencies)} request(s)"
+                f" (hedging {'on' if self.enabled else 'off'})")
+        if self.enabled:
+            line += (f"; {self.hedges} duplicate request(s) sent ({self.hedges / max(self.requests, 1) * 100:.1f}% extra), "
+                     f"{self.hedge_wins} answered first")
+        return line + "."
@@ -0,0 +1,167 @@
+"""
+Retry Policy
+
+One retry policy for the OpenAI calls in the processing scripts. Errors are
+classified by exception type and HTTP status code (not by matching their text),
+server Retry-After hints are honored with a little jitter, and a circuit breaker
+shared by all workers opens after repeated transient failures: while it is open,
+callers wait for the cool-down instead of spending their retries, then a single
+probe request decides whether traffic resumes.
+"""
+
+import email.utils
+import random
+import threading
+import time
+
+import openai
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BASE_DELAY = 1.0      # Seconds; doubled per attempt before jitter
+DEFAULT_MAX_DELAY = 60.0      # Upper bound for any single wait, including Retry-After hints
+DEFAULT_FAILURE_THRESHOLD = 5 # Consecutive transient failures that open the breaker
+DEFAULT_RESET_TIMEOUT = 30.0  # Seconds the breaker stays open before a probe request
+
+# Request timeout, conflict, rate limit and server-side errors are worth another try
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+def is_retryable(error):
+    """True for transient errors: timeouts, connection failures, rate limits and 5xx responses."""
+    if isinstance(error, openai.APIConnectionError): # Includes APITimeoutError
+        return True
+    if isinstance(error, openai.RateLimitError):
+        # An exhausted quota is a 429 too, but waiting will not fix it
+        return getattr(error, "code", None) != "insufficient_quota"
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+def retry_after_seconds(error):
+    """The server's retry-after-ms / Retry-After hint in seconds, or None if there is none."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms") is not None:
+            return max(float(headers["retry-after-ms"]) / 1000.0, 0.0)
+        retry_after = headers.get("retry-after")
+        if retry_after is None:
+            return None
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            retry_at = email.utils.parsedate_to_datetime(retry_after) # HTTP-date form
+            return max(retry_at.timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt, error=None, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY):
+    """
+    Seconds to wait before retry number attempt + 1. Uses the server hint when present
+    (plus up to 20% jitter so workers do not retry in lockstep), else full-jitter
+    exponential backoff.
+    """
+    hint = retry_after_seconds(error) if error is not None else None
+    if hint is not None:
+        return min(hint * random.uniform(1.0, 1.2), max_delay)
+    return random.uniform(0, min(base_delay * (2 ** attempt), max_delay))
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker. closed: requests flow. open: callers of before_call()
+    block until reset_timeout has passed. half-open: one probe request is let through;
+    its success closes the breaker, its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT, log=None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.log = log
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self._opened_at = 0.0
+        self._probe_started_at = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def is_open(self):
+        return self.state != self.CLOSED
+
+    def before_call(self):
+        """Blocks while the breaker is open. Returns once the caller may send a request."""
+        with self._condition:
+            while True:
+                if self.state == self.CLOSED:
+                    return
+                if self.state == self.OPEN:
+                    remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                    if remaining <= 0:
+                        self.state = self.HALF_OPEN # This caller is the probe
+                        self._probe_started_at = time.monotonic()
+                        return
+                    self._condition.wait(remaining)
+                else:
+                    # Another caller's probe is in flight; take over if it never reports back
+                    remaining = self._probe_started_at + self.reset_timeout - time.monotonic()
+                    if remaining <= 0:
+                        self._probe_started_at = time.monotonic()
+                        return
+                    self._condition.wait(remaining)
+
+    def record_success(self):
+        with self._condition:
+            if self.state != self.CLOSED and self.log:
+                self.log("Circuit breaker closed: API requests are succeeding again.")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._condition.notify_all()
+
+    def record_failure(self):
+        with self._condition:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self.times_opened += 1
+                if self.log:
+                    self.log(f"Circuit breaker open after {self.consecutive_failures} consecutive transient failures. "
+                             f"Pausing API requests for {self.reset_timeout:.0f} seconds.")
+            self._condition.notify_all()
+
+def call_with_retries(request, breaker=None, max_attempts=DEFAULT_MAX_ATTEMPTS, log=None, on_retry=None):
+    """
+    Calls request() until it succeeds, retrying transient errors up to max_attempts in total.
+    Waits on the breaker before every attempt and reports each outcome to it.
+    on_retry(error) is called before each retry (e.g. to count retries).
+    Returns request()'s result; re-raises the last error when giving up or when the error
+    is not retryable.
+    """
+    for attempt in range(max_attempts):
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = request()
+        except Exception as e:
+            retryable = is_retryable(e)
+            if breaker is not None and retryable:
+                breaker.record_failure()
+            elif breaker is not None and isinstance(e, openai.APIStatusError):
+                breaker.record_success() # A bad request or auth error still means the API answered
+            if not retryable or attempt == max_attempts - 1:
+                raise
+            delay = backoff_delay(attempt, e)
+            if on_retry:
+                on_retry(e)
+            if log:
+                log(f"Transient API error ({type(e).__name__}, attempt {attempt + 1}/{max_attempts}). Retrying in {delay:.2f} seconds...")
+            time.sleep(delay)
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
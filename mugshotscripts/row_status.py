@@ -0,0 +1,59 @@
+"""
+Row Status
+
+Per-row outcome labels written next to AI-generated columns (Best_Crime_Status,
+Crime_Severity_Status), so --repair can resubmit only the rows that did not get a
+clean answer instead of re-running a whole file.
+
+    ok         the primary request answered normally
+    fallback   the primary request failed and a simpler fallback produced the value
+    error      no usable answer; the value is an error placeholder
+    defaulted  the answer was unusable and a default value was filled in
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+STATUS_OK = "ok"
+STATUS_FALLBACK = "fallback"
+STATUS_ERROR = "error"
+STATUS_DEFAULTED = "defaulted"
+
+DEFAULT_REPAIR_WORKERS = 4
+
+# Placeholders the processors write when no Best_Crime could be produced
+_BEST_CRIME_ERROR_VALUES = {"Could not determine best crime", "No charges to analyze"}
+
+def infer_best_crime_status(best_crime):
+    """Status for a Best_Crime value in a file written before status columns existed."""
+    if best_crime is None or pd.isna(best_crime):
+        return STATUS_ERROR
+    text = str(best_crime).strip()
+    if not text or text in _BEST_CRIME_ERROR_VALUES or text.startswith("Error:"):
+        return STATUS_ERROR
+    return STATUS_OK
+
+def infer_severity_status(severity):
+    """Status for a Crime_Severity value in a file written before status columns existed."""
+    if severity is None or pd.isna(severity) or str(severity).strip() in ("", "Error"):
+        return STATUS_ERROR
+    return STATUS_OK
+
+def rows_needing_repair(df, status_column, value_column, infer_status):
+    """
+    Boolean mask of rows whose status is not ok. Rows without a recorded status
+    (older files, or rows never processed) get one inferred from value_column.
+    """
+    if status_column in df.columns:
+        statuses = df[status_column].where(df[status_column].notna(), df[value_column].map(infer_status))
+    else:
+        statuses = df[value_column].map(infer_status)
+    return statuses != STATUS_OK
+
+def run_in_parallel(function, items, workers=DEFAULT_REPAIR_WORKERS):
+    """Calls function(item) for every item on a thread pool. Returns a list of results in item order."""
+    if workers <= 1:
+        return [function(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(function, items))
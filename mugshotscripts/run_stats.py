@@ -0,0 +1,127 @@
+"""
+Run Stats
+
+Per-call accounting for the OpenAI scripts: prompt and completion tokens, latency,
+retries and estimated cost, broken down by model and by stage (best-crime, fallback
+reword, severity, ...). Cache hits are reported next to the calls they saved. At the
+end of a run report_lines() gives rows per second, tokens per row, p50/p95/p99
+latency and cost per 1k rows, so optimizations can be compared run against run.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+STAGE_BEST_CRIME = "best-crime"
+STAGE_BEST_CRIME_SEVERITY = "best-crime+severity"
+STAGE_FALLBACK = "fallback reword"
+STAGE_SEVERITY = "severity"
+STAGE_ABANDONED_HEDGE = "abandoned hedge" # The slower of a hedged pair: paid for, answer discarded
+
+# USD per 1M (prompt, completion) tokens. Dated snapshots ("gpt-4.1-mini-2025-04-14")
+# match by prefix; models not listed here are reported without a cost.
+MODEL_PRICES = {
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+def base_model(model):
+    """The MODEL_PRICES name a (possibly dated) model name belongs to, or the name itself if unknown."""
+    matches = [name for name in MODEL_PRICES if model == name or model.startswith(name + "-")]
+    return max(matches, key=len) if matches else model
+
+def model_price(model):
+    """(prompt, completion) USD per 1M tokens for a model name, or None if unknown."""
+    return MODEL_PRICES.get(base_model(model))
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """Estimated USD cost of a call, or None if the model's price is unknown."""
+    price = model_price(model)
+    if price is None:
+        return None
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+def _new_bucket():
+    return {"calls": 0, "failures": 0, "retries": 0, "prompt_tokens": 0, "completion_tokens": 0,
+            "cost": 0.0, "unpriced_calls": 0, "latencies": []}
+
+class RunStats:
+    """Thread-safe accumulator of per-call stats for one run."""
+
+    def __init__(self):
+        self.start_time = time.time()
+        self.by_model = {}
+        self.by_stage = {}
+        self._lock = threading.Lock()
+
+    def record_call(self, model, stage, latency, prompt_tokens=0, completion_tokens=0, retries=0, ok=True):
+        """Records one logical API call (retries included) and its outcome."""
+        model = base_model(model)
+        cost = estimate_cost(model, prompt_tokens, completion_tokens) if ok else 0.0
+        with self._lock:
+            for buckets, key in ((self.by_model, model), (self.by_stage, stage)):
+                bucket = buckets.setdefault(key, _new_bucket())
+                bucket["calls"] += 1
+                bucket["retries"] += retries
+                bucket["latencies"].append(latency)
+                if not ok:
+                    bucket["failures"] += 1
+                    continue
+                bucket["prompt_tokens"] += prompt_tokens
+                bucket["completion_tokens"] += completion_tokens
+                if cost is None:
+                    bucket["unpriced_calls"] += 1
+                else:
+                    bucket["cost"] += cost
+
+    def totals(self):
+        """Sums over every model: a bucket dict like the per-model ones."""
+        with self._lock:
+            total = _new_bucket()
+            for bucket in self.by_model.values():
+                for key, value in bucket.items():
+                    total[key] = total[key] + value
+            return total
+
+    @staticmethod
+    def _describe(bucket, rows):
+        line = f"{bucket['calls']} call(s)"
+        if bucket["failures"]:
+            line += f" ({bucket['failures']} failed)"
+        line += f", {bucket['retries']} retries, {bucket['prompt_tokens']} + {bucket['completion_tokens']} tokens"
+        if rows:
+            line += f" ({bucket['prompt_tokens'] / rows:.1f} + {bucket['completion_tokens'] / rows:.1f} per row)"
+        if bucket["latencies"]:
+            p50, p95, p99 = np.percentile(bucket["latencies"], [50, 95, 99])
+            line += f", latency p50 {p50:.2f}s / p95 {p95:.2f}s / p99 {p99:.2f}s"
+        if bucket["calls"] > bucket["unpriced_calls"] + bucket["failures"]:
+            line += f", ~${bucket['cost']:.4f}"
+            if rows:
+                line += f" (${bucket['cost'] / rows * 1000:.4f} per 1k rows)"
+        if bucket["unpriced_calls"]:
+            line += f", {bucket['unpriced_calls']} call(s) on models without a known price"
+        return line
+
+    def report_lines(self, rows, cache_hits=0, cache_lookups=0):
+        """
+        Human-readable end-of-run report for `rows` processed rows. cache_hits out of
+        cache_lookups are the rows answered without an API call (dedup, canonical cache).
+        """
+        elapsed = time.time() - self.start_time
+        total = self.totals()
+        lines = [f"Run report: {rows} row(s) in {elapsed:.1f}s ({rows / elapsed if elapsed > 0 else 0:.2f} rows/s)."]
+        if cache_lookups:
+            lines.append(f"  Cache: {cache_hits} of {cache_lookups} lookup(s) answered without an API call "
+                         f"({cache_hits / cache_lookups * 100:.1f}%).")
+        lines.append("  Total: " + self._describe(total, rows) + ".")
+        with self._lock:
+            for title, buckets in (("model", self.by_model), ("stage", self.by_stage)):
+                for key, bucket in sorted(buckets.items()):
+                    lines.append(f"  By {title} '{key}': " + self._describe(bucket, rows) + ".")
+        return lines
@@ -4,6 +4,7 @@ import csv
 import time
 import os
 import argparse
+import json
 import re
 
 BASE_URL = "https://pubapps.fdc.myflorida.com/offenderSearch/detail.aspx?Page=Detail&TypeSearch=AI&DCNumber="
@@ -18,8 +19,11 @@ def sanitize_filename(name):
     """Remove or replace characters that are invalid in filenames."""
     return re.sub(r'[\\/*?_<>|]', "_", name) # removed : and " from invalid chars as they might be in data
 
-def extract_table_data(soup, table_header_text):
-    """Extracts data from a table given the text of its preceding h3 header."""
+def extract_table_rows(soup, table_header_text):
+    """
+    Extracts the rows of a table given the text of its preceding h3 header, as a list of
+    {column header: cell text} dicts (empty if the table is not found).
+    """
     is_prior_history = "Prior Prison History:" in table_header_text
     if is_prior_history:
         print(f"--- Debugging extract_table_data for: {table_header_text} ---")
@@ -38,7 +42,7 @@ def extract_table_data(soup, table_header_text):
     if not header_tag:
         if is_prior_history:
             print("Debug (Prior History): header_tag not found, returning empty.")
-        return ""
+        return []
 
     table = header_tag.find_next_sibling("table")
     if is_prior_history:
@@ -61,7 +65,7 @@ def extract_table_data(soup, table_header_text):
     if not table:
         if is_prior_history:
             print("Debug (Prior History): table not found, returning empty.")
-        return ""
+        return []
 
     rows_data = []
     headers = [th.get_text(strip=True) for th in table.find_all("th")]
@@ -76,9 +80,17 @@ def extract_table_data(soup, table_header_text):
             header_name = headers[i] if i < len(headers) else f"Column_{i+1}"
             row_dict[header_name] = col.get_text(strip=True)
         
-        rows_data.append(", ".join([f"{k}: {v}" for k, v in row_dict.items()]))
+        rows_data.append(row_dict)
         
-    return " | ".join(rows_data)
+    return rows_data
+
+def flatten_table_rows(rows):
+    """Flattens table rows into the 'Header: value, ...' strings joined by ' | ' used in the CSV."""
+    return " | ".join([", ".join([f"{k}: {v}" for k, v in row_dict.items()]) for row_dict in rows])
+
+def extract_table_data(soup, table_header_text):
+    """Extracts data from a table given the text of its preceding h3 header, flattened to one string."""
+    return flatten_table_rows(extract_table_rows(soup, table_header_text))
 
 
 def extract_inmate_data(soup, dc_number):
@@ -179,7 +191,11 @@ def extract_inmate_data(soup, dc_number):
         # Join collected parts, filter out empty strings that might result from stripping
         data["Aliases"] = ", ".join(filter(None, [ac.strip() for ac in aliases_content]))
 
-    data["CurrentPrisonSentenceHistory"] = extract_table_data(soup, "Current Prison Sentence History:")
+    # The sentence history is also kept structured (offense date, sentence date, county, case no.,
+    # prison sentence length per row) so sentence lengths can be read without free-text parsing
+    sentence_rows = extract_table_rows(soup, "Current Prison Sentence History:")
+    data["CurrentPrisonSentenceHistory"] = flatten_table_rows(sentence_rows)
+    data["CurrentPrisonSentenceRows"] = json.dumps(sentence_rows) if sentence_rows else ""
     data["Detainers"] = extract_table_data(soup, "Detainers:")
     # data["IncarcerationHistory"] = extract_table_data(soup, "Incarceration History:") # Removed as per request
     # data["PriorPrisonHistory"] = extract_table_data(soup, "Prior Prison History:") # Removed as per request
@@ -233,9 +249,18 @@ def main():
         "DCNumber", "Name", "MugshotURL", "Race", "Sex", "BirthDate", 
         "InitialReceiptDate", "CurrentFacility", "CurrentCustody", 
         "CurrentReleaseDate", "Aliases", "CurrentPrisonSentenceHistory", 
-        "Detainers" # Removed "IncarcerationHistory" and "PriorPrisonHistory"
+        "Detainers", # Removed "IncarcerationHistory" and "PriorPrisonHistory"
+        "CurrentPrisonSentenceRows" # JSON list of the sentence history rows, one {column: value} object per row
     ]
 
+    if not is_empty:
+        # Keep appending in the existing file's column layout (files from before CurrentPrisonSentenceRows)
+        with open(csv_filepath, mode="r", newline="", encoding="utf-8") as existing_file:
+            existing_fieldnames = next(csv.reader(existing_file), fieldnames)
+        if existing_fieldnames != fieldnames:
+            print(f"Existing CSV has columns {existing_fieldnames}; appending in that layout.")
+            fieldnames = existing_fieldnames
+
     with open(csv_filepath, mode="a", newline="", encoding="utf-8") as file:
         writer = csv.DictWriter(file, fieldnames=fieldnames, extrasaction='ignore')
 
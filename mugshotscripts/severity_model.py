@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Local Severity Model
+
+Trains a small CPU-only text classifier on the (Best_Crime, Crime_Severity) labels
+that crime_severity_classifier.py has already produced, and saves it as a compact
+.npz artifact. The model is a nearest-centroid classifier over hashed TF-IDF
+features (word unigrams/bigrams and character trigrams). Features are kept sparse
+(one entry per feature present in a crime), and training runs on distinct
+(Best_Crime, Crime_Severity) pairs weighted by how often they occur, so memory
+follows the number of distinct crimes rather than rows x feature buckets.
+
+Usage:
+    python3 severity_model.py --input ../data/sorted_mugshots_with_severity.csv --output severity_model.npz
+"""
+
+import argparse
+import datetime
+import re
+import sys
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# --- Globals ---
+DEFAULT_N_FEATURES = 2 ** 14
+DEFAULT_TEMPERATURE = 20.0  # Softmax sharpness applied to cosine similarities
+DEFAULT_HOLDOUT_FRACTION = 0.1
+SEVERITY_LABELS = ["High", "Medium", "Low"]
+
+_TOKEN_RE = re.compile(r"[a-z0-9$]+")
+
+# --- Helper Functions ---
+def log_message(message):
+    """Logs a message with a timestamp."""
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
+    print(f"[{timestamp}] {message}")
+
+def extract_features(text):
+    """Returns the feature strings for one crime description."""
+    words = _TOKEN_RE.findall(str(text).lower())
+    features = [f"w:{word}" for word in words]
+    features.extend(f"b:{first}_{second}" for first, second in zip(words, words[1:]))
+    for word in words:
+        padded = f"#{word}#"
+        features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return features
+
+def hash_features(texts, n_features):
+    """
+    Hashed term frequencies of texts as a sparse (rows, cols, counts) triple: one entry
+    per distinct (text, feature bucket) pair, sorted by row (a CSR matrix without the
+    row pointer). Memory grows with the features present, not with n_features.
+    """
+    keys = []
+    for row, text in enumerate(texts):
+        base = row * n_features
+        keys.extend(base + zlib.crc32(feature.encode("utf-8")) % n_features for feature in extract_features(text))
+    keys, counts = np.unique(np.asarray(keys, dtype=np.int64), return_counts=True)
+    return keys // n_features, keys % n_features, counts.astype(np.float64)
+
+def _tfidf_values(rows, cols, counts, idf, n_rows):
+    """TF-IDF values of sparse hashed features, scaled so every row has unit length."""
+    values = counts * idf[cols]
+    norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=n_rows))
+    return values / norms[rows]
+
+def _l2_normalize(matrix):
+    """Scales every row to unit length (zero rows stay zero)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+# --- Model ---
+class SeverityModel:
+    """Nearest-centroid severity classifier over hashed TF-IDF features."""
+
+    def __init__(self, centroids, idf, labels, temperature=DEFAULT_TEMPERATURE):
+        self.centroids = centroids.astype(np.float32)
+        self.idf = idf.astype(np.float32)
+        self.labels = list(labels)
+        self.temperature = float(temperature)
+
+    @property
+    def n_features(self):
+        return self.idf.shape[0]
+
+    @classmethod
+    def train(cls, texts, labels, n_features=DEFAULT_N_FEATURES, temperature=DEFAULT_TEMPERATURE, weights=None):
+        """
+        Fits IDF weights and one unit-length centroid per severity label. weights are
+        per-text occurrence counts (default 1), so distinct (text, label) pairs with
+        their counts train the same model as the repeated rows.
+        """
+        weights = np.ones(len(texts)) if weights is None else np.asarray(weights, dtype=np.float64)
+        rows, cols, counts = hash_features(texts, n_features)
+        row_weights = weights[rows]
+        document_frequency = np.bincount(cols, weights=row_weights, minlength=n_features)
+        idf = np.log((1.0 + weights.sum()) / (1.0 + document_frequency)) + 1.0
+        values = _tfidf_values(rows, cols, counts, idf, len(texts))
+
+        labels = np.asarray(labels)
+        model_labels = [label for label in SEVERITY_LABELS if (labels == label).any()]
+        entry_labels = labels[rows]
+        centroids = np.vstack([
+            np.bincount(cols[entry_labels == label], weights=(values * row_weights)[entry_labels == label],
+                        minlength=n_features) / weights[labels == label].sum()
+            for label in model_labels
+        ])
+        return cls(_l2_normalize(centroids), idf, model_labels, temperature)
+
+    def predict(self, texts, batch_size=4096):
+        """
+        Classifies texts in vectorized batches.
+        Returns (labels, confidences) as arrays; confidence is the softmax probability
+        of the chosen label over the cosine similarities to each centroid.
+        """
+        predicted, confidences = [], []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            rows, cols, counts = hash_features(batch, self.n_features)
+            values = _tfidf_values(rows, cols, counts, self.idf, len(batch))
+            # Sparse rows times the centroid matrix: one weighted bincount per label
+            scores = np.column_stack([np.bincount(rows, weights=values * centroid[cols], minlength=len(batch))
+                                      for centroid in self.centroids]) * self.temperature
+            scores -= scores.max(axis=1, keepdims=True)
+            probabilities = np.exp(scores)
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+            best = probabilities.argmax(axis=1)
+            predicted.append(np.asarray(self.labels, dtype=object)[best])
+            confidences.append(probabilities[np.arange(len(batch)), best])
+        if not predicted:
+            return np.array([], dtype=object), np.array([], dtype=np.float32)
+        return np.concatenate(predicted), np.concatenate(confidences)
+
+    def save(self, path):
+        """Writes the model as a compressed .npz artifact."""
+        np.savez_compressed(path, centroids=self.centroids.astype(np.float16), idf=self.idf.astype(np.float16),
+                            labels=np.asarray(self.labels), temperature=np.float32(self.temperature))
+
+    @classmethod
+    def load(cls, path):
+        """Loads a model saved with save()."""
+        with np.load(path, allow_pickle=False) as artifact:
+            return cls(artifact["centroids"], artifact["idf"], artifact["labels"].tolist(), artifact["temperature"])
+
+# --- Training Command ---
+def load_training_pairs(input_files):
+    """Reads (Best_Crime, Crime_Severity) pairs with a valid label from one or more CSV files."""
+    frames = []
+    for input_file in input_files:
+        df = pd.read_csv(input_file, usecols=lambda column: column in ("Best_Crime", "Crime_Severity"))
+        if "Best_Crime" not in df.columns or "Crime_Severity" not in df.columns:
+            log_message(f"Warning: {input_file} has no Best_Crime/Crime_Severity columns. Skipping.")
+            continue
+        frames.append(df)
+        log_message(f"Loaded {len(df)} rows from {input_file}.")
+    if not frames:
+        return pd.DataFrame(columns=["Best_Crime", "Crime_Severity"])
+    pairs = pd.concat(frames, ignore_index=True).dropna()
+    pairs["Best_Crime"] = pairs["Best_Crime"].astype(str).str.strip()
+    pairs = pairs[(pairs["Best_Crime"] != "") & pairs["Crime_Severity"].isin(SEVERITY_LABELS)]
+    # Most rows repeat a crime: train on distinct pairs, weighted by how often they occur
+    return pairs.groupby(["Best_Crime", "Crime_Severity"], sort=False).size().reset_index(name="Count")
+
+def main():
+    """Trains a severity model from previously labeled CSV files."""
+    parser = argparse.ArgumentParser(
+        description='Train a local CPU-only severity model from existing Best_Crime/Crime_Severity labels.'
+    )
+    parser.add_argument('--input', '-i', type=str, nargs='+',
+                       default=['../data/sorted_mugshots_with_severity.csv'],
+                       help='Labeled CSV file(s). Default: ../data/sorted_mugshots_with_severity.csv')
+    parser.add_argument('--output', '-o', type=str, default='severity_model.npz',
+                       help='Path of the model artifact. Default: severity_model.npz')
+    parser.add_argument('--n-features', type=int, default=DEFAULT_N_FEATURES,
+                       help=f'Number of hashed feature buckets. Default: {DEFAULT_N_FEATURES}')
+    parser.add_argument('--holdout', type=float, default=DEFAULT_HOLDOUT_FRACTION,
+                       help=f'Fraction of distinct crimes held out to report accuracy. Default: {DEFAULT_HOLDOUT_FRACTION}')
+    args = parser.parse_args()
+
+    pairs = load_training_pairs(args.input)
+    if pairs.empty:
+        log_message("ERROR: No labeled rows found in the input file(s).")
+        sys.exit(1)
+    log_message(f"Training on {int(pairs['Count'].sum())} labeled rows ({pairs['Best_Crime'].nunique()} distinct crimes).")
+    log_message(f"Label distribution: {pairs.groupby('Crime_Severity')['Count'].sum().to_dict()}")
+
+    # Hold out whole crimes (not rows) so repeated strings cannot leak into the evaluation
+    bucket = pairs["Best_Crime"].map(lambda crime: zlib.crc32(crime.encode("utf-8")) % 1000)
+    is_holdout = bucket < int(args.holdout * 1000)
+    if args.holdout > 0 and is_holdout.any() and (~is_holdout).any():
+        training = pairs[~is_holdout]
+        evaluation_model = SeverityModel.train(training["Best_Crime"].tolist(), training["Crime_Severity"].to_numpy(),
+                                               args.n_features, weights=training["Count"].to_numpy())
+        holdout = pairs[is_holdout]
+        predicted, confidences = evaluation_model.predict(holdout["Best_Crime"].tolist())
+        correct = predicted == holdout["Crime_Severity"].to_numpy()
+        row_counts = holdout["Count"].to_numpy()
+        log_message(f"Holdout accuracy: {np.average(correct, weights=row_counts) * 100:.1f}% on {int(row_counts.sum())} rows.")
+        for threshold in (0.6, 0.7, 0.8, 0.9):
+            confident = confidences >= threshold
+            if confident.any():
+                log_message(f"  confidence >= {threshold}: {row_counts[confident].sum() / row_counts.sum() * 100:.1f}% of rows, "
+                            f"{np.average(correct[confident], weights=row_counts[confident]) * 100:.1f}% accurate")
+
+    model = SeverityModel.train(pairs["Best_Crime"].tolist(), pairs["Crime_Severity"].to_numpy(), args.n_features,
+                                weights=pairs["Count"].to_numpy())
+    model.save(args.output)
+    log_message(f"Saved severity model to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Local Severity Rules
+
+Encodes the High/Medium/Low guidelines from the crime severity system prompt as a
+keyword automaton (Aho-Corasick), so that clear-cut Best_Crime strings can be
+classified offline. Each match carries a strength; the classifier only trusts a
+local label whose confidence clears its threshold and sends the rest to OpenAI.
+"""
+
+import re
+from collections import deque
+
+# --- Severity Guidelines ---
+# Shared by the API prompts (crime_severity_classifier.py and the fused processor mode)
+SEVERITY_GUIDELINES = (
+    "HIGH: Violent crimes, serious felonies, crimes involving weapons, sexual offenses, major drug trafficking, "
+    "armed robbery, murder, kidnapping, aggravated assault, domestic violence with weapons, major fraud (>$50k), "
+    "crimes against children, human trafficking, arson with injury risk.\n\n"
+    "MEDIUM: Property crimes, drug possession (significant amounts), burglary, theft, fraud (<$50k), "
+    "non-violent felonies, DUI, stalking, simple assault, probation violations for serious crimes, "
+    "identity theft, cybercrime.\n\n"
+    "LOW: Minor offenses, misdemeanors, traffic violations, small drug possession, disorderly conduct, "
+    "trespassing, minor theft, failure to appear, probation violations for minor crimes, public intoxication."
+)
+SEVERITY_LEVELS = ["High", "Medium", "Low"]
+
+# --- Rule Table ---
+# (keyword, severity, strength). Keywords are matched on whole words after
+# normalization, so "gun" does not fire inside "begun" and "20g" matches
+# "20 grams". Stronger, more specific phrases win over generic ones.
+SEVERITY_KEYWORD_RULES = [
+    # High: violent crimes, weapons, sexual offenses, trafficking, crimes against children
+    ("murder", "High", 1.0),
+    ("homicide", "High", 1.0),
+    ("manslaughter", "High", 1.0),
+    ("kidnapping", "High", 1.0),
+    ("kidnap", "High", 1.0),
+    ("carjacking", "High", 1.0),
+    ("home invasion", "High", 1.0),
+    ("human trafficking", "High", 1.0),
+    ("sex trafficking", "High", 1.0),
+    ("sexual battery", "High", 1.0),
+    ("sexual assault", "High", 1.0),
+    ("rape", "High", 1.0),
+    ("molestation", "High", 1.0),
+    ("lewd", "High", 0.95),
+    ("child pornography", "High", 1.0),
+    ("child abuse", "High", 0.95),
+    ("armed robbery", "High", 1.0),
+    ("robbery", "High", 0.9),
+    ("arson", "High", 0.9),
+    ("aggravated battery", "High", 0.95),
+    ("aggravated assault", "High", 0.95),
+    ("strangulation", "High", 0.95),
+    ("shooting", "High", 0.95),
+    ("shot at", "High", 0.95),
+    ("deadly weapon", "High", 0.9),
+    ("firearm", "High", 0.85),
+    ("gun", "High", 0.8),
+    ("weapon", "High", 0.8),
+    ("drug trafficking", "High", 0.95),
+    ("cocaine trafficking", "High", 0.95),
+    ("trafficking", "High", 0.85),
+    ("solicitation of a minor", "High", 0.9),
+    # Medium: property crimes, significant drug possession, fraud, DUI, stalking
+    ("burglary", "Medium", 0.9),
+    ("vehicle burglary", "Medium", 0.95),
+    ("grand theft", "Medium", 0.9),
+    ("grand theft auto", "Medium", 0.95),
+    ("theft", "Medium", 0.6),
+    ("identity theft", "Medium", 0.95),
+    ("stolen property", "Medium", 0.85),
+    ("forgery", "Medium", 0.85),
+    ("counterfeit", "Medium", 0.8),
+    ("fraud", "Medium", 0.65),
+    ("embezzlement", "Medium", 0.7),
+    ("money laundering", "Medium", 0.7),
+    ("dui", "Medium", 0.9),
+    ("driving under the influence", "Medium", 0.9),
+    ("stalking", "Medium", 0.9),
+    ("cybercrime", "Medium", 0.9),
+    ("hacking", "Medium", 0.8),
+    ("simple assault", "Medium", 0.9),
+    ("assault", "Medium", 0.55),
+    ("battery", "Medium", 0.55),
+    ("illegal drug possession", "Medium", 0.85),
+    ("drug possession", "Medium", 0.7),
+    ("cannabis over", "Medium", 0.9),
+    ("marijuana over", "Medium", 0.9),
+    ("over 20g", "Medium", 0.85),
+    ("fleeing", "Medium", 0.85),
+    ("eluding", "Medium", 0.85),
+    ("police chase", "Medium", 0.85),
+    ("critical infrastructure", "Medium", 0.95),
+    ("felony", "Medium", 0.5),
+    # Low: misdemeanors, traffic, small possession, procedural violations
+    ("failure to appear", "Low", 0.95),
+    ("trespass", "Low", 0.9),
+    ("trespassing", "Low", 0.9),
+    ("disorderly conduct", "Low", 0.95),
+    ("disorderly intoxication", "Low", 0.95),
+    ("public intoxication", "Low", 0.95),
+    ("loitering", "Low", 0.95),
+    ("prowling", "Low", 0.9),
+    ("petit theft", "Low", 0.9),
+    ("petty theft", "Low", 0.9),
+    ("shoplifting", "Low", 0.85),
+    ("retail theft", "Low", 0.7),
+    ("suspended license", "Low", 0.9),
+    ("driving with suspended license", "Low", 0.95),
+    ("driving without a license", "Low", 0.9),
+    ("no valid license", "Low", 0.9),
+    ("traffic violation", "Low", 0.9),
+    ("marijuana possession", "Low", 0.9),
+    ("cannabis possession", "Low", 0.85),
+    ("under 20g", "Low", 0.9),
+    ("paraphernalia", "Low", 0.9),
+    ("open container", "Low", 0.95),
+    ("littering", "Low", 0.95),
+    ("resisting without violence", "Low", 0.9),
+    ("resisting arrest", "Low", 0.7),
+    ("misdemeanor", "Low", 0.7),
+    ("probation violation", "Low", 0.5),
+]
+
+SEVERITY_RANK = {"Low": 1, "Medium": 2, "High": 3}
+
+# Probation/parole violations are graded by the crime they were for, capped at
+# Medium ("probation violations for serious crimes" are Medium, for minor crimes
+# Low). Whether the underlying crime counts as serious is a judgment call,
+# so these labels stay below the default rule threshold and go to the model.
+PROBATION_VIOLATION_CAP = "Medium"
+PROBATION_VIOLATION_CONFIDENCE = 0.75
+_PROBATION_VIOLATION_RE = re.compile(
+    r" (?:(?:probation|parole|community control) violation|violation of (?:probation|parole|community control)|vop) "
+)
+
+_GRAMS_RE = re.compile(r"(\d+)\s*(?:g|gr|grams?)\b")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+# --- Aho-Corasick Automaton ---
+class KeywordAutomaton:
+    """Multi-keyword matcher that finds every keyword occurrence in one pass over the text."""
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for keyword_id, keyword in enumerate(keywords):
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(keyword_id)
+
+        # Breadth-first pass to build failure links and inherit their outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state].extend(self._output[self._fail[next_state]])
+
+    def find_all(self, text):
+        """Returns the ids of all keywords found in `text` (with repeats, in match order)."""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = []
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.extend(output[state])
+        return found
+
+def normalize_crime_text(text):
+    """Lowercases and strips punctuation, padding with spaces so keywords match whole words."""
+    text = _GRAMS_RE.sub(r"\1g", str(text).lower())
+    return " " + _NON_ALNUM_RE.sub(" ", text).strip() + " "
+
+# Keywords are padded the same way as the text, which turns substring hits into whole-word hits
+_AUTOMATON = KeywordAutomaton([normalize_crime_text(keyword) for keyword, _, _ in SEVERITY_KEYWORD_RULES])
+
+# --- Classification Functions ---
+def _classify_single_crime(text):
+    """Scores one crime phrase. Returns (severity, confidence), or (None, 0.0) if no rule fires."""
+    normalized = normalize_crime_text(text)
+    if _PROBATION_VIOLATION_RE.search(normalized):
+        return _classify_probation_violation(normalized)
+    return _score_keywords(normalized)
+
+def _classify_probation_violation(normalized):
+    """Grades a probation/parole violation by its underlying crime, capped at PROBATION_VIOLATION_CAP."""
+    underlying = _PROBATION_VIOLATION_RE.sub(" ", normalized)
+    severity, confidence = _score_keywords(underlying)
+    if severity is None:
+        return "Low", 0.5
+    if SEVERITY_RANK[severity] > SEVERITY_RANK[PROBATION_VIOLATION_CAP]:
+        severity = PROBATION_VIOLATION_CAP
+    return severity, min(confidence, PROBATION_VIOLATION_CONFIDENCE)
+
+def _score_keywords(normalized):
+    """Keyword scoring of normalized text. Returns (severity, confidence), or (None, 0.0)."""
+    best_by_severity = {}
+    for keyword_id in _AUTOMATON.find_all(normalized):
+        _, severity, strength = SEVERITY_KEYWORD_RULES[keyword_id]
+        if strength > best_by_severity.get(severity, 0.0):
+            best_by_severity[severity] = strength
+    if not best_by_severity:
+        return None, 0.0
+
+    # Strongest match wins; on equal strength the more severe level wins
+    ranked = sorted(best_by_severity.items(), key=lambda item: (item[1], SEVERITY_RANK[item[0]]), reverse=True)
+    severity, strength = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+    # Conflicting evidence from another level erodes confidence
+    confidence = strength - 0.5 * max(0.0, runner_up - 0.5)
+    return severity, round(confidence, 3)
+
+def classify_severity_locally(best_crime):
+    """
+    Classifies a Best_Crime string with the local rules.
+    Returns (severity, confidence); severity is None when no rule applies. For
+    two-crime strings ('A | B') the more severe crime decides the level, mirroring
+    how the API prompt treats the description as a whole.
+    """
+    if best_crime is None:
+        return None, 0.0
+    parts = [part for part in str(best_crime).split("|") if part.strip()]
+    if not parts:
+        return None, 0.0
+
+    results = [_classify_single_crime(part) for part in parts]
+    resolved = [result for result in results if result[0] is not None]
+    if not resolved:
+        return None, 0.0
+
+    severity, confidence = max(resolved, key=lambda result: (SEVERITY_RANK[result[0]], result[1]))
+    if severity != "High":
+        # An unclassified or shakier part could still outrank this level
+        if len(resolved) < len(results):
+            confidence = min(confidence, 0.5)
+        confidence = min([confidence] + [result[1] for result in resolved])
+    return severity, confidence
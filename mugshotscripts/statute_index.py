@@ -0,0 +1,229 @@
+"""
+Florida Statute Index
+
+Maps Florida statute numbers (with optional subsections) to the offense degree and a
+canonical plain English label, so charges can be ranked and given a severity
+without an API call. The table is parsed once into a dict keyed by the normalized
+statute; lookups fall back from the most specific subsection to the bare section,
+which keeps every query to a handful of dict probes.
+"""
+
+import re
+from collections import namedtuple
+
+StatuteEntry = namedtuple("StatuteEntry", ["statute", "degree", "label", "severity"])
+
+# Higher rank = more serious offense degree
+DEGREE_RANK = {"CAP": 7, "LIFE": 6, "F1": 5, "F2": 4, "F3": 3, "M1": 2, "M2": 1}
+DEGREE_NAMES = {
+    "CAP": "Capital Felony",
+    "LIFE": "First Degree Felony (Life)",
+    "F1": "First Degree Felony",
+    "F2": "Second Degree Felony",
+    "F3": "Third Degree Felony",
+    "M1": "First Degree Misdemeanor",
+    "M2": "Second Degree Misdemeanor",
+}
+SEVERITY_RANK = {"Low": 1, "Medium": 2, "High": 3}
+# Game severity implied by the degree alone; table rows override it where the
+# severity guidelines disagree (e.g. aggravated battery is F2 but a violent crime).
+DEGREE_SEVERITY = {"CAP": "High", "LIFE": "High", "F1": "High", "F2": "Medium", "F3": "Medium", "M1": "Low", "M2": "Low"}
+
+# statute|degree|label|severity override (blank = derive from degree)
+_STATUTE_TABLE = """
+782.04|CAP|Murder|
+782.04(1)|CAP|First Degree Murder|
+782.04(2)|LIFE|Second Degree Murder|
+782.04(3)|LIFE|Second Degree Felony Murder|
+782.04(4)|F2|Third Degree Murder|High
+782.051|LIFE|Attempted Felony Murder|
+782.07|F2|Manslaughter|High
+782.071|F2|Vehicular Homicide|High
+316.193|M2|Driving Under the Influence|Medium
+316.193(3)(C)2|F3|DUI with Serious Bodily Injury|High
+316.193(3)(C)3|F2|DUI Manslaughter|High
+316.1935|F3|Fleeing or Eluding Police|
+316.027|F3|Leaving the Scene of a Crash with Injury|
+316.061|M2|Leaving the Scene of a Crash|
+316.192|M2|Reckless Driving|
+322.03|M2|Driving without a Valid License|
+322.34|M2|Driving with a Suspended License|
+327.35|M2|Boating Under the Influence|Medium
+784.011|M2|Assault|Medium
+784.021|F3|Aggravated Assault|High
+784.03|M1|Battery|Medium
+784.03(2)|F3|Felony Battery (Prior Conviction)|
+784.041|F3|Felony Battery|
+784.041(2)|F3|Domestic Battery by Strangulation|High
+784.045|F2|Aggravated Battery|High
+784.048(2)|M1|Stalking|Medium
+784.048(3)|F3|Aggravated Stalking|
+784.048(4)|F3|Aggravated Stalking after an Injunction|
+784.07(2)(B)|F3|Battery on a Law Enforcement Officer|High
+784.07(2)(C)|F2|Aggravated Assault on a Law Enforcement Officer|High
+784.07(2)(D)|F1|Aggravated Battery on a Law Enforcement Officer|
+784.08(2)(A)|F1|Aggravated Battery on a Person 65 or Older|
+784.08(2)(C)|F3|Battery on a Person 65 or Older|
+787.01|LIFE|Kidnapping|
+787.02|F3|False Imprisonment|High
+787.06|F1|Human Trafficking|
+790.01(1)|M1|Carrying a Concealed Weapon|Medium
+790.01(2)|F3|Carrying a Concealed Firearm|High
+790.07|F3|Using a Weapon While Committing a Felony|High
+790.10|M1|Improper Exhibition of a Weapon|Medium
+790.15|M1|Discharging a Firearm in Public|High
+790.19|F2|Shooting into a Dwelling or Vehicle|High
+790.23|F2|Possession of a Firearm by a Convicted Felon|High
+794.011|LIFE|Sexual Battery|
+794.011(2)(A)|CAP|Sexual Battery on a Child Under 12|
+794.011(5)|F2|Sexual Battery|High
+794.05|F2|Unlawful Sexual Activity with a Minor|High
+796.07|M2|Prostitution|
+800.04|F2|Lewd or Lascivious Offense on a Minor|High
+806.01|F1|Arson|
+806.13|M2|Criminal Mischief|
+806.13(1)(B)3|F3|Felony Criminal Mischief|
+810.02|F2|Burglary|
+810.02(2)|LIFE|Burglary with Assault or Battery|
+810.02(3)|F2|Burglary of a Dwelling|
+810.02(4)|F3|Burglary of a Structure or Conveyance|
+810.08|M2|Trespass in a Structure or Conveyance|
+810.09|M1|Trespass on Property|
+812.014|F3|Theft|
+812.014(2)(A)|F1|Grand Theft Over $100,000|
+812.014(2)(B)|F2|Grand Theft $20,000 to $100,000|
+812.014(2)(C)|F3|Grand Theft|
+812.014(2)(C)6|F3|Grand Theft of a Motor Vehicle|
+812.014(3)(A)|M2|Petit Theft|
+812.014(3)(B)|M1|Petit Theft|
+812.014(3)(C)|F3|Petit Theft (Third Conviction)|Low
+812.015|M2|Retail Theft|
+812.019|F2|Dealing in Stolen Property|
+812.13|F2|Robbery|High
+812.13(2)(A)|LIFE|Armed Robbery with a Firearm or Deadly Weapon|
+812.13(2)(B)|F1|Armed Robbery|
+812.13(2)(C)|F2|Robbery|High
+812.131|F3|Robbery by Sudden Snatching|High
+812.133|LIFE|Carjacking|
+812.135|LIFE|Home Invasion Robbery|
+817.034|F3|Organized Fraud|
+817.568|F3|Identity Theft|
+817.61|F3|Fraudulent Use of a Credit Card|
+825.102|F3|Abuse of an Elderly Person|High
+827.03|F3|Child Abuse|High
+827.03(2)(A)|F1|Aggravated Child Abuse|
+831.01|F3|Forgery|
+831.02|F3|Uttering a Forged Instrument|
+836.05|F2|Extortion|
+836.10|F2|Written Threats to Kill|High
+837.02|F3|Perjury|
+838.015|F2|Bribery|
+843.01|F3|Resisting an Officer with Violence|
+843.02|M1|Resisting an Officer without Violence|
+843.15|M1|Failure to Appear|
+843.15(1)(A)|F3|Failure to Appear on a Felony|Low
+843.15(1)(B)|M1|Failure to Appear|
+847.0135|F3|Computer Solicitation of a Minor|High
+847.0137|F3|Transmission of Child Pornography|High
+856.011|M2|Disorderly Intoxication|
+856.021|M2|Loitering or Prowling|
+877.03|M2|Disorderly Conduct|
+893.13(1)(A)|F2|Sale of a Controlled Substance|
+893.13(6)(A)|F3|Possession of a Controlled Substance|
+893.13(6)(B)|M1|Possession of Cannabis Under 20 Grams|
+893.135|F1|Drug Trafficking|
+893.147|M1|Possession of Drug Paraphernalia|
+896.101|F3|Money Laundering|
+901.36|M1|Giving a False Name to Police|
+914.22|F3|Tampering with a Witness|
+918.13|F3|Tampering with Evidence|
+943.0435|F3|Failure to Register as a Sex Offender|
+944.40|F2|Escape|
+948.06||Violation of Probation|
+951.22|F3|Introducing Contraband into a Jail|
+"""
+
+_SECTION_RE = re.compile(r"(\d{1,3}[A-Z]?\.\d{1,5})")
+_SUBSECTION_RE = re.compile(r"[0-9]+|[A-Z]+")
+_MAX_SUBSECTION_DEPTH = 5
+
+_index_global = None
+
+def normalize_statute(statute):
+    """
+    Normalizes a statute reference to a tuple of (section, subsection, ...).
+    '893.13(6)(a)', '893.13.6A' and '893.13 - 6 a' all become ('893.13', '6', 'A').
+    Returns None if no statute section is present.
+    """
+    if statute is None:
+        return None
+    text = str(statute).upper()
+    match = _SECTION_RE.search(text)
+    if not match:
+        return None
+    subsections = _SUBSECTION_RE.findall(text[match.end():])[:_MAX_SUBSECTION_DEPTH]
+    return (match.group(1),) + tuple(subsections)
+
+def _load_index():
+    """Parses the statute table into a dict keyed by normalized statute tuples (once)."""
+    global _index_global
+    if _index_global is None:
+        index = {}
+        for line in _STATUTE_TABLE.strip().splitlines():
+            statute, degree, label, severity = line.split("|")
+            key = normalize_statute(statute)
+            index[key] = StatuteEntry(statute, degree or None, label, severity or DEGREE_SEVERITY.get(degree))
+        _index_global = index
+    return _index_global
+
+def lookup_statute(statute):
+    """
+    Returns the StatuteEntry for a statute reference, or None if it is unknown.
+    The most specific subsection in the table wins; '812.014(2)(c)6' resolves to
+    the motor vehicle entry, '812.014(2)(c)1' to generic grand theft.
+    """
+    key = normalize_statute(statute)
+    if key is None:
+        return None
+    index = _load_index()
+    for length in range(len(key), 0, -1):
+        entry = index.get(key[:length])
+        if entry is not None:
+            return entry
+    return None
+
+def degree_rank(statute):
+    """Sort key for charges: the rank of the statute's offense degree, 0 if unknown."""
+    entry = lookup_statute(statute)
+    return DEGREE_RANK.get(entry.degree, 0) if entry else 0
+
+def seriousness_rank(entry):
+    """
+    Comparable rank of a StatuteEntry: severity first, then offense degree.
+    Returns None for entries without a severity (they never win a comparison).
+    """
+    if entry is None or entry.severity is None:
+        return None
+    return (SEVERITY_RANK[entry.severity], DEGREE_RANK.get(entry.degree, 0))
+
+def most_serious_statute(statutes):
+    """
+    Picks the most serious known statute from an iterable of references, by severity
+    and then by offense degree. Returns its StatuteEntry, or None if none of them is
+    in the index with a severity.
+    """
+    best_entry = None
+    best_rank = None
+    for statute in statutes:
+        entry = lookup_statute(statute)
+        rank = seriousness_rank(entry)
+        if rank is not None and (best_rank is None or rank > best_rank):
+            best_entry, best_rank = entry, rank
+    return best_entry
+
+def severity_for_statute_field(statute_field):
+    """Severity of the most serious statute in a ' | '-separated Statute field, or None."""
+    if statute_field is None:
+        return None
+    entry = most_serious_statute(part.strip() for part in str(statute_field).split("|") if part.strip())
+    return entry.severity if entry else None
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Synthetic Data Generator
+
+Writes realistic synthetic inputs for benchmarking the pipeline without scraping:
+
+    mugshots_data.csv      sheriff rows in scrape.py's format (charges joined by ' | ')
+    fdc_inmate_data.csv    FDC rows in scrape_fdc.py's format (sentence tables as
+                           'Header: value, ...' rows joined by ' | ')
+    pages/sheriff/*.html   sheriff inmate detail pages that scrape.py can parse
+    pages/fdc/*.html       FDC inmate detail pages that scrape_fdc.py can parse
+    dataset.json           what was generated (row counts, seed)
+
+Charge counts follow a long-tailed distribution like real bookings (most inmates
+have one or two charges, a few have dozens), and charges, statutes, sentence
+lengths and names are drawn from weighted vocabularies with abbreviations and
+case-number noise, so deduplication, canonicalization and sentence parsing see
+realistic work. Output is fully determined by --seed.
+
+Usage:
+    python3 synthetic_data.py --rows 100000 --out-dir bench_data/rows_100000
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import os
+import random
+from html import escape
+
+# --- Globals ---
+DEFAULT_ROWS = 10000
+DEFAULT_PAGES = 1000 # Page parsing is benchmarked per page; more pages only cost disk space
+DEFAULT_SEED = 0
+
+SHERIFF_CSV_NAME = "mugshots_data.csv"
+FDC_CSV_NAME = "fdc_inmate_data.csv"
+DATASET_INFO_NAME = "dataset.json"
+SHERIFF_PAGES_DIR = os.path.join("pages", "sheriff")
+FDC_PAGES_DIR = os.path.join("pages", "fdc")
+
+SHERIFF_FIELDNAMES = [
+    "InmateID", "Name", "MugshotURL", "Race", "Sex", "DOB", "Height", "Weight", "Hair", "Eyes", "Location",
+    "Statute", "Charge Comments", "Case Number", "Description", "Bond Amount", "Bond Type"
+]
+FDC_FIELDNAMES = [
+    "DCNumber", "Name", "MugshotURL", "Race", "Sex", "BirthDate",
+    "InitialReceiptDate", "CurrentFacility", "CurrentCustody",
+    "CurrentReleaseDate", "Aliases", "CurrentPrisonSentenceHistory", "Detainers",
+    "CurrentPrisonSentenceRows"
+]
+SENTENCE_TABLE_HEADERS = ["Offense Date", "Offense", "Sentence Date", "County", "Case No.", "Prison Sentence Length"]
+DETAINER_TABLE_HEADERS = ["Date Lodged", "Jurisdiction", "Charge", "Case No.", "Status"]
+
+# (statute, booking description, relative frequency); descriptions use booking-style abbreviations
+CHARGE_CATALOG = [
+    ("316.193", "DUI", 60), ("316.193", "DRIVING UNDER THE INFLUENCE", 25),
+    ("322.34", "DWLSR KNOWINGLY", 45), ("322.03", "NO VALID DRIVERS LICENSE", 20),
+    ("784.03", "BATTERY", 55), ("784.03", "BATTERY DOMESTIC VIOLENCE", 35),
+    ("784.041", "FELONY BATTERY", 10), ("784.045", "AGG BATTERY W/DEADLY WEAPON", 12),
+    ("784.021", "AGG ASSAULT W/DEADLY WEAPON W/O INTENT TO KILL", 14),
+    ("784.07(2)(B)", "BATTERY ON LEO", 8), ("843.02", "RESIST OFFICER W/O VIOLENCE", 50),
+    ("843.01", "RESIST OFFICER WITH VIOLENCE", 9), ("901.31", "FAILURE TO APPEAR", 30),
+    ("948.06", "VIOLATION OF PROBATION", 55), ("948.06", "PROBATION VIOLATION OR COMMUNITY CONTROL/FELONY", 25),
+    ("893.13(6)(A)", "POSS OF CONTROLLED SUBSTANCE W/O PRESCRIPTION", 40),
+    ("893.13(6)(B)", "POSS OF MARIJUANA UNDER 20 GRAMS", 35), ("893.13(6)(A)", "POSSESS CANNABIS OVR 20 GRMS", 15),
+    ("893.147", "POSSESSION OF DRUG PARAPHERNALIA", 30), ("893.135", "TRAFFICKING IN COCAINE 28G-200G", 4),
+    ("893.135", "TRAFFICKING IN FENTANYL 4G-14G", 3), ("812.014", "PETIT THEFT", 35),
+    ("812.014", "GRAND THEFT 3RD DEGREE", 25), ("812.014", "GRAND THEFT - MOTOR VEHICLE", 10),
+    ("812.13", "ROBBERY", 6), ("812.13(2)(A)", "ROBBERY WITH A FIREARM", 4),
+    ("810.02", "BURGLARY OF CONVEYANCE", 12), ("810.02(3)", "BURGLARY OF DWELLING", 10),
+    ("810.09", "TRESPASS ON PROPERTY OTHER THAN STRUCTURE", 15), ("806.13", "CRIMINAL MISCHIEF $200-$1000", 12),
+    ("790.01(2)", "CARRYING CONCEALED FIREARM", 8), ("790.23", "POSS FIREARM BY CONVICTED FELON", 9),
+    ("782.04(1)", "MURDER FIRST DEGREE", 1), ("782.04(2)", "(COC) TO ATTEMPTED MURDER LEO/FIREARM", 1),
+    ("787.01", "KIDNAPPING", 1), ("794.011", "SEX BATT FAML/CUST VICT12-17", 1),
+    ("784.048(3)", "AGG STALKING AFTER INJUCTION", 2), ("316.1935", "FLEEING OR ELUDING LEO", 6),
+    ("796.07", "PROSTITUTION", 4), ("856.011", "DISORDERLY INTOXICATION", 12),
+    ("877.03", "DISORDERLY CONDUCT", 10), ("741.31", "VIOLATION OF INJUNCTION FOR PROTECTION", 8),
+    ("896.101", "MONEY LAUNDERING OVER $100,000", 1), ("831.02", "UTTERING FORGED INSTRUMENT", 3),
+]
+CHARGE_COMMENTS = ["", "", "", "", "WARRANT", "CAPIAS", "DOMESTIC", "ON VIEW", "PROBATION HOLD", "COUNT 2", "FTA WARRANT"]
+BOND_TYPES = ["CASH OR SURETY", "NO BOND", "RELEASED ON RECOGNIZANCE", "SURETY ONLY", "CASH ONLY"]
+COUNTIES = ["BROWARD", "MIAMI-DADE", "PALM BEACH", "HILLSBOROUGH", "ORANGE", "DUVAL", "PINELLAS", "LEE", "POLK", "BREVARD"]
+FACILITIES = ["SANTA ROSA C.I.", "FLORIDA STATE PRISON", "UNION C.I.", "DADE C.I.", "LOWELL C.I.", "WAKULLA C.I.", "OKEECHOBEE C.I."]
+CUSTODY_LEVELS = ["CLOSE", "MEDIUM", "MINIMUM", "COMMUNITY"]
+FIRST_NAMES = ["JAMES", "MARIA", "MICHAEL", "ASHLEY", "ROBERT", "JESSICA", "DAVID", "TIFFANY", "CARLOS", "BRITTANY",
+               "DEANDRE", "AMANDA", "JOSE", "CRYSTAL", "KEVIN", "LATOYA", "ANTHONY", "HEATHER", "MARCUS", "STEPHANIE"]
+LAST_NAMES = ["SMITH", "JOHNSON", "WILLIAMS", "RODRIGUEZ", "BROWN", "GARCIA", "JONES", "MARTINEZ", "DAVIS", "HERNANDEZ",
+              "MILLER", "LOPEZ", "WILSON", "GONZALEZ", "MOORE", "PEREZ", "TAYLOR", "SANCHEZ", "THOMAS", "JACKSON"]
+RACES = [("B", 40), ("W", 45), ("H", 12), ("A", 2), ("U", 1)]
+
+# --- Helper Functions ---
+def log_message(message):
+    """Logs a message with a timestamp."""
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
+    print(f"[{timestamp}] {message}")
+
+def charge_count(rng, cap=40):
+    """Long-tailed charge count: ~45% one charge, ~25% two, then a geometric tail, plus rare sprees."""
+    if rng.random() < 0.01:
+        return rng.randint(min(10, cap), cap)
+    count = 1
+    while count < cap and rng.random() < 0.55:
+        count += 1
+    return count
+
+def random_date(rng, start_year, end_year):
+    return datetime.date(rng.randint(start_year, end_year), rng.randint(1, 12), rng.randint(1, 28)).strftime("%m/%d/%Y")
+
+def random_name(rng):
+    middle = f" {rng.choice(FIRST_NAMES)}" if rng.random() < 0.4 else ""
+    return f"{rng.choice(LAST_NAMES)}, {rng.choice(FIRST_NAMES)}{middle}"
+
+def case_number(rng, year=None):
+    year = year or rng.randint(2005, 2024)
+    return f"{year % 100:02d}{rng.choice(['CF', 'MM', 'CT', 'TR'])}{rng.randint(1000, 99999):06d}A{rng.choice(['10', '88', '20'])}"
+
+def sentence_length(rng):
+    """Prison Sentence Length text: mostly FDC's 'NY NM ND' form, some free text, rarely life or death."""
+    roll = rng.random()
+    if roll < 0.01:
+        return rng.choice(["LIFE", "LIFE WITHOUT PAROLE", "NATURAL LIFE"])
+    if roll < 0.012:
+        return "DEATH SENTENCE"
+    if roll < 0.22:
+        return rng.choice([f"{rng.randint(1, 30)} YEARS", f"{rng.randint(6, 60)} MONTHS", f"{rng.randint(30, 364)} DAYS",
+                           f"{rng.randint(2, 15)}-YEAR MINIMUM MANDATORY"])
+    years = min(int(rng.expovariate(1 / 4.0)), 60)
+    return f"{years}Y {rng.randint(0, 11)}M {rng.choice([0, 0, 0, rng.randint(1, 29)])}D"
+
+class ChargePicker:
+    """Weighted draws from CHARGE_CATALOG."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.charges = [(statute, description) for statute, description, _ in CHARGE_CATALOG]
+        self.weights = [weight for _, _, weight in CHARGE_CATALOG]
+
+    def pick(self, count):
+        return self.rng.choices(self.charges, weights=self.weights, k=count)
+
+# --- Record Generation ---
+def sheriff_record(rng, picker, inmate_id):
+    """One inmate as scrape.extract_inmate_data returns it (Charges as a list of dicts)."""
+    charges = []
+    for statute, description in picker.pick(charge_count(rng)):
+        charges.append({
+            "Statute": statute,
+            "Charge Comments": rng.choice(CHARGE_COMMENTS),
+            "Case Number": case_number(rng),
+            "Description": description,
+            "Bond Amount": "$0.00" if rng.random() < 0.3 else f"${rng.choice([500, 1000, 2500, 5000, 10000, 50000]):,}.00",
+            "Bond Type": rng.choice(BOND_TYPES),
+        })
+    return {
+        "InmateID": inmate_id,
+        "Name": random_name(rng),
+        "MugshotURL": f"https://apps.sheriff.org/thumbs/{inmate_id}.jpg",
+        "Race": rng.choices([race for race, _ in RACES], weights=[weight for _, weight in RACES])[0],
+        "Sex": rng.choice(["M", "M", "M", "F"]),
+        "DOB": random_date(rng, 1950, 2006),
+        "Height": f"{rng.randint(4, 6)}' {rng.randint(0, 11):02d}\"",
+        "Weight": str(rng.randint(100, 300)),
+        "Hair": rng.choice(["BLK", "BRO", "BLN", "GRY", "RED", "BAL"]),
+        "Eyes": rng.choice(["BRO", "BLU", "GRN", "HAZ"]),
+        "Location": rng.choice(["MAIN JAIL", "NORTH BROWARD BUREAU", "JOSEPH V. CONTE FACILITY", "PAUL RETTIG FACILITY"]),
+        "Charges": charges,
+    }
+
+def sheriff_csv_row(record):
+    """The flattened CSV row scrape.py writes for a record."""
+    row = {key: record[key] for key in SHERIFF_FIELDNAMES if key in record}
+    for field in ["Statute", "Charge Comments", "Case Number", "Description", "Bond Amount", "Bond Type"]:
+        row[field] = " | ".join(charge.get(field, "") for charge in record["Charges"])
+    return row
+
+def fdc_record(rng, picker, dc_number):
+    """One FDC inmate with sentence and detainer table rows as lists of dicts."""
+    sentences = []
+    for _, description in picker.pick(charge_count(rng, cap=15)):
+        year = rng.randint(1995, 2024)
+        sentences.append({
+            "Offense Date": random_date(rng, year - 2, year - 1),
+            "Offense": description,
+            "Sentence Date": random_date(rng, year, min(year + 1, 2024)),
+            "County": rng.choice(COUNTIES),
+            "Case No.": case_number(rng, year),
+            "Prison Sentence Length": sentence_length(rng),
+        })
+    detainers = []
+    if rng.random() < 0.15:
+        for _, description in picker.pick(rng.randint(1, 3)):
+            detainers.append({
+                "Date Lodged": random_date(rng, 2010, 2024),
+                "Jurisdiction": rng.choice(COUNTIES + ["U.S. IMMIGRATION", "GEORGIA DOC"]),
+                "Charge": description,
+                "Case No.": case_number(rng),
+                "Status": rng.choice(["ACTIVE", "ACTIVE", "PENDING", f"{rng.randint(1, 10)} YEARS PROBATION TO FOLLOW"]),
+            })
+    aliases = [random_name(rng) for _ in range(charge_count(rng, cap=6) - 1)]
+    return {
+        "DCNumber": dc_number,
+        "Name": random_name(rng),
+        "MugshotURL": f"https://pubapps.fdc.myflorida.com/offenderSearch/GetImage.aspx?DCNumber={dc_number}",
+        "Race": rng.choices(["BLACK", "WHITE", "HISPANIC", "OTHER"], weights=[45, 42, 11, 2])[0],
+        "Sex": rng.choice(["MALE", "MALE", "MALE", "FEMALE"]),
+        "BirthDate": random_date(rng, 1945, 2004),
+        "InitialReceiptDate": random_date(rng, 1995, 2024),
+        "CurrentFacility": rng.choice(FACILITIES),
+        "CurrentCustody": rng.choice(CUSTODY_LEVELS),
+        "CurrentReleaseDate": random_date(rng, 2025, 2070),
+        "Aliases": ", ".join(aliases),
+        "Sentences": sentences,
+        "DetainerRows": detainers,
+    }
+
+def table_text(rows):
+    """A sentence table as scrape_fdc.flatten_table_rows flattens it."""
+    return " | ".join(", ".join(f"{key}: {value}" for key, value in row.items()) for row in rows)
+
+def fdc_csv_row(record):
+    row = {key: record[key] for key in FDC_FIELDNAMES if key in record}
+    row["CurrentPrisonSentenceHistory"] = table_text(record["Sentences"])
+    row["Detainers"] = table_text(record["DetainerRows"])
+    row["CurrentPrisonSentenceRows"] = json.dumps(record["Sentences"]) if record["Sentences"] else ""
+    return row
+
+# --- HTML Rendering ---
+def _label_span(label, value):
+    return f'<div class="col-md-3"><label>{escape(label)}</label><span class="form-control"><span>{escape(value)}</span></span></div>'
+
+def sheriff_page_html(record):
+    """A sheriff inmate detail page with the structure scrape.extract_inmate_data expects."""
+    parts = [
+        "<!DOCTYPE html><html><head><title>Inmate Detail</title></head><body><div class=\"container\">",
+        '<div class="panel panel-default"><div class="panel-heading">Inmate Information</div><div class="panel-body">',
+        f"<h3>{escape(record['Name'])}</h3>",
+        f'<img src="/thumbs/{record["InmateID"]}.jpg" alt="mugshot"/>',
+        '<div class="row">',
+    ]
+    for label in ["Race", "Sex", "DOB", "Height", "Weight", "Hair", "Eyes", "Location"]:
+        parts.append(_label_span(label, record[label]))
+    parts.append("</div></div></div>")
+    for charge in record["Charges"]:
+        parts.append('<div class="panel panel-warning"><div class="panel-heading">Charge</div><div class="panel-body">')
+        items = list(charge.items())
+        for start in range(0, len(items), 3):
+            parts.append('<div class="row">')
+            for key, value in items[start:start + 3]:
+                parts.append(f'<div class="col-md-4"><label>{escape(key)}</label><span class="inputWarning">{escape(value)}</span></div>')
+            parts.append("</div>")
+        parts.append("</div></div>")
+    parts.append("</div></body></html>")
+    return "\n".join(parts)
+
+def _html_table(headers, rows):
+    head = "".join(f"<th>{escape(header)}</th>" for header in headers)
+    body = "".join("<tr>" + "".join(f"<td>{escape(str(row.get(header, '')))}</td>" for header in headers) + "</tr>" for row in rows)
+    return f'<table class="dcCSStable"><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>'
+
+def fdc_page_html(record):
+    """An FDC inmate detail page with the structure scrape_fdc.extract_inmate_data expects."""
+    details = [("DC Number:", record["DCNumber"]), ("Name:", record["Name"]), ("Race:", record["Race"]),
+               ("Sex:", record["Sex"]), ("Birth Date:", record["BirthDate"]),
+               ("Initial Receipt Date:", record["InitialReceiptDate"]), ("Current Facility:", record["CurrentFacility"]),
+               ("Current Custody:", record["CurrentCustody"]), ("Current Release Date:", record["CurrentReleaseDate"])]
+    detail_rows = "".join(
+        f"<tr><th>{escape(label)}</th><td>" + (f'<a href="/facility">{escape(value)}</a>' if label == "Current Facility:" else escape(value)) + "</td></tr>"
+        for label, value in details)
+    parts = [
+        "<!DOCTYPE html><html><head><title>Inmate Population Information Detail</title></head><body><div id=\"main\">",
+        "<h2>Inmate Population Information Detail</h2>",
+        f'<table class="offenderDetails"><tr><td>Offender Picture<br/><img src="/offenderSearch/GetImage.aspx?DCNumber={record["DCNumber"]}"/></td>'
+        f"<td><table>{detail_rows}</table></td></tr></table>",
+        '<div id="aliases"><h3>Aliases:</h3>' + escape(record["Aliases"]) + "</div>",
+        '<div id="sentences"><h3>Current Prison Sentence History:</h3>' + _html_table(SENTENCE_TABLE_HEADERS, record["Sentences"]) + "</div>",
+    ]
+    if record["DetainerRows"]:
+        parts.append('<div id="detainers"><h3>Detainers:</h3>' + _html_table(DETAINER_TABLE_HEADERS, record["DetainerRows"]) + "</div>")
+    parts.append("</div></body></html>")
+    return "\n".join(parts)
+
+# --- Dataset Generation ---
+def generate_dataset(out_dir, rows=DEFAULT_ROWS, pages=DEFAULT_PAGES, seed=DEFAULT_SEED):
+    """
+    Writes both CSVs with `rows` rows and the first `pages` records of each as HTML
+    pages under out_dir. Returns the dataset.json contents.
+    """
+    os.makedirs(os.path.join(out_dir, SHERIFF_PAGES_DIR), exist_ok=True)
+    os.makedirs(os.path.join(out_dir, FDC_PAGES_DIR), exist_ok=True)
+    pages = min(pages, rows)
+
+    for kind, fieldnames, csv_name, pages_dir, make_record, make_row, make_page, first_id in (
+            ("sheriff", SHERIFF_FIELDNAMES, SHERIFF_CSV_NAME, SHERIFF_PAGES_DIR, sheriff_record, sheriff_csv_row, sheriff_page_html, 542500000),
+            ("FDC", FDC_FIELDNAMES, FDC_CSV_NAME, FDC_PAGES_DIR, fdc_record, fdc_csv_row, fdc_page_html, 100000)):
+        rng = random.Random(f"{seed}-{kind}") # Independent streams: the sheriff data does not shift when FDC code changes
+        picker = ChargePicker(rng)
+        csv_path = os.path.join(out_dir, csv_name)
+        log_message(f"Writing {rows} {kind} rows to {csv_path} ({pages} HTML pages)...")
+        with open(csv_path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            for position in range(rows):
+                record_id = first_id + position if kind == "sheriff" else f"{rng.choice('ABCDEFGHJKLMNPQRSTUVWXY')}{first_id + position}"
+                record = make_record(rng, picker, record_id)
+                writer.writerow(make_row(record))
+                if position < pages:
+                    with open(os.path.join(out_dir, pages_dir, f"{record_id}.html"), "w", encoding="utf-8") as page_file:
+                        page_file.write(make_page(record))
+                if (position + 1) % 100000 == 0:
+                    log_message(f"  {position + 1} {kind} rows written...")
+
+    info = {"rows": rows, "pages": pages, "seed": seed, "created": datetime.datetime.now().isoformat(timespec="seconds")}
+    with open(os.path.join(out_dir, DATASET_INFO_NAME), "w", encoding="utf-8") as file:
+        json.dump(info, file, indent=2)
+    log_message(f"Synthetic dataset written to {out_dir}.")
+    return info
+
+def default_dataset_dir(rows):
+    """bench_data/rows_<rows> next to this script."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_data", f"rows_{rows}")
+
+def load_dataset_info(out_dir):
+    """dataset.json of a generated dataset, or None if out_dir does not hold one."""
+    path = os.path.join(out_dir, DATASET_INFO_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+# --- Main Execution ---
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic sheriff and FDC CSVs and HTML pages for benchmarks.')
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help=f'Rows per CSV (e.g. 10000, 100000, 1000000). Default: {DEFAULT_ROWS}')
+    parser.add_argument('--pages', type=int, default=DEFAULT_PAGES, help=f'HTML pages to write per source (at most --rows). Default: {DEFAULT_PAGES}')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help=f'Random seed; the same seed always gives the same files. Default: {DEFAULT_SEED}')
+    parser.add_argument('--out-dir', type=str, help='Output directory. Default: bench_data/rows_<rows> next to this script')
+    args = parser.parse_args()
+
+    out_dir = args.out_dir or default_dataset_dir(args.rows)
+    generate_dataset(out_dir, args.rows, args.pages, args.seed)
+
+if __name__ == "__main__":
+    main()
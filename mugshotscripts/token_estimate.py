@@ -0,0 +1,11 @@
+"""
+Token Estimate
+
+A rough token count for English prompt text, shared by prompt trimming, model
+routing and the mock OpenAI server. Cheap enough to call on every row; accurate
+enough for budgets and relative comparisons, not for billing.
+"""
+
+def estimate_tokens(text):
+    """Rough token count for English prompt text (about four characters per token)."""
+    return (len(text) + 3) // 4
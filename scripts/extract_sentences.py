@@ -2,111 +2,222 @@
 """
 Extract Prison Sentence Terms from Mugshots CSV Data
 This script parses the sorted_mugshots.csv file and extracts sentence length information
-from various fields, particularly CurrentPrisonSentenceHistory.
+from various fields, particularly CurrentPrisonSentenceHistory. FDC sentence lengths
+('5Y 0M 0D', 'LIFE', ...) are read from the structured sentence history rows when the
+CSV has them; other fields are scanned for free-text terms. Results are streamed to
+JSONL (or Parquet) and CSV as rows are processed, with the summary computed online.
+With --incremental only rows that changed since the last run are extracted. The
+sentence_arrays.npz written alongside is what sentence_analytics.py reports on.
 """
 
+import argparse
 import csv
+import hashlib
+import io
+import math
+import os
 import re
 import json
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-from collections import Counter
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from collections import Counter, deque
 
-def extract_sentence_terms(text: str) -> List[str]:
+import numpy as np
+
+# Row fields searched for sentence terms, in this order
+SENTENCE_SOURCE_FIELDS = [
+    'CurrentPrisonSentenceHistory',
+    'PriorPrisonHistory',
+    'IncarcerationHistory',
+    'Detainers',
+    'Description',
+]
+
+# Structured FDC sentence history: scrape_fdc.py keeps the table rows as JSON in
+# CurrentPrisonSentenceRows; older CSVs only have the flattened 'Header: value, ...'
+# rows, whose 'Prison Sentence Length' entries are read directly instead of
+# scanning the whole text (which also matched offense names, case numbers, dates).
+SENTENCE_ROWS_FIELD = 'CurrentPrisonSentenceRows'
+SENTENCE_LENGTH_COLUMN = 'Prison Sentence Length'
+FLATTENED_SENTENCE_LENGTH_PATTERN = re.compile(r'Prison Sentence Length:\s*([^,|]*)')
+FDC_SENTENCE_LENGTH_PATTERN = re.compile(r'^\s*(\d+)\s*Y\s*(\d+)\s*M\s*(\d+)\s*D\s*$', re.IGNORECASE)
+
+# Output: results are streamed to disk as they are extracted, as JSONL or Parquet
+# records plus a flat CSV, with the summary statistics computed on the way
+OUTPUT_FORMATS = ['jsonl', 'parquet']
+CSV_FIELDNAMES = [
+    'InmateID', 'Name', 'SentenceYears', 'SentenceDisplay',
+    'OriginalSentence', 'MugshotURL', 'BestCrime',
+    'SentenceSource', 'Severity', 'Race', 'Sex'
+]
+PARQUET_BATCH_ROWS = 10000
+QUANTILE_RELATIVE_ACCURACY = 0.01
+SUMMARY_PERCENTILES = [25, 75, 90, 99]
+
+# Analytics arrays (read by sentence_analytics.py): sentence years as float32 plus one
+# uint16 code array per categorical column, with the labels the codes index into
+ARRAYS_NAME = 'sentence_arrays.npz'
+CATEGORICAL_COLUMNS = ['type', 'source', 'severity', 'race', 'sex']
+OTHER_TYPE = 'Other'  # Type label of results without a Life/Death/Years/Months/Days display
+
+# Incremental mode: the manifest maps a hash of each row's extraction inputs to the index
+# of its record (-1 for rows without a sentence) and the sentence terms it counted, and
+# keeps each record's JSONL and CSV byte offsets and sentence years. Unchanged rows are
+# copied from the previous output as raw bytes instead of being extracted again. The
+# manifest is tied to a hash of this script's source, so any change to the patterns,
+# fields or parsing code starts over; MANIFEST_VERSION only tracks the manifest layout.
+MANIFEST_NAME = 'extraction_manifest.json'
+MANIFEST_VERSION = 3
+ROW_HASH_FIELDS = ['InmateID', 'Name', 'MugshotURL', 'Best_Crime', 'Crime_Severity', 'Race', 'Sex',
+                   SENTENCE_ROWS_FIELD] + SENTENCE_SOURCE_FIELDS
+
+# Parallel mode: the file is split into byte ranges aligned to row boundaries
+CHUNKS_PER_WORKER = 4         # More chunks than workers keeps every core busy until the end
+MIN_CHUNK_BYTES = 1 << 20     # Small files are not worth splitting finely
+MAX_CHUNK_BYTES = 1 << 26     # Bounds the results held per chunk on very large files
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+READ_BLOCK_BYTES = 1 << 22
+
+# Sentence tokens: a number followed by a unit, or a life/death marker. One
+# alternation scans each field once and matches exactly what the separate
+# year/month/day/life/death patterns used to match. Every alternative starts with
+# a literal character so the regex engine can skip ahead to candidate positions;
+# the token type is read off the match itself. "mo" also covers "month", "mos"
+# and (as before) words like "more".
+SENTENCE_TOKEN_PATTERN = re.compile(
+    r'\d+(?:\.\d+)?\s*(?:-\s*)?(?:year|yr|mo|day)'
+    r'|life(?:(?<=\blife)\b|(?=\s+(?:sentence|imprisonment|prison|term|without\s+parole|w/?o\s+parole)))|lwop|natural\s+life'
+    r'|death(?=\s+(?:sentence|penalty|row))|capital(?=\s+punishment)|execution'
+)
+NUMBER_PREFIX_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+# Unit by the last character of a number token (year/yr, mo, day)
+SENTENCE_UNIT_BY_SUFFIX = {'r': 'years', 'o': 'months', 'y': 'days'}
+# Largest plausible value per unit (100 years in months and days)
+SENTENCE_UNIT_BOUNDS = {'years': 200, 'months': 1200, 'days': 36500}
+
+def scan_sentence_tokens(text: str) -> List[Tuple[Optional[float], str]]:
     """
-    Extract sentence terms from text using regex patterns.
-    Returns list of standardized sentence strings.
+    Scan text once and return typed sentence tokens in order of first occurrence,
+    without duplicates: (value, unit) with unit 'years', 'months' or 'days', and
+    (None, 'life') / (None, 'death') at most once each.
     """
     if not text or text.strip() == "":
         return []
-    
-    sentences = []
-    text = text.lower()
-    
-    # Pattern for years (e.g., "5 years", "10-year", "25 year sentence")
-    year_patterns = [
-        r'(\d+(?:\.\d+)?)\s*(?:-\s*)?year[s]?',
-        r'(\d+(?:\.\d+)?)\s*(?:-\s*)?yr[s]?',
-        r'(\d+(?:\.\d+)?)\s*(?:-\s*)?year[s]?\s+(?:sentence|term|prison)',
-    ]
-    
-    # Pattern for months (e.g., "6 months", "18-month")
-    month_patterns = [
-        r'(\d+(?:\.\d+)?)\s*(?:-\s*)?month[s]?',
-        r'(\d+(?:\.\d+)?)\s*(?:-\s*)?mo[s]?',
-        r'(\d+(?:\.\d+)?)\s*(?:-\s*)?month[s]?\s+(?:sentence|term|prison)',
-    ]
-    
-    # Pattern for days (e.g., "90 days", "365 day")
-    day_patterns = [
-        r'(\d+(?:\.\d+)?)\s*(?:-\s*)?day[s]?',
-        r'(\d+(?:\.\d+)?)\s*(?:-\s*)?day[s]?\s+(?:sentence|term|prison)',
-    ]
-    
-    # Life sentences
-    life_patterns = [
-        r'life\s+(?:sentence|imprisonment|prison|term)',
-        r'life\s+without\s+parole',
-        r'life\s+w/?o\s+parole',
-        r'\blife\b',
-        r'lwop',
-        r'natural\s+life'
-    ]
-    
-    # Death sentences
-    death_patterns = [
-        r'death\s+(?:sentence|penalty)',
-        r'death\s+row',
-        r'capital\s+punishment',
-        r'execution'
-    ]
-    
-    # Extract years
-    for pattern in year_patterns:
-        matches = re.findall(pattern, text)
-        for match in matches:
-            try:
-                years = float(match)
-                if years > 0 and years <= 200:  # Reasonable bounds
-                    sentences.append(f"{int(years) if years.is_integer() else years} years")
-            except ValueError:
-                continue
-    
-    # Extract months
-    for pattern in month_patterns:
-        matches = re.findall(pattern, text)
-        for match in matches:
-            try:
-                months = float(match)
-                if months > 0 and months <= 1200:  # Reasonable bounds (100 years in months)
-                    sentences.append(f"{int(months) if months.is_integer() else months} months")
-            except ValueError:
-                continue
-    
-    # Extract days
-    for pattern in day_patterns:
-        matches = re.findall(pattern, text)
-        for match in matches:
-            try:
-                days = float(match)
-                if days > 0 and days <= 36500:  # Reasonable bounds (100 years in days)
-                    sentences.append(f"{int(days) if days.is_integer() else days} days")
-            except ValueError:
+
+    tokens = []
+    seen = set()
+    for match in SENTENCE_TOKEN_PATTERN.finditer(text.lower()):
+        matched = match.group()
+        first = matched[0]
+        if first in 'ln':
+            token = (None, 'life')
+        elif first in 'dce':
+            token = (None, 'death')
+        else:
+            unit = SENTENCE_UNIT_BY_SUFFIX[matched[-1]]
+            value = float(NUMBER_PREFIX_PATTERN.match(matched).group())
+            if not (0 < value <= SENTENCE_UNIT_BOUNDS[unit]):  # Reasonable bounds
                 continue
-    
-    # Check for life sentences
-    for pattern in life_patterns:
-        if re.search(pattern, text):
-            sentences.append("Life")
-            break
-    
-    # Check for death sentences
-    for pattern in death_patterns:
-        if re.search(pattern, text):
-            sentences.append("Death")
-            break
-    
-    return list(set(sentences))  # Remove duplicates
+            token = (value, unit)
+        if token not in seen:
+            seen.add(token)
+            tokens.append(token)
+    return tokens
+
+def format_sentence_token(token: Tuple[Optional[float], str]) -> str:
+    """Display string for a sentence token, e.g. '5 years', '1.5 months', 'Life'."""
+    value, unit = token
+    if value is None:
+        return unit.title()
+    return f"{int(value) if value.is_integer() else value} {unit}"
+
+def extract_sentence_terms(text: str) -> List[str]:
+    """
+    Extract sentence terms from text in a single regex pass.
+    Returns list of standardized sentence strings, without duplicates.
+    """
+    return [format_sentence_token(token) for token in scan_sentence_tokens(text)]
+
+class SentenceLength(NamedTuple):
+    """A parsed prison sentence length. days and years are None for life and death sentences."""
+    days: Optional[int]
+    years: Optional[float]
+    life: bool
+    death: bool
+    term: str  # The same length as an extract_sentence_terms string, e.g. '5 years', '18 months', 'Life'
+
+@lru_cache(maxsize=4096)
+def parse_sentence_length(text: str) -> Optional[SentenceLength]:
+    """
+    Parse an FDC 'Prison Sentence Length' value: '5Y 0M 0D', 'LIFE', 'DEATH', or a
+    plain duration such as '10 YEARS'. Returns None for empty, zero or unreadable
+    values. Lengths repeat heavily across inmates, so results are cached.
+    """
+    if not text or not text.strip():
+        return None
+
+    match = FDC_SENTENCE_LENGTH_PATTERN.match(text)
+    if match:
+        years_part, months_part, days_part = (int(group) for group in match.groups())
+        years = years_part + months_part / 12 + days_part / 365
+        days = round(years * 365)
+        # Name the length in the largest unit that states it exactly
+        if months_part == 0 and days_part == 0:
+            token = (float(years_part), 'years')
+        elif days_part == 0:
+            token = (float(years_part * 12 + months_part), 'months')
+        else:
+            token = (float(days), 'days')
+        if not (0 < token[0] <= SENTENCE_UNIT_BOUNDS[token[1]]):
+            return None
+        return SentenceLength(days, years, False, False, format_sentence_token(token))
+
+    tokens = scan_sentence_tokens(text)
+    units = {unit for _, unit in tokens}
+    if 'death' in units or text.strip().lower() == 'death':
+        return SentenceLength(None, None, False, True, 'Death')
+    if 'life' in units:
+        return SentenceLength(None, None, True, False, 'Life')
+    durations = [token for token in tokens if token[0] is not None]
+    if not durations:
+        return None
+    token = max(durations, key=lambda token: standardize_sentence(format_sentence_token(token))[0])
+    years = standardize_sentence(format_sentence_token(token))[0]
+    return SentenceLength(round(years * 365), years, False, False, format_sentence_token(token))
+
+def structured_sentence_lengths(row: Dict, source: str) -> Optional[List[SentenceLength]]:
+    """
+    The parsed sentence lengths of a sentence history field, read from the structured
+    rows (CurrentPrisonSentenceRows) or from the flattened 'Prison Sentence Length:'
+    entries. None if the field has no structured sentence lengths to read, in which
+    case its text is scanned for free-text terms instead.
+    """
+    raw_lengths = None
+    if source == 'CurrentPrisonSentenceHistory' and row.get(SENTENCE_ROWS_FIELD):
+        try:
+            raw_lengths = [sentence_row.get(SENTENCE_LENGTH_COLUMN, '') for sentence_row in json.loads(row[SENTENCE_ROWS_FIELD])]
+        except (ValueError, AttributeError):
+            raw_lengths = None
+    if raw_lengths is None:
+        raw_lengths = FLATTENED_SENTENCE_LENGTH_PATTERN.findall(row.get(source) or '')
+        if not raw_lengths:
+            return None
+    lengths = [parse_sentence_length(raw_length) for raw_length in raw_lengths]
+    return [length for length in lengths if length is not None]
+
+def source_sentence_terms(row: Dict, source: str) -> List[str]:
+    """Sentence terms of one source field: structured lengths when present, else a free-text scan."""
+    lengths = structured_sentence_lengths(row, source)
+    if lengths is not None:
+        return list(dict.fromkeys(length.term for length in lengths))
+    text = row.get(source, '')
+    if text and text.strip():
+        return extract_sentence_terms(text)
+    return []
 
 def standardize_sentence(sentence: str) -> Tuple[Optional[float], str]:
     """
@@ -155,153 +266,743 @@ def standardize_sentence(sentence: str) -> Tuple[Optional[float], str]:
     
     return None, sentence
 
-def process_csv_file(csv_path: Path) -> List[Dict]:
+def extract_row_sentences(row: Dict, sentence_counter: Counter) -> Optional[Dict]:
     """
-    Process the CSV file and extract sentence information.
+    Extract the sentence information of one CSV row, counting every term found in
+    sentence_counter. Returns the result record, or None if the row has no sentence.
     """
+    inmate_id = row.get('InmateID', '')
+    name = row.get('Name', '')
+
+    # Extract sentences from various fields
+    all_sentences = []
+    extraction_details = {}
+
+    for source in SENTENCE_SOURCE_FIELDS:
+        sentences = source_sentence_terms(row, source)
+        if sentences:
+            all_sentences.extend(sentences)
+            extraction_details[source] = sentences
+            for sentence in sentences:
+                sentence_counter[sentence] += 1
+
+    if not all_sentences:
+        return None
+
+    # Pick the most severe/longest sentence
+    standardized_sentences = []
+    for sentence in all_sentences:
+        years, display = standardize_sentence(sentence)
+        if years is not None:
+            standardized_sentences.append((years, display, sentence))
+
+    if not standardized_sentences:
+        return None
+
+    # Sort by severity (highest years first)
+    standardized_sentences.sort(key=lambda x: x[0], reverse=True)
+    best_sentence = standardized_sentences[0]
+
+    return {
+        'InmateID': inmate_id,
+        'Name': name,
+        'SentenceYears': best_sentence[0],
+        'SentenceDisplay': best_sentence[1],
+        'OriginalSentence': best_sentence[2],
+        'AllSentences': list(dict.fromkeys(all_sentences)),  # Deduplicated in first-seen order, the same in every process
+        'ExtractionDetails': extraction_details,
+        'MugshotURL': row.get('MugshotURL', ''),
+        'BestCrime': row.get('Best_Crime', ''),
+        'SentenceSource': next(source for source, sentences in extraction_details.items() if best_sentence[2] in sentences),
+        'Severity': row.get('Crime_Severity') or '',
+        'Race': row.get('Race') or '',
+        'Sex': row.get('Sex') or '',
+    }
+
+def _count_quotes(file, start: int, end: int) -> int:
+    """Number of quote characters in file[start:end]."""
+    file.seek(start)
+    quotes = 0
+    remaining = end - start
+    while remaining > 0:
+        block = file.read(min(READ_BLOCK_BYTES, remaining))
+        if not block:
+            break
+        quotes += block.count(b'"')
+        remaining -= len(block)
+    return quotes
+
+def _next_row_start(file, offset: int, quotes: int) -> Tuple[Optional[int], int]:
+    """
+    First row start after `offset`, given the number of quote characters before `offset`.
+    A newline ends a row only outside quotes, i.e. after an even number of quote
+    characters (escaped quotes come in pairs). Returns (row start or None at end of
+    file, quote characters before it).
+    """
+    file.seek(offset)
+    while True:
+        block = file.read(READ_BLOCK_BYTES)
+        if not block:
+            return None, quotes
+        position = 0
+        while True:
+            newline = block.find(b'\n', position)
+            if newline < 0:
+                quotes += block.count(b'"', position)
+                break
+            quotes += block.count(b'"', position, newline)
+            position = newline + 1
+            if quotes % 2 == 0:
+                return offset + position, quotes
+        offset += len(block)
+
+def find_row_boundaries(csv_path: Path, chunk_count: int) -> List[int]:
+    """
+    Byte offsets splitting the data rows of a CSV file into about chunk_count ranges:
+    the end of the header, evenly spaced offsets moved forward to the next row start,
+    and the file size. Consecutive offsets delimit one chunk. Empty if the file has
+    no data rows.
+    """
+    size = csv_path.stat().st_size
+    with open(csv_path, 'rb') as file:
+        header_end, quotes = _next_row_start(file, 0, 0)
+        if header_end is None or header_end >= size:
+            return []
+        boundaries = [header_end]
+        for chunk in range(1, chunk_count):
+            target = size * chunk // chunk_count
+            if target <= boundaries[-1]:
+                continue
+            quotes += _count_quotes(file, boundaries[-1], target)
+            row_start, quotes = _next_row_start(file, target, quotes)
+            if row_start is None or row_start >= size:
+                break
+            boundaries.append(row_start)
+    boundaries.append(size)
+    return boundaries
+
+def process_byte_range(csv_path: Path, fieldnames: List[str], start: int, end: int) -> Tuple[List[Dict], Counter, int]:
+    """
+    Process the rows in bytes [start, end) of the CSV file (a range from
+    find_row_boundaries). Returns (results, sentence counter, rows read).
+    """
+    with open(csv_path, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+    # Decode like the serial path: UTF-8 ignoring errors, universal newlines
+    text = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8', errors='ignore')
+    reader = csv.DictReader(text, fieldnames=fieldnames)
+
     results = []
     sentence_counter = Counter()
-    
+    rows = 0
+    for row in reader:
+        rows += 1
+        result = extract_row_sentences(row, sentence_counter)
+        if result:
+            results.append(result)
+    return results, sentence_counter, rows
+
+def read_csv_header(csv_path: Path) -> List[str]:
+    """Column names from the header row of the CSV file."""
+    with open(csv_path, 'r', encoding='utf-8', errors='ignore') as file:
+        return next(csv.reader(file), [])
+
+def print_extraction_summary(total_rows: int, result_count: int, sentence_counter: Counter):
+    """Print row counts, the extraction rate and the most common sentences."""
+    print(f"\nTotal inmates processed: {total_rows}")
+    print(f"Inmates with sentence data: {result_count}")
+    if total_rows:
+        print(f"Extraction rate: {result_count/total_rows*100:.1f}%")
+
+    # Print most common sentences
+    print(f"\nMost common sentences found:")
+    for sentence, count in sentence_counter.most_common(20):
+        print(f"  {sentence}: {count}")
+
+def process_csv_file_parallel(csv_path: Path, workers: int, emit: Callable[[Dict], None]):
+    """
+    Process the CSV file on `workers` processes, passing each result to emit. The file
+    is split into byte ranges aligned to row boundaries; per-chunk results and counters
+    are merged in input order, so the output is identical to the serial path. Only a
+    few chunks per worker are in flight at once, so memory does not grow with the file.
+    """
+    csv_path = Path(csv_path)
+    fieldnames = read_csv_header(csv_path)
+    size = csv_path.stat().st_size
+    chunk_count = max(1, min(workers * CHUNKS_PER_WORKER, size // MIN_CHUNK_BYTES), size // MAX_CHUNK_BYTES)
+    boundaries = find_row_boundaries(csv_path, chunk_count)
+    ranges = list(zip(boundaries, boundaries[1:]))
+    print(f"Split into {len(ranges)} chunk(s) for {workers} worker(s)")
+
+    sentence_counter = Counter()
+    total_rows = 0
+    result_count = 0
+    pending = deque()
+    next_range = iter(ranges)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for position in range(1, len(ranges) + 1):
+            while len(pending) < workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                byte_range = next(next_range, None)
+                if byte_range is None:
+                    break
+                pending.append(executor.submit(process_byte_range, csv_path, fieldnames, *byte_range))
+            chunk_records, chunk_counter, chunk_rows = pending.popleft().result()
+            for result in chunk_records:
+                emit(result)
+            result_count += len(chunk_records)
+            sentence_counter.update(chunk_counter)
+            total_rows += chunk_rows
+            print(f"Processed chunk {position}/{len(ranges)} ({total_rows} rows so far)...")
+
+    print_extraction_summary(total_rows, result_count, sentence_counter)
+
+def process_csv_file(csv_path: Path, workers: int = 1, emit: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+    """
+    Process the CSV file and extract sentence information.
+    With workers > 1 the file is processed in parallel (see process_csv_file_parallel).
+    If emit is given, each result is passed to it as soon as it is extracted instead of
+    being collected, and the returned list is empty.
+    """
     print(f"Processing CSV file: {csv_path}")
-    
+
+    results = []
+    if emit is None:
+        emit = results.append
+
+    if workers > 1:
+        process_csv_file_parallel(csv_path, workers, emit)
+        return results
+
+    sentence_counter = Counter()
+    result_count = 0
+    i = 0
+
     with open(csv_path, 'r', encoding='utf-8', errors='ignore') as file:
         reader = csv.DictReader(file)
-        
+
         for i, row in enumerate(reader, 1):
             if i % 1000 == 0:
                 print(f"Processed {i} rows...")
-            
-            inmate_id = row.get('InmateID', '')
-            name = row.get('Name', '')
-            
-            # Extract sentences from various fields
-            sentence_sources = {
-                'CurrentPrisonSentenceHistory': row.get('CurrentPrisonSentenceHistory', ''),
-                'PriorPrisonHistory': row.get('PriorPrisonHistory', ''),
-                'IncarcerationHistory': row.get('IncarcerationHistory', ''),
-                'Detainers': row.get('Detainers', ''),
-                'Description': row.get('Description', ''),
-            }
-            
-            all_sentences = []
-            extraction_details = {}
-            
-            for source, text in sentence_sources.items():
-                if text and text.strip():
-                    sentences = extract_sentence_terms(text)
-                    if sentences:
-                        all_sentences.extend(sentences)
-                        extraction_details[source] = sentences
-                        for sentence in sentences:
-                            sentence_counter[sentence] += 1
-            
-            if all_sentences:
-                # Pick the most severe/longest sentence
-                standardized_sentences = []
-                for sentence in all_sentences:
-                    years, display = standardize_sentence(sentence)
-                    if years is not None:
-                        standardized_sentences.append((years, display, sentence))
-                
-                if standardized_sentences:
-                    # Sort by severity (highest years first)
-                    standardized_sentences.sort(key=lambda x: x[0], reverse=True)
-                    best_sentence = standardized_sentences[0]
-                    
-                    results.append({
-                        'InmateID': inmate_id,
-                        'Name': name,
-                        'SentenceYears': best_sentence[0],
-                        'SentenceDisplay': best_sentence[1],
-                        'OriginalSentence': best_sentence[2],
-                        'AllSentences': list(set(all_sentences)),
-                        'ExtractionDetails': extraction_details,
-                        'MugshotURL': row.get('MugshotURL', ''),
-                        'BestCrime': row.get('Best_Crime', ''),
-                    })
-    
-    print(f"\nTotal inmates processed: {i}")
-    print(f"Inmates with sentence data: {len(results)}")
-    print(f"Extraction rate: {len(results)/i*100:.1f}%")
-    
-    # Print most common sentences
-    print(f"\nMost common sentences found:")
-    for sentence, count in sentence_counter.most_common(20):
-        print(f"  {sentence}: {count}")
-    
+
+            result = extract_row_sentences(row, sentence_counter)
+            if result:
+                emit(result)
+                result_count += 1
+
+    print_extraction_summary(i, result_count, sentence_counter)
     return results
 
-def save_results(results: List[Dict], output_dir: Path):
+def sentence_type(display: str) -> Optional[str]:
+    """Life, Death, Years, Months or Days for a SentenceDisplay string (None if none applies)."""
+    if 'Life' in display:
+        return 'Life'
+    if 'Death' in display:
+        return 'Death'
+    if 'year' in display:
+        return 'Years'
+    if 'month' in display:
+        return 'Months'
+    if 'day' in display:
+        return 'Days'
+    return None
+
+class QuantileSketch:
     """
-    Save the extracted sentence data in multiple formats.
+    Approximate quantiles of non-negative values in fixed memory: values are counted in
+    logarithmically spaced buckets, so every quantile is within relative_accuracy of
+    an actual value (the DDSketch scheme). Sentences from a day to 100 years need
+    a few hundred buckets however many values are added.
     """
-    output_dir.mkdir(exist_ok=True)
-    
-    # Save as JSON
-    json_path = output_dir / 'extracted_sentences.json'
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
-    print(f"Saved JSON data to: {json_path}")
-    
-    # Save as CSV
-    csv_path = output_dir / 'extracted_sentences.csv'
-    if results:
-        fieldnames = [
-            'InmateID', 'Name', 'SentenceYears', 'SentenceDisplay', 
-            'OriginalSentence', 'MugshotURL', 'BestCrime'
-        ]
-        
-        with open(csv_path, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for result in results:
-                # Flatten the result for CSV
-                csv_row = {key: result.get(key, '') for key in fieldnames}
-                writer.writerow(csv_row)
-        
-        print(f"Saved CSV data to: {csv_path}")
-    
-    # Save summary statistics
-    summary_path = output_dir / 'sentence_extraction_summary.txt'
-    with open(summary_path, 'w', encoding='utf-8') as f:
-        f.write("Sentence Extraction Summary\n")
-        f.write("=" * 30 + "\n\n")
-        f.write(f"Total inmates with sentences: {len(results)}\n\n")
-        
-        # Sentence length distribution
-        sentence_lengths = [r['SentenceYears'] for r in results if r['SentenceYears'] is not None]
-        if sentence_lengths:
-            f.write("Sentence Length Distribution:\n")
-            f.write(f"  Average: {sum(sentence_lengths)/len(sentence_lengths):.1f} years\n")
-            f.write(f"  Median: {sorted(sentence_lengths)[len(sentence_lengths)//2]:.1f} years\n")
-            f.write(f"  Range: {min(sentence_lengths):.1f} - {max(sentence_lengths):.1f} years\n\n")
-        
-        # Sentence type breakdown
-        sentence_types = Counter()
+
+    def __init__(self, relative_accuracy: float = QUANTILE_RELATIVE_ACCURACY):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = Counter()
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float, count: int = 1):
+        self.count += count
+        if value <= 0:
+            self.zero_count += count
+        else:
+            self.buckets[math.ceil(math.log(value) / self.log_gamma)] += count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate q-quantile (0 <= q <= 1), or None if no value was added."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(index-1), gamma^index] in relative terms
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+class SentenceStats:
+    """Summary statistics of extraction results, updated one result at a time."""
+
+    def __init__(self):
+        self.records = 0
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.sketch = QuantileSketch()
+        self.sentence_types = Counter()
+
+    def add(self, result: Dict):
+        self.records += 1
+        years = result.get('SentenceYears')
+        if years is not None:
+            self.count += 1
+            self.total += years
+            self.minimum = years if self.minimum is None else min(self.minimum, years)
+            self.maximum = years if self.maximum is None else max(self.maximum, years)
+            self.sketch.add(years)
+        display_type = sentence_type(result.get('SentenceDisplay', ''))
+        if display_type:
+            self.sentence_types[display_type] += 1
+
+    def extend(self, years: List[Optional[float]], type_codes: np.ndarray, type_labels: np.ndarray):
+        """
+        Add a batch of results given by their SentenceYears and SentenceArrays type codes,
+        with the same outcome as adding them one at a time.
+        """
+        self.records += len(years)
+        known = [value for value in years if value is not None]
+        if known:
+            for value in known:  # In order, so the float total matches add()
+                self.total += value
+            self.count += len(known)
+            self.minimum = min(known) if self.minimum is None else min(self.minimum, min(known))
+            self.maximum = max(known) if self.maximum is None else max(self.maximum, max(known))
+            for value, count in Counter(known).items():
+                self.sketch.add(value, count)
+        codes, first_seen, counts = np.unique(type_codes, return_index=True, return_counts=True)
+        for position in np.argsort(first_seen):  # First-seen order, as add() would insert them
+            label = str(type_labels[codes[position]])
+            if label != OTHER_TYPE:
+                self.sentence_types[label] += int(counts[position])
+
+    def write_summary(self, summary_path: Path):
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write("Sentence Extraction Summary\n")
+            f.write("=" * 30 + "\n\n")
+            f.write(f"Total inmates with sentences: {self.records}\n\n")
+
+            # Sentence length distribution
+            if self.count:
+                f.write("Sentence Length Distribution:\n")
+                f.write(f"  Average: {self.total/self.count:.1f} years\n")
+                f.write(f"  Median: {self.sketch.quantile(0.5):.1f} years\n")
+                percentiles = ", ".join(f"p{p} {self.sketch.quantile(p / 100):.1f}" for p in SUMMARY_PERCENTILES)
+                f.write(f"  Percentiles: {percentiles} years (within {QUANTILE_RELATIVE_ACCURACY:.0%})\n")
+                f.write(f"  Range: {self.minimum:.1f} - {self.maximum:.1f} years\n\n")
+
+            f.write("Sentence Type Breakdown:\n")
+            for display_type, count in self.sentence_types.most_common():
+                f.write(f"  {display_type}: {count}\n")
+
+class SentenceArrays:
+    """
+    Columnar copy of the extraction results for vectorized analytics: a compact float32
+    array of sentence years (NaN if unknown) and a code array per CATEGORICAL_COLUMNS
+    entry, grown one result at a time.
+    """
+
+    def __init__(self):
+        self.years = array('f')
+        self.codes = {column: array('H') for column in CATEGORICAL_COLUMNS}
+        self.labels = {column: {} for column in CATEGORICAL_COLUMNS}
+
+    def add(self, result: Dict):
+        years = result.get('SentenceYears')
+        self.years.append(math.nan if years is None else years)
+        values = {
+            'type': sentence_type(result.get('SentenceDisplay', '')) or OTHER_TYPE,
+            'source': result.get('SentenceSource', ''),
+            'severity': result.get('Severity') or 'Unknown',
+            'race': result.get('Race') or 'Unknown',
+            'sex': result.get('Sex') or 'Unknown',
+        }
+        for column, value in values.items():
+            labels = self.labels[column]
+            code = labels.get(value)
+            if code is None:
+                code = labels[value] = len(labels)
+            self.codes[column].append(code)
+
+    def extend(self, arrays: Dict[str, np.ndarray], start: int, end: int):
+        """Append results start..end-1 of saved arrays (see save), keeping first-seen label order."""
+        self.years.frombytes(arrays['years'][start:end].astype(np.float32).tobytes())
+        for column in CATEGORICAL_COLUMNS:
+            codes = arrays[f'{column}_codes'][start:end]
+            saved_labels = arrays[f'{column}_labels']
+            labels = self.labels[column]
+            present, first_seen = np.unique(codes, return_index=True)
+            translation = np.zeros(len(saved_labels), dtype=np.uint16)
+            for code in present[np.argsort(first_seen)]:
+                translation[code] = labels.setdefault(str(saved_labels[code]), len(labels))
+            self.codes[column].frombytes(translation[codes].tobytes())
+
+    def save(self, path: Path):
+        arrays = {'years': np.frombuffer(self.years, dtype=np.float32)}
+        for column in CATEGORICAL_COLUMNS:
+            arrays[f'{column}_codes'] = np.frombuffer(self.codes[column], dtype=np.uint16)
+            arrays[f'{column}_labels'] = np.array(list(self.labels[column]), dtype=str)
+        temporary = path.with_name(path.name + '.tmp')
+        with open(temporary, 'wb') as f:  # A file object, so numpy does not append another .npz
+            np.savez(f, **arrays)
+        os.replace(temporary, path)
+
+class SentenceWriter:
+    """
+    Writes extraction results as they arrive: one JSONL line (or Parquet row, written in
+    batches of PARQUET_BATCH_ROWS) and one CSV row per result, plus the summary on close.
+    Files are written under temporary names and renamed into place on close, so an
+    interrupted run leaves the previous output intact; a run without results writes nothing.
+    """
+
+    def __init__(self, output_dir: Path, output_format: str = 'jsonl'):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format {output_format!r}; expected one of {OUTPUT_FORMATS}")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self.output_format = output_format
+        self.stats = SentenceStats()
+        self.arrays = SentenceArrays()
+        self.paths = {
+            'records': output_dir / f'extracted_sentences.{output_format}',
+            'csv': output_dir / 'extracted_sentences.csv',
+            'summary': output_dir / 'sentence_extraction_summary.txt',
+            'arrays': output_dir / ARRAYS_NAME,
+        }
+        self.manifest_path = output_dir / MANIFEST_NAME
+        self.manifest = None  # Set by incremental runs to be saved on close (see save_manifest)
+        self.records_bytes = 0
+        self._parquet_writer = None
+        self._parquet_batch = []
+        if output_format == 'parquet':
+            import pyarrow as pa  # Only needed for Parquet output
+            import pyarrow.parquet as pq
+            self._pa = pa
+            self._schema = pa.schema([
+                ('InmateID', pa.string()), ('Name', pa.string()), ('SentenceYears', pa.float64()),
+                ('SentenceDisplay', pa.string()), ('OriginalSentence', pa.string()),
+                ('AllSentences', pa.list_(pa.string())),
+                ('ExtractionDetails', pa.map_(pa.string(), pa.list_(pa.string()))),
+                ('MugshotURL', pa.string()), ('BestCrime', pa.string()), ('SentenceSource', pa.string()),
+                ('Severity', pa.string()), ('Race', pa.string()), ('Sex', pa.string()),
+            ])
+            self._parquet_writer = pq.ParquetWriter(self._temporary(self.paths['records']), self._schema)
+            self._records_file = None
+        else:
+            self._records_file = open(self._temporary(self.paths['records']), 'wb')
+        self._csv_file = io.TextIOWrapper(open(self._temporary(self.paths['csv']), 'wb'), encoding='utf-8', newline='')
+        self._csv_writer = csv.DictWriter(self._csv_file, fieldnames=CSV_FIELDNAMES, extrasaction='ignore')
+        self._csv_writer.writeheader()
+
+    @staticmethod
+    def _temporary(path: Path) -> Path:
+        return path.with_name(path.name + '.tmp')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(keep=exc_type is None)
+
+    def write(self, result: Dict, record_line: Optional[bytes] = None):
+        """Write one result; record_line is its JSONL line if already encoded (a reused record)."""
+        self.stats.add(result)
+        self.arrays.add(result)
+        if self._records_file is not None:
+            if record_line is None:
+                record_line = (json.dumps(result, ensure_ascii=False) + '\n').encode('utf-8')
+            self._records_file.write(record_line)
+            self.records_bytes += len(record_line)
+        else:
+            self._parquet_batch.append(dict(result, ExtractionDetails=list(result['ExtractionDetails'].items())))
+            if len(self._parquet_batch) >= PARQUET_BATCH_ROWS:
+                self._flush_parquet()
+        self._csv_writer.writerow(result)
+
+    @property
+    def csv_bytes(self) -> int:
+        """Bytes of CSV written so far. From the first call on, rows are written through to the binary file."""
+        if not self._csv_file.write_through:
+            self._csv_file.reconfigure(write_through=True)  # Flushes the pending text first
+        return self._csv_file.buffer.tell()
+
+    def copy(self, previous: 'PreviousExtraction', start: int, end: int):
+        """Append records start..end-1 of a previous JSONL output as they are, without decoding them."""
+        self.stats.extend(previous.years[start:end], previous.arrays['type_codes'][start:end],
+                          previous.arrays['type_labels'])
+        self.arrays.extend(previous.arrays, start, end)
+        for block in previous.read_records(start, end):
+            self._records_file.write(block)
+            self.records_bytes += len(block)
+        self._csv_file.flush()  # Rows written as text go first
+        for block in previous.read_csv(start, end):
+            self._csv_file.buffer.write(block)
+
+    def _flush_parquet(self):
+        if self._parquet_batch:
+            self._parquet_writer.write_table(self._pa.Table.from_pylist(self._parquet_batch, schema=self._schema))
+            self._parquet_batch = []
+
+    def close(self, keep: bool = True):
+        """Finish the files; they replace the previous output if keep and any result was written."""
+        if self._parquet_writer is not None:
+            if keep:
+                self._flush_parquet()
+            self._parquet_writer.close()
+        if self._records_file is not None:
+            self._records_file.close()
+        csv_bytes = self.csv_bytes if self.manifest is not None else None
+        self._csv_file.close()
+
+        keep = keep and self.stats.records > 0
+        for key in ('records', 'csv'):
+            temporary = self._temporary(self.paths[key])
+            if keep:
+                os.replace(temporary, self.paths[key])
+            else:
+                temporary.unlink(missing_ok=True)
+        if keep:
+            # The manifest is only valid for the records file it indexes
+            if self.manifest is not None:
+                save_manifest(self.manifest_path, self.manifest, self.records_bytes, csv_bytes)
+            else:
+                self.manifest_path.unlink(missing_ok=True)
+            self.stats.write_summary(self.paths['summary'])
+            self.arrays.save(self.paths['arrays'])
+            print(f"Saved {self.output_format.upper()} data to: {self.paths['records']}")
+            print(f"Saved CSV data to: {self.paths['csv']}")
+            print(f"Saved summary to: {self.paths['summary']}")
+            print(f"Saved analytics arrays to: {self.paths['arrays']}")
+
+def row_content_hash(values: List[str]) -> str:
+    """Hash of a row's ROW_HASH_FIELDS values (the fields extract_row_sentences reads)."""
+    return hashlib.blake2b('\x1f'.join(values).encode('utf-8', 'surrogatepass'), digest_size=12).hexdigest()
+
+@lru_cache(maxsize=None)
+def extractor_fingerprint() -> str:
+    """Hash of this script's source; a manifest written by any other version is not reused."""
+    return hashlib.blake2b(Path(__file__).read_bytes(), digest_size=12).hexdigest()
+
+def save_manifest(manifest_path: Path, manifest: Dict, records_bytes: int, csv_bytes: int):
+    temporary = manifest_path.with_name(manifest_path.name + '.tmp')
+    with open(temporary, 'w', encoding='utf-8') as f:
+        # dumps rather than dump: writing to a file directly bypasses the C encoder
+        f.write(json.dumps({'version': MANIFEST_VERSION, 'extractor': extractor_fingerprint(),
+                            'records_bytes': records_bytes, 'csv_bytes': csv_bytes, **manifest}, separators=(',', ':')))
+    os.replace(temporary, manifest_path)
+
+class PreviousExtraction:
+    """
+    The output of the previous --incremental run, opened for copying unchanged records:
+    its manifest, the JSONL and CSV files it indexes, and the analytics arrays. Records
+    are read back as raw byte ranges, so reused rows are never decoded.
+    """
+
+    def __init__(self, output_dir: Path, manifest: Dict):
+        self.rows = manifest['rows']
+        self.terms = manifest['terms']
+        self.years = manifest['years']
+        self.record_offsets = manifest['record_offsets'] + [manifest['records_bytes']]
+        self.csv_offsets = manifest['csv_offsets'] + [manifest['csv_bytes']]
+        with np.load(output_dir / ARRAYS_NAME) as data:
+            self.arrays = {name: data[name] for name in data.files}
+        if len(self.arrays['years']) != len(self.years):
+            raise ValueError("analytics arrays do not match the manifest")
+        self._records_file = open(output_dir / 'extracted_sentences.jsonl', 'rb')
+        self._csv_file = open(output_dir / 'extracted_sentences.csv', 'rb')
+
+    def _read(self, file, offsets: List[int], start: int, end: int) -> Iterator[bytes]:
+        file.seek(offsets[start])
+        remaining = offsets[end] - offsets[start]
+        while remaining > 0:
+            block = file.read(min(remaining, READ_BLOCK_BYTES))
+            if not block:
+                raise ValueError(f"{file.name} is shorter than its manifest")
+            remaining -= len(block)
+            yield block
+
+    def read_records(self, start: int, end: int) -> Iterator[bytes]:
+        """JSONL lines of records start..end-1, in blocks of at most READ_BLOCK_BYTES."""
+        return self._read(self._records_file, self.record_offsets, start, end)
+
+    def read_csv(self, start: int, end: int) -> Iterator[bytes]:
+        """CSV rows of records start..end-1, in blocks of at most READ_BLOCK_BYTES."""
+        return self._read(self._csv_file, self.csv_offsets, start, end)
+
+    def close(self):
+        self._records_file.close()
+        self._csv_file.close()
+
+def load_previous_extraction(output_dir: Path) -> Optional[PreviousExtraction]:
+    """
+    The previous run's output if it can be reused, or None if there is no usable manifest
+    (missing, from another version of this script, or not matching the files it indexes,
+    e.g. after a full run without --incremental).
+    """
+    manifest_path = output_dir / MANIFEST_NAME
+    paths = [output_dir / name for name in ('extracted_sentences.jsonl', 'extracted_sentences.csv', ARRAYS_NAME)]
+    if not manifest_path.exists() or not all(path.exists() for path in paths):
+        return None
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except ValueError:
+        print(f"Ignoring unreadable manifest {manifest_path}")
+        return None
+    if manifest.get('version') != MANIFEST_VERSION or manifest.get('extractor') != extractor_fingerprint():
+        print("Manifest is from another extractor version; extracting every row")
+        return None
+    if manifest.get('records_bytes') != paths[0].stat().st_size or manifest.get('csv_bytes') != paths[1].stat().st_size:
+        print("Manifest does not match the existing records; extracting every row")
+        return None
+    try:
+        return PreviousExtraction(output_dir, manifest)
+    except (OSError, ValueError, KeyError) as error:
+        print(f"Cannot reuse the previous output ({error}); extracting every row")
+        return None
+
+def process_csv_file_incremental(csv_path: Path, output_dir: Path, writer: 'SentenceWriter'):
+    """
+    Process the CSV file, extracting only rows whose content hash is not in the previous
+    run's manifest. Runs of unchanged rows are copied from the previous JSONL and CSV
+    output in one read each. The merged output and summary are identical to a full run,
+    and a new manifest is saved with them.
+    """
+    print(f"Processing CSV file incrementally: {csv_path}")
+    previous = load_previous_extraction(output_dir)
+    previous_rows = previous.rows if previous else {}
+    # Term codes continue the previous run's, so reused rows keep theirs
+    terms = list(previous.terms) if previous else []
+    term_codes = {term: code for code, term in enumerate(terms)}
+    rows = {}  # row hash -> [record index or -1, term codes...]
+    record_offsets, csv_offsets, record_years = [], [], []
+    row_terms = array('I')  # Term codes of every row in input order, for the summary counter
+    run = [0, 0]  # Previous records [start, end) waiting to be copied
+    reused = 0
+    i = 0
+
+    def copy_run():
+        start, end = run
+        if start == end:
+            return
+        record_base = writer.records_bytes - previous.record_offsets[start]
+        csv_base = writer.csv_bytes - previous.csv_offsets[start]
+        record_offsets.extend(offset + record_base for offset in previous.record_offsets[start:end])
+        csv_offsets.extend(offset + csv_base for offset in previous.csv_offsets[start:end])
+        record_years.extend(previous.years[start:end])
+        writer.copy(previous, start, end)
+        run[0] = run[1] = 0
+
+    try:
+        with open(csv_path, 'r', encoding='utf-8', errors='ignore') as file:
+            # Rows are only turned into dicts when they need extracting
+            reader = csv.reader(file)
+            fieldnames = next(reader, [])
+            hash_columns = [fieldnames.index(field) for field in ROW_HASH_FIELDS if field in fieldnames]
+
+            for values in reader:
+                if not values:
+                    continue  # Blank lines are not rows (as in csv.DictReader)
+                i += 1
+                if i % 1000 == 0:
+                    print(f"Processed {i} rows...")
+
+                row_hash = row_content_hash([values[column] if column < len(values) else '' for column in hash_columns])
+                entry = previous_rows.get(row_hash)
+                if entry is not None:
+                    reused += 1
+                    index = entry[0]
+                    if index >= 0:
+                        if run[0] == run[1] or index != run[1]:
+                            copy_run()
+                            run[0] = index
+                        run[1] = index + 1
+                        entry = [len(record_offsets) + run[1] - run[0] - 1] + entry[1:]
+                    rows[row_hash] = entry
+                    row_terms.extend(entry[1:])
+                    continue
+
+                copy_run()
+                row_counter = Counter()
+                result = extract_row_sentences(dict(zip(fieldnames, values)), row_counter)
+                codes = []
+                for term in row_counter.elements():  # Grouped by term in first-seen order
+                    code = term_codes.get(term)
+                    if code is None:
+                        code = term_codes[term] = len(terms)
+                        terms.append(term)
+                    codes.append(code)
+                index = -1
+                if result:
+                    index = len(record_offsets)
+                    record_offsets.append(writer.records_bytes)
+                    csv_offsets.append(writer.csv_bytes)
+                    record_years.append(result['SentenceYears'])
+                    writer.write(result)
+                rows[row_hash] = [index] + codes
+                row_terms.extend(codes)
+            copy_run()
+    finally:
+        if previous is not None:
+            previous.close()
+
+    # Counter in first-seen order, as extract_row_sentences would have filled it
+    codes = np.frombuffer(row_terms, dtype=np.uint32)
+    counts = np.bincount(codes, minlength=len(terms))
+    used, first_seen = np.unique(codes, return_index=True)
+    sentence_counter = Counter()
+    for code in used[np.argsort(first_seen)]:
+        sentence_counter[terms[code]] = int(counts[code])
+
+    # Drop terms no row uses any more, so the manifest does not grow across runs
+    if len(used) < len(terms):
+        new_codes = {int(code): new_code for new_code, code in enumerate(used)}
+        terms = [terms[code] for code in used]
+        rows = {row_hash: [entry[0]] + [new_codes[code] for code in entry[1:]] for row_hash, entry in rows.items()}
+
+    print(f"Reused {reused} unchanged row(s), extracted {i - reused} new or changed row(s)")
+    writer.manifest = {'terms': terms, 'rows': rows, 'years': record_years,
+                       'record_offsets': record_offsets, 'csv_offsets': csv_offsets}
+    print_extraction_summary(i, writer.stats.records, sentence_counter)
+
+def save_results(results: List[Dict], output_dir: Path, output_format: str = 'jsonl'):
+    """
+    Save already collected extraction results (see SentenceWriter for the files written).
+    """
+    with SentenceWriter(output_dir, output_format) as writer:
         for result in results:
-            display = result.get('SentenceDisplay', '')
-            if 'Life' in display:
-                sentence_types['Life'] += 1
-            elif 'Death' in display:
-                sentence_types['Death'] += 1
-            elif 'year' in display:
-                sentence_types['Years'] += 1
-            elif 'month' in display:
-                sentence_types['Months'] += 1
-            elif 'day' in display:
-                sentence_types['Days'] += 1
-        
-        f.write("Sentence Type Breakdown:\n")
-        for sentence_type, count in sentence_types.most_common():
-            f.write(f"  {sentence_type}: {count}\n")
-    
-    print(f"Saved summary to: {summary_path}")
+            writer.write(result)
 
 def main():
     """
     Main function to run the sentence extraction.
     """
+    parser = argparse.ArgumentParser(description='Extract prison sentence terms from the mugshots CSV.')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes to extract with; 0 uses every core. Default: 1 (serial)')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='jsonl',
+                        help='Record output format; parquet needs pyarrow. Default: jsonl')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only extract rows that are new or changed since the last --incremental run '
+                             'and merge them into its output (serial, JSONL only)')
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count() or 1
+    if args.incremental and args.format != 'jsonl':
+        parser.error('--incremental needs --format jsonl')
+
     print("Prison Sentence Term Extractor")
     print("=" * 40)
     
@@ -315,13 +1016,20 @@ def main():
         print(f"Error: CSV file not found at {csv_path}")
         return
     
-    # Process the CSV file
-    results = process_csv_file(csv_path)
-    
-    # Save results
-    if results:
-        save_results(results, output_dir)
-        print(f"\n✅ Successfully extracted sentence data for {len(results)} inmates")
+    # Process the CSV file, writing each result as it is extracted
+    try:
+        writer = SentenceWriter(output_dir, args.format)
+    except ImportError:
+        print("Error: Parquet output needs pyarrow (pip install pyarrow)")
+        return
+    with writer:
+        if args.incremental:
+            process_csv_file_incremental(csv_path, output_dir, writer)
+        else:
+            process_csv_file(csv_path, workers, emit=writer.write)
+
+    if writer.stats.records:
+        print(f"\n✅ Successfully extracted sentence data for {writer.stats.records} inmates")
         print(f"📁 Output saved to: {output_dir}")
     else:
         print("❌ No sentence data could be extracted")
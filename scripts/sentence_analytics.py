@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Sentence Analytics
+Vectorized report over the sentence_arrays.npz written by extract_sentences.py:
+a histogram of sentence lengths, percentiles, and breakdowns by sentence type,
+source field, severity, race and sex. Everything is computed with NumPy on the
+compact arrays with bincounts rather than sorts, so millions of sentences take
+well under a second.
+
+Usage:
+    python3 sentence_analytics.py [--input data/extracted_sentences/sentence_arrays.npz] [--json report.json]
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+# Histogram edges in years; the last bin is open-ended. Life and Death are counted separately.
+DEFAULT_BIN_EDGES = [0, 0.25, 0.5, 1, 2, 3, 5, 10, 15, 20, 30, 50]
+DEFAULT_PERCENTILES = [10, 25, 50, 75, 90, 99]
+INDETERMINATE_TYPES = ['Life', 'Death']
+BREAKDOWN_COLUMNS = ['type', 'source', 'severity', 'race', 'sex']
+DAYS_PER_YEAR = 365
+
+def load_sentence_arrays(npz_path: Path) -> Dict[str, np.ndarray]:
+    """The arrays saved by extract_sentences.SentenceArrays."""
+    with np.load(npz_path) as data:
+        return {name: data[name] for name in data.files}
+
+def percentiles_from_counts(counts: np.ndarray, percentiles: List[float]) -> np.ndarray:
+    """
+    Percentiles of each row of a (groups, values) count matrix, where counts[g, v] is
+    how often value v occurs in group g, interpolated like np.percentile. Returns a
+    (groups, len(percentiles)) array of values, NaN for empty groups.
+    """
+    totals = counts.sum(axis=1)
+    cumulative = np.cumsum(counts, axis=1)
+    ranks = np.asarray(percentiles, dtype=np.float64)[None, :] / 100 * np.maximum(totals - 1, 0)[:, None]
+    lower_ranks = np.floor(ranks)
+    result = np.full(ranks.shape, np.nan)
+    for group in np.flatnonzero(totals):
+        # The value of 0-based rank k is the first v with more than k values up to v
+        lower = np.searchsorted(cumulative[group], lower_ranks[group], side='right')
+        upper = np.searchsorted(cumulative[group], np.minimum(lower_ranks[group] + 1, totals[group] - 1), side='right')
+        fraction = ranks[group] - lower_ranks[group]
+        result[group] = lower * (1 - fraction) + upper * fraction
+    return result
+
+def breakdown(codes: np.ndarray, labels: np.ndarray, term_mask: np.ndarray, term_days: np.ndarray,
+              term_years: np.ndarray, indeterminate_masks: Dict[str, np.ndarray], percentiles: List[float]) -> List[Dict]:
+    """
+    Per-label counts, term sentence statistics and Life/Death counts for one categorical
+    column. Percentiles come from per-label counts of each sentence length in days, so
+    the column needs a single bincount instead of a sort.
+    """
+    group_count = len(labels)
+    total = len(codes)
+    day_span = int(term_days.max()) + 1 if len(term_days) else 1
+    counts = np.bincount(codes, minlength=group_count)
+    term_codes = codes[term_mask].astype(np.int64)
+    day_counts = np.bincount(term_codes * day_span + term_days, minlength=group_count * day_span).reshape(group_count, day_span)
+    term_counts = day_counts.sum(axis=1)
+    term_sums = np.bincount(term_codes, weights=term_years, minlength=group_count)
+    group_percentiles = percentiles_from_counts(day_counts, percentiles) / DAYS_PER_YEAR
+    indeterminate = {name: np.bincount(codes[mask], minlength=group_count) for name, mask in indeterminate_masks.items()}
+
+    rows = []
+    for code in np.argsort(-counts, kind='stable'):
+        if not counts[code]:
+            continue
+        rows.append({
+            'label': str(labels[code]),
+            'count': int(counts[code]),
+            'share': float(counts[code] / total),
+            'term_count': int(term_counts[code]),
+            'mean_years': float(term_sums[code] / term_counts[code]) if term_counts[code] else None,
+            'percentiles': {f'{p:g}': (None if np.isnan(value) else float(value))
+                            for p, value in zip(percentiles, group_percentiles[code])},
+            **{name.lower(): int(indeterminate[name][code]) for name in INDETERMINATE_TYPES},
+        })
+    return rows
+
+def analyze(arrays: Dict[str, np.ndarray], bin_edges: List[float] = DEFAULT_BIN_EDGES,
+            percentiles: List[float] = DEFAULT_PERCENTILES) -> Dict:
+    """
+    The full report: totals, histogram and percentiles of term (non Life/Death)
+    sentences in years, and a breakdown per BREAKDOWN_COLUMNS column. Percentiles
+    are exact at day resolution; means and the histogram use the stored years.
+    """
+    years = arrays['years']
+    type_codes = arrays['type_codes']
+    type_labels = list(arrays['type_labels'])
+    indeterminate_masks = {name: (type_codes == type_labels.index(name)) if name in type_labels
+                           else np.zeros(len(years), dtype=bool)
+                           for name in INDETERMINATE_TYPES}
+    term_mask = ~np.isnan(years)
+    for mask in indeterminate_masks.values():
+        term_mask &= ~mask
+    term_years = years[term_mask]
+    term_days = np.rint(term_years * DAYS_PER_YEAR).astype(np.int64)
+
+    edges = np.append(np.asarray(bin_edges, dtype=np.float64), np.inf)
+    histogram = np.bincount(np.searchsorted(edges, term_years, side='right'), minlength=len(edges) + 1)[1:len(edges)]
+    bins = [{'from': float(low), 'to': None if np.isinf(high) else float(high), 'count': int(count)}
+            for low, high, count in zip(edges[:-1], edges[1:], histogram)]
+
+    overall = percentiles_from_counts(np.bincount(term_days)[None, :], percentiles)[0] / DAYS_PER_YEAR if len(term_days) else []
+    report = {
+        'rows': int(len(years)),
+        'term_sentences': int(len(term_years)),
+        **{name.lower(): int(np.count_nonzero(mask)) for name, mask in indeterminate_masks.items()},
+        'mean_years': float(term_years.mean(dtype=np.float64)) if len(term_years) else None,
+        'percentiles': {f'{p:g}': float(value) for p, value in zip(percentiles, overall)},
+        'histogram': bins,
+        'breakdowns': {},
+    }
+    for column in BREAKDOWN_COLUMNS:
+        if f'{column}_codes' in arrays:
+            report['breakdowns'][column] = breakdown(arrays[f'{column}_codes'], arrays[f'{column}_labels'], term_mask,
+                                                     term_days, term_years, indeterminate_masks, percentiles)
+    return report
+
+def _format_years(value) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+def print_report(report: Dict):
+    """Print the report as plain-text tables."""
+    print(f"Sentences: {report['rows']} ({report['term_sentences']} term, "
+          f"{report['life']} life, {report['death']} death)")
+    if report['term_sentences']:
+        percentiles = ", ".join(f"p{p} {_format_years(value)}" for p, value in report['percentiles'].items())
+        print(f"Term sentences: mean {_format_years(report['mean_years'])} years; {percentiles}")
+
+    print("\nSentence length histogram (years):")
+    largest = max((entry['count'] for entry in report['histogram']), default=0) or 1
+    for entry in report['histogram']:
+        span = f"{entry['from']:g}+" if entry['to'] is None else f"{entry['from']:g}-{entry['to']:g}"
+        print(f"  {span:>9}: {entry['count']:>9}  {'#' * round(40 * entry['count'] / largest)}")
+
+    for column, rows in report['breakdowns'].items():
+        print(f"\nBy {column}:")
+        for row in rows:
+            percentiles = " ".join(f"p{p} {_format_years(value)}" for p, value in row['percentiles'].items())
+            print(f"  {row['label'][:28]:<28} {row['count']:>9} ({row['share']*100:5.1f}%)  "
+                  f"mean {_format_years(row['mean_years']):>5}  {percentiles}  life {row['life']}  death {row['death']}")
+
+def main():
+    """
+    Main function to run the sentence analytics.
+    """
+    project_dir = Path(__file__).parent.parent
+    parser = argparse.ArgumentParser(description='Histograms, percentiles and breakdowns of extracted sentences.')
+    parser.add_argument('--input', type=Path, default=project_dir / 'data' / 'extracted_sentences' / 'sentence_arrays.npz',
+                        help='sentence_arrays.npz written by extract_sentences.py')
+    parser.add_argument('--bins', type=lambda text: [float(edge) for edge in text.split(',')], default=DEFAULT_BIN_EDGES,
+                        help='Comma-separated histogram edges in years; the last bin is open-ended')
+    parser.add_argument('--percentiles', type=lambda text: [float(p) for p in text.split(',')], default=DEFAULT_PERCENTILES,
+                        help='Comma-separated percentiles to report')
+    parser.add_argument('--json', type=Path, help='Also write the report as JSON to this path')
+    args = parser.parse_args()
+
+    if not args.input.exists():
+        print(f"Error: analytics arrays not found at {args.input} (run extract_sentences.py first)")
+        return
+
+    start = time.perf_counter()
+    report = analyze(load_sentence_arrays(args.input), args.bins, args.percentiles)
+    elapsed = time.perf_counter() - start
+
+    print_report(report)
+    print(f"\nComputed in {elapsed*1000:.0f} ms")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved report to: {args.json}")
+
+if __name__ == "__main__":
+    main()